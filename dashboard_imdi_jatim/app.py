@@ -1,297 +1,1036 @@
-import pandas as pd
-from flask import Flask, render_template, jsonify, request
-import os
-import glob
-import sys
-
-app = Flask(__name__)
-
-# --- KONFIGURASI ---
-EXCEL_FILE = 'data_dashboard_internet.xlsx'
-MASTER_DATA = None
-LOAD_STATUS = {"status": "init", "message": "Menunggu proses loading...", "details": []}
-
-def log_status(msg):
-    print(msg)
-    LOAD_STATUS["details"].append(msg)
-
-def load_data():
-    global MASTER_DATA
-    log_status(f"--- MEMULAI PROSES LOADING DATA ---")
-    log_status(f"Current Directory: {os.getcwd()}")
-    log_status(f"Files: {os.listdir('.')}")
-    
-    all_dfs = []
-    target_years = [2022, 2023, 2024, 2025]
-    
-    # Mapping nama kolom agar seragam
-    col_mapping_base = {
-        'kab/kota': 'city',
-        'Pilar Infrastruktur dan Ekosistem': 'infra',
-        'Pilar Keterampilan Digital': 'skill',
-        'Pilar Pemberdayaan': 'empowerment',
-        'Pilar Pekerjaan': 'job'
-    }
-
-    # 1. COBA BACA EXCEL LANGSUNG (Prioritas Utama)
-    if os.path.exists(EXCEL_FILE):
-        log_status(f"[OK] File Excel ditemukan: {EXCEL_FILE}")
-        try:
-            xl = pd.ExcelFile(EXCEL_FILE)
-            sheet_names = xl.sheet_names
-            log_status(f"[INFO] Sheet ditemukan: {sheet_names}")
-            
-            for sheet in sheet_names:
-                # Cek apakah nama sheet mengandung tahun target
-                year = None
-                for y in target_years:
-                    if str(y) in sheet:
-                        year = y
-                        break
-                
-                if year:
-                    try:
-                        df = pd.read_excel(EXCEL_FILE, sheet_name=sheet)
-                        # Bersihkan nama kolom
-                        df.columns = [str(c).strip() for c in df.columns]
-                        
-                        # Rename kolom sesuai mapping
-                        new_cols = {}
-                        for col in df.columns:
-                            for k, v in col_mapping_base.items():
-                                if k.lower() in col.lower():
-                                    new_cols[col] = v
-                        df.rename(columns=new_cols, inplace=True)
-                        
-                        df['year'] = year
-                        
-                        # Kolom skor biasanya bernama tahun (misal '2025')
-                        if str(year) in df.columns:
-                            df['score'] = df[str(year)]
-                        elif 'score' not in df.columns:
-                            # Fallback: hitung rata-rata pilar jika ada
-                            pilar_cols = [c for c in ['infra', 'skill', 'empowerment', 'job'] if c in df.columns]
-                            if pilar_cols:
-                                df['score'] = df[pilar_cols].mean(axis=1)
-                            else:
-                                df['score'] = 0
-                        
-                        if 'city' in df.columns:
-                            all_dfs.append(df)
-                            log_status(f"[SUKSES] Data Excel tahun {year} dimuat dari sheet '{sheet}'")
-                    except Exception as e:
-                        log_status(f"[ERROR] Gagal baca sheet {sheet}: {e}")
-        except Exception as e:
-            log_status(f"[ERROR] Gagal membuka file Excel: {e}")
-    else:
-        log_status(f"[INFO] File {EXCEL_FILE} tidak ditemukan, beralih ke CSV...")
-
-    # 2. COBA BACA CSV (Fallback / Alternatif jika Excel dipecah)
-    # Sistem mungkin memecah Excel menjadi: "data_dashboard_internet.xlsx - IMDI 2025.csv"
-    if len(all_dfs) < len(target_years):
-        csv_files = glob.glob("*.csv")
-        log_status(f"[INFO] File CSV ditemukan: {csv_files}")
-        
-        for year in target_years:
-            # Skip jika tahun ini sudah didapat dari Excel
-            if any(not d.empty and d['year'].iloc[0] == year for d in all_dfs):
-                continue
-                
-            # Cari file yang mengandung tahun tersebut
-            # Case insensitive search
-            matching = [f for f in csv_files if str(year) in f and "IMDI" in f]
-            if not matching: 
-                 matching = [f for f in csv_files if str(year) in f] # Coba pencarian lebih luas
-            
-            if matching:
-                fname = matching[0]
-                try:
-                    df = pd.read_csv(fname)
-                    # Bersihkan nama kolom
-                    df.columns = [str(c).strip() for c in df.columns]
-                    
-                    # Rename
-                    new_cols = {}
-                    for col in df.columns:
-                        for k, v in col_mapping_base.items():
-                            if k.lower() in col.lower():
-                                new_cols[col] = v
-                    df.rename(columns=new_cols, inplace=True)
-                    
-                    if 'city' not in df.columns:
-                        log_status(f"[SKIP] File {fname} tidak memiliki kolom kota.")
-                        continue
-
-                    df['year'] = year
-                    
-                    # Skor
-                    if str(year) in df.columns:
-                        df['score'] = df[str(year)]
-                    else:
-                        pilar_cols = [c for c in ['infra', 'skill', 'empowerment', 'job'] if c in df.columns]
-                        if pilar_cols:
-                            df['score'] = df[pilar_cols].mean(axis=1)
-                        else:
-                            df['score'] = 0
-                    
-                    all_dfs.append(df)
-                    log_status(f"[SUKSES] Data CSV tahun {year} dimuat dari file: {fname}")
-                except Exception as e:
-                    log_status(f"[ERROR] Gagal baca CSV {fname}: {e}")
-            else:
-                log_status(f"[WARNING] Tidak ditemukan file data untuk tahun {year}")
-
-    # 3. GABUNGKAN SEMUA
-    if all_dfs:
-        try:
-            MASTER_DATA = pd.concat(all_dfs, ignore_index=True)
-            
-            # Konversi Tipe Data
-            numeric_cols = ['score', 'infra', 'skill', 'empowerment', 'job']
-            for col in numeric_cols:
-                if col in MASTER_DATA.columns:
-                    MASTER_DATA[col] = pd.to_numeric(MASTER_DATA[col], errors='coerce').fillna(0)
-            
-            # Standardisasi Nama Kota
-            MASTER_DATA['city'] = MASTER_DATA['city'].astype(str).str.upper().str.strip()
-            
-            # Hitung Growth (YoY)
-            MASTER_DATA.sort_values(by=['city', 'year'], inplace=True)
-            MASTER_DATA['growth'] = MASTER_DATA.groupby('city')['score'].pct_change() * 100
-            MASTER_DATA['growth'] = MASTER_DATA['growth'].fillna(0).round(2)
-            
-            LOAD_STATUS["status"] = "success"
-            LOAD_STATUS["message"] = f"Berhasil memuat {len(MASTER_DATA)} baris data."
-            log_status("[FINAL] Data berhasil digabungkan dan siap digunakan.")
-        except Exception as e:
-            LOAD_STATUS["status"] = "error"
-            LOAD_STATUS["message"] = f"Error penggabungan data: {e}"
-    else:
-        LOAD_STATUS["status"] = "error"
-        LOAD_STATUS["message"] = "Tidak ada data yang berhasil dimuat dari Excel maupun CSV."
-
-# Load data saat aplikasi start
-load_data()
-
-# --- ROUTES ---
-
-@app.route('/')
-def index():
-    return render_template('index.html')
-
-@app.route('/api/debug_status')
-def debug_status():
-    """Endpoint untuk mengecek log loading data"""
-    return jsonify(LOAD_STATUS)
-
-@app.route('/api/dashboard_analysis')
-def get_dashboard_analysis():
-    if MASTER_DATA is None or MASTER_DATA.empty:
-        return jsonify({
-            'error': True, 
-            'message': LOAD_STATUS['message'],
-            'details': LOAD_STATUS['details']
-        })
-
-    try:
-        year_param = int(request.args.get('year', 2025))
-        
-        # Filter data tahun ini
-        df_curr = MASTER_DATA[MASTER_DATA['year'] == year_param].copy()
-        
-        if df_curr.empty:
-            # Jika tahun 2025 belum ada, gunakan tahun terakhir yang tersedia
-            max_year = int(MASTER_DATA['year'].max())
-            df_curr = MASTER_DATA[MASTER_DATA['year'] == max_year].copy()
-            year_param = max_year # Update year param agar UI tahu
-        
-        # Statistik
-        avg_score = df_curr['score'].mean()
-        max_score = df_curr['score'].max()
-        min_score = df_curr['score'].min()
-        gap = max_score - min_score
-        
-        # Top & Bottom
-        # Gunakan nlargest/nsmallest
-        top_5 = df_curr.nlargest(5, 'score')[['city', 'score', 'growth']].to_dict(orient='records')
-        bottom_5 = df_curr.nsmallest(5, 'score')[['city', 'score', 'growth']].to_dict(orient='records')
-        
-        # Data Kuadran
-        quadrant_data = []
-        for _, row in df_curr.iterrows():
-            hc = (row.get('skill', 0) + row.get('empowerment', 0)) / 2
-            quadrant_data.append({
-                'city': row['city'],
-                'x': row.get('infra', 0),
-                'y': hc,
-                'r': row['score'] / 5
-            })
-            
-        # Watchlist (Growth Negatif)
-        declining = df_curr[df_curr['growth'] < 0][['city', 'growth', 'score']].to_dict(orient='records')
-
-        return jsonify({
-            'year': year_param,
-            'stats': {
-                'avg': round(avg_score, 2),
-                'gap': round(gap, 2),
-                'highest': top_5[0]['city'] if top_5 else '-',
-                'lowest': bottom_5[0]['city'] if bottom_5 else '-'
-            },
-            'top_5': top_5,
-            'bottom_5': bottom_5,
-            'declining': declining,
-            'quadrant': quadrant_data
-        })
-    except Exception as e:
-        return jsonify({'error': True, 'message': f"Runtime Error: {str(e)}"})
-
-@app.route('/api/simulation_data')
-def get_simulation_data():
-    if MASTER_DATA is None or MASTER_DATA.empty: return jsonify([])
-    cities = sorted(MASTER_DATA['city'].unique().tolist())
-    return jsonify(cities)
-
-@app.route('/api/analyze_city')
-def analyze_city():
-    city = request.args.get('city', '').upper()
-    if MASTER_DATA is None or MASTER_DATA.empty: return jsonify({'error': 'No Data'})
-    
-    df_city = MASTER_DATA[MASTER_DATA['city'] == city].sort_values('year')
-    if df_city.empty: return jsonify({'found': False})
-    
-    latest = df_city.iloc[-1]
-    curr_year = latest['year']
-    
-    df_prov = MASTER_DATA[MASTER_DATA['year'] == curr_year]
-    prov_avg = df_prov[['score', 'infra', 'skill', 'empowerment', 'job']].mean()
-    
-    comparison = {
-        'score_diff': latest['score'] - prov_avg['score'],
-        'infra_diff': latest['infra'] - prov_avg['infra'],
-        'skill_diff': latest['skill'] - prov_avg['skill'],
-        'empowerment_diff': latest['empowerment'] - prov_avg['empowerment'],
-        'job_diff': latest['job'] - prov_avg['job']
-    }
-    
-    recommendations = []
-    if comparison['infra_diff'] < -5:
-        recommendations.append("🚨 KRITIS: Infrastruktur tertinggal. Prioritaskan akses internet.")
-    if comparison['skill_diff'] < 0:
-        recommendations.append("⚠️ Skill Digital di bawah rata-rata. Perbanyak pelatihan.")
-    if comparison['empowerment_diff'] < 0:
-        recommendations.append("💡 Pemberdayaan rendah. Dorong adopsi digital UMKM.")
-        
-    if not recommendations: recommendations.append("✅ Kinerja Baik. Pertahankan.")
-
-    return jsonify({
-        'found': True,
-        'city': city,
-        'latest_data': latest.to_dict(),
-        'prov_avg': prov_avg.to_dict(),
-        'comparison': comparison,
-        'recommendations': recommendations
-    })
-
-if __name__ == '__main__':
+import numpy as np
+import pandas as pd
+from flask import Flask, render_template, jsonify, request
+import os
+import re
+import glob
+import sys
+import json
+import gzip
+import time
+import hashlib
+import zipfile
+import threading
+import xml.etree.ElementTree as ET
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from choropleth import ZOOM_LEVELS, GeometryCache, feature_collection
+
+app = Flask(__name__)
+
+# --- KONFIGURASI ---
+EXCEL_FILE = 'data_dashboard_internet.xlsx'
+BASE_YEARS = [2022, 2023, 2024, 2025]  # Tahun lain ikut dibaca jika ada di nama sheet/CSV
+YEAR_PATTERN = re.compile(r'20\d{2}')
+MASTER_DATA = None  # Sama dengan DATA.master; handler sebaiknya memakai DATA
+DATA = None         # DataSnapshot aktif
+METRIC_COLS = ['score', 'infra', 'skill', 'empowerment', 'job']
+PILLAR_COLS = ['infra', 'skill', 'empowerment', 'job']
+QUADRANT_SPLIT = 50  # Garis kuadran (infra vs SDM) di grafik dashboard
+LOAD_STATUS = {
+    "status": "init", "message": "Menunggu proses loading...", "details": [],
+    "data_version": 0, "data_tag": None,
+    # Ukuran MASTER_DATA (byte): hasil compact_master, versi float64/object dari
+    # data yang sama, dan frame mentah hasil parse (None jika dimuat dari cache)
+    "memory": {},
+    # Progres load/reload terakhir (dibaca lewat /api/debug_status)
+    "reload": {"state": "idle", "step": None, "started_at": None, "finished_at": None,
+               "parsed": [], "reused": [], "error": None, "reloads": 0}
+}
+MAX_LOG_LINES = 500
+
+# Cache MASTER_DATA (hasil akhir load_data) dalam format Feather. Kuncinya berisi
+# mtime, ukuran, dan hash SHA-256 setiap file sumber, jadi Excel/CSV hanya
+# di-parse ulang jika isinya berubah. Butuh pyarrow; tanpa pyarrow cache dilewati.
+CACHE_FILE = 'master_data_cache.feather'
+CACHE_VERSION = 3  # Naikkan jika logika normalisasi di parse_sources() berubah
+
+# MASTER_DATA hanya menyimpan kolom yang dipakai API: city categorical, year
+# int16, skor/pilar/growth float32 (lihat compact_master). Jika MASTER_DATA_MMAP
+# aktif, cache Feather ditulis tanpa kompresi dan kolom numerik MASTER_DATA
+# langsung menunjuk ke file cache yang di-memory-map, jadi semua worker
+# Gunicorn berbagi halaman yang sama di page cache OS (read-only).
+# Di Windows file yang sedang di-map tidak bisa ditimpa os.replace, sehingga
+# write_cache saat reload akan gagal; di sana cache dibaca biasa (disalin).
+MASTER_COLS = ['city', 'year'] + METRIC_COLS + ['growth']
+MASTER_DATA_MMAP = os.name != 'nt'
+
+# Hot reload: file sumber dicek setiap DATA_CHECK_INTERVAL detik. Jika isinya
+# berubah, hanya sheet/CSV yang berubah yang di-parse ulang, lalu DATA diganti
+# dengan snapshot baru dalam satu assignment.
+DATA_WATCH_ENABLED = True
+DATA_CHECK_INTERVAL = 10
+RELOAD_LOCK = threading.Lock()
+
+# <c ... t="s"><v>12</v>: sel yang merujuk shared string nomor 12
+SHARED_STRING_REF = re.compile(rb'<c\b[^>]*\bt="s"[^>]*>\s*<v>(\d+)</v>')
+XLSX_MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+XLSX_REL_ID = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id'
+
+# Peta choropleth (/api/choropleth): batas kab/kota dari shapefile BPS,
+# disederhanakan per zoom level (lihat choropleth.ZOOM_LEVELS) dan disimpan di
+# GEO_CACHE_DIR.
+SHAPEFILE = os.path.join('jatimshp', 'Jawa_Timur_ADMIN_BPS')
+GEO_CACHE_DIR = 'geo_cache'
+GEO_COLS = METRIC_COLS + ['growth']
+GEOMETRY = GeometryCache(SHAPEFILE, GEO_CACHE_DIR)
+
+# Cache HTTP respons API: setiap respons dibuat sekali per versi data lalu
+# disimpan di DataSnapshot dalam bentuk mentah, gzip dan brotli (jika modul
+# brotli terpasang). ETag diturunkan dari tag versi data, jadi revalidasi
+# (If-None-Match) dijawab 304 tanpa membuat ulang payload. Byte gzip/br
+# berbeda dari versi mentahnya, jadi tiap encoding punya ETag sendiri
+# (akhiran ETAG_SUFFIXES).
+MIN_COMPRESS_BYTES = 512
+ETAG_SUFFIXES = {'identity': '', 'gzip': '-gz', 'br': '-br'}
+
+def log_status(msg):
+    print(msg)
+    LOAD_STATUS["details"].append(msg)
+    del LOAD_STATUS["details"][:-MAX_LOG_LINES]
+
+class DataSnapshot:
+    # Satu versi data beserta semua turunannya. Request mengambil DATA sekali
+    # lalu memakai objek yang sama sampai selesai; reload membangun objek baru
+    # di background dan menukarnya, jadi request tidak pernah melihat campuran
+    # data lama dan baru.
+    def __init__(self, master, parts=None, sources=None, version=0):
+        self.master = master
+        # source id ('excel:<sheet>' / 'csv:<file>') -> {'fingerprint', 'year', 'frame'}
+        # 'frame' None berarti ambil baris tahun itu dari master saat dibutuhkan
+        self.parts = parts or {}
+        self.sources = sources or {}
+        self.version = version
+        self.tag = data_tag(self.sources)
+        self.loaded_at = time.time()
+        self.memory = {}  # Diisi build_data() (memory_report)
+        self.analysis = build_snapshots(master)
+        self.city_year, self.city_latest, self.prov_avg = build_indexes(master)
+        self.simulation = build_simulation(master)
+        self.responses = {}  # kunci respons -> (etag, {encoding: bytes}), lihat cached_payload()
+
+    def part_frame(self, source_id):
+        # Frame per sheet/CSV sebelum digabung (tanpa growth), untuk dipakai ulang
+        part = self.parts[source_id]
+        if part['frame'] is None:
+            years = [p['year'] for p in self.parts.values()]
+            if years.count(part['year']) > 1:
+                return None  # Dua sumber untuk tahun yang sama: tidak bisa dipisah lagi
+            rows = self.master[self.master['year'] == part['year']]
+            part['frame'] = widen(rows.drop(columns=['growth']))
+        return part['frame']
+
+def source_files():
+    # File yang bisa dibaca parse_sources(): Excel utama + semua CSV di folder kerja
+    files = [EXCEL_FILE] if os.path.exists(EXCEL_FILE) else []
+    return files + sorted(glob.glob("*.csv"))
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def source_fingerprint(previous=None):
+    # {file: {mtime, size, sha256}}. Hash dari kunci cache sebelumnya dipakai
+    # ulang jika mtime dan ukuran file tidak berubah.
+    previous = previous or {}
+    sources = {}
+    for path in source_files():
+        st = os.stat(path)
+        old = previous.get(path)
+        if old and old['mtime'] == st.st_mtime_ns and old['size'] == st.st_size:
+            sha256 = old['sha256']
+        else:
+            sha256 = file_hash(path)
+        sources[path] = {'mtime': st.st_mtime_ns, 'size': st.st_size, 'sha256': sha256}
+    return sources
+
+def content_hashes(sources):
+    return {path: info['sha256'] for path, info in sources.items()}
+
+def data_tag(sources):
+    # Tag versi data: hash isi file sumber + CACHE_VERSION. Nomor versi di
+    # DataSnapshot dihitung per proses, jadi tidak bisa dipakai untuk ETag yang
+    # harus sama di semua worker untuk data yang sama.
+    key = json.dumps({'version': CACHE_VERSION, 'sources': content_hashes(sources)}, sort_keys=True)
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+def sheet_fingerprints(path):
+    # {nama sheet: hash} dibaca langsung dari zip .xlsx tanpa pandas: hash XML
+    # sheet + isi shared string yang dirujuknya, jadi sheet yang tidak disentuh
+    # tetap sama walau sheet lain berubah. None jika bukan .xlsx yang bisa dibaca.
+    try:
+        with zipfile.ZipFile(path) as z:
+            workbook = ET.fromstring(z.read('xl/workbook.xml'))
+            rels = ET.fromstring(z.read('xl/_rels/workbook.xml.rels'))
+            targets = {rel.get('Id'): rel.get('Target') for rel in rels}
+            strings = []
+            if 'xl/sharedStrings.xml' in z.namelist():
+                for si in ET.fromstring(z.read('xl/sharedStrings.xml')).iter(f'{XLSX_MAIN_NS}si'):
+                    strings.append(''.join(t.text or '' for t in si.iter(f'{XLSX_MAIN_NS}t')))
+
+            result = {}
+            for sheet in workbook.iter(f'{XLSX_MAIN_NS}sheet'):
+                target = targets[sheet.get(XLSX_REL_ID)]
+                member = target.lstrip('/') if target.startswith('/') else 'xl/' + target
+                xml = z.read(member)
+                digest = hashlib.sha256(xml)
+                for index in SHARED_STRING_REF.findall(xml):
+                    digest.update(b'\0' + strings[int(index)].encode('utf-8'))
+                result[sheet.get('name')] = digest.hexdigest()
+            return result
+    except Exception as e:
+        log_status(f"[INFO] Sheet {path} tidak bisa di-hash per sheet ({e}), semua sheet di-parse ulang")
+        return None
+
+def compact_master(df):
+    # Hanya MASTER_COLS, dengan tipe ringkas
+    df = df[[c for c in MASTER_COLS if c in df.columns]].reset_index(drop=True)
+    types = {c: np.float32 for c in df.columns if c not in ('city', 'year')}
+    types.update(city='category', year=np.int16)
+    return df.astype(types)
+
+def widen(df):
+    # Salinan dengan kolom float32 sebagai float64 lewat representasi desimal
+    # terpendek, supaya 43.34 tetap 43.34 di JSON (bukan 43.34000015258789).
+    # Dipakai sebelum serialisasi/perhitungan; MASTER_DATA sendiri tetap float32.
+    cols = [c for c in df.columns if df[c].dtype == np.float32]
+    if not cols:
+        return df
+    return df.assign(**{c: df[c].to_numpy().astype(str).astype(np.float64) for c in cols})
+
+def frame_memory(df):
+    return int(df.memory_usage(deep=True).sum()) if df is not None else None
+
+def memory_report(master, parsed=None, mapped=False):
+    wide = master.astype({c: object if c == 'city' else np.int64 if c == 'year' else np.float64
+                          for c in master.columns})
+    report = {'rows': len(master), 'columns': list(master.columns), 'bytes': frame_memory(master),
+              'float64_bytes': frame_memory(wide), 'parsed_bytes': frame_memory(parsed),
+              'memory_mapped': mapped}
+    before = report['parsed_bytes'] or report['float64_bytes']
+    log_status(f"[MEMORY] MASTER_DATA {report['bytes']:,} byte (sebelumnya {before:,} byte)"
+               f"{', memory-mapped' if mapped else ''}")
+    return report
+
+def read_cache():
+    # (tabel Arrow, kunci) dari CACHE_FILE, atau (None, None) jika tidak ada / rusak
+    if pa is None or not os.path.exists(CACHE_FILE):
+        return None, None
+    try:
+        table = feather.read_table(CACHE_FILE, memory_map=MASTER_DATA_MMAP)
+        key = json.loads(table.schema.metadata[b'imdi_cache_key'])
+        return table, key
+    except Exception as e:
+        log_status(f"[WARNING] Cache {CACHE_FILE} tidak bisa dibaca: {e}")
+        return None, None
+
+def write_cache(df, sources, parts):
+    # Tulis ke file sementara lalu rename, supaya worker lain tidak pernah
+    # membaca cache setengah jadi
+    if pa is None:
+        return
+    key = json.dumps({'version': CACHE_VERSION, 'sources': sources,
+                      'parts': {sid: [p['fingerprint'], p['year']] for sid, p in parts.items()}})
+    tmp_path = f"{CACHE_FILE}.{os.getpid()}.tmp"
+    try:
+        table = pa.Table.from_pandas(df)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), b'imdi_cache_key': key.encode()})
+        feather.write_feather(table, tmp_path, compression='uncompressed' if MASTER_DATA_MMAP else None)
+        os.replace(tmp_path, CACHE_FILE)
+        log_status(f"[CACHE] Data disimpan ke {CACHE_FILE}")
+        return True
+    except Exception as e:
+        log_status(f"[WARNING] Gagal menyimpan cache {CACHE_FILE}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+def cache_frame(table):
+    # DataFrame dari tabel cache. Dengan MASTER_DATA_MMAP kolom numerik tanpa
+    # null tidak disalin (split_blocks): array-nya menunjuk ke file yang di-map.
+    if MASTER_DATA_MMAP:
+        return table.to_pandas(split_blocks=True)
+    return table.to_pandas()
+
+def build_data(previous, progress):
+    # (DataSnapshot, pesan) dari cache jika masih valid, atau dari sumber dengan
+    # hanya sheet/CSV yang berubah di-parse ulang. master None jika gagal.
+    version = (previous.version if previous else 0) + 1
+    table, key = read_cache()
+    sources = source_fingerprint(key['sources'] if key else (previous.sources if previous else None))
+
+    # 0. CACHE: dipakai jika versi dan hash setiap file sumber masih sama
+    if table is not None and key.get('version') == CACHE_VERSION and \
+            content_hashes(sources) == content_hashes(key['sources']):
+        progress["step"] = "cache"
+        master = cache_frame(table)
+        parts = {sid: {'fingerprint': fp, 'year': year, 'frame': None}
+                 for sid, (fp, year) in key.get('parts', {}).items()}
+        if sources != key['sources']:
+            # File hanya di-touch (mtime berubah, isi sama): perbarui kuncinya
+            write_cache(master, sources, parts)
+        progress["step"] = "index"
+        snapshot = DataSnapshot(master, parts, sources, version)
+        snapshot.memory = memory_report(master, mapped=MASTER_DATA_MMAP)
+        return snapshot, f"Berhasil memuat {len(master)} baris data (cache)."
+
+    progress["step"] = "parse"
+    parsed, parts, message = parse_sources(sources, previous, progress)
+    master, mapped = None, False
+    if parsed is not None:
+        master = compact_master(parsed)
+        # Frame per sheet/CSV tidak disimpan: part_frame() mengambilnya dari master
+        for part in parts.values():
+            part['frame'] = None
+        progress["step"] = "cache"
+        if write_cache(master, sources, parts) and MASTER_DATA_MMAP:
+            table, _ = read_cache()
+            if table is not None:
+                master, mapped = cache_frame(table), True
+    progress["step"] = "index"
+    snapshot = DataSnapshot(master, parts, sources, version)
+    if master is not None:
+        snapshot.memory = memory_report(master, parsed, mapped)
+    return snapshot, message
+
+def swap_data(snapshot, message):
+    # Satu assignment: request yang sedang berjalan tetap memegang snapshot lama
+    global DATA, MASTER_DATA
+    DATA = snapshot
+    MASTER_DATA = snapshot.master
+    LOAD_STATUS["status"] = "success"
+    LOAD_STATUS["message"] = message
+    LOAD_STATUS["data_version"] = snapshot.version
+    LOAD_STATUS["data_tag"] = snapshot.tag
+    LOAD_STATUS["memory"] = snapshot.memory
+    threading.Thread(target=warm_choropleth, args=(snapshot,), name='choropleth-warm', daemon=True).start()
+
+def warm_choropleth(snapshot, level='low'):
+    # Siapkan payload peta zoom terendah untuk semua tahun sebelum diminta
+    try:
+        for year in snapshot.analysis:
+            cached_payload(snapshot, choropleth_key(level, year), lambda: build_choropleth(snapshot, level, year))
+    except Exception as e:
+        log_status(f"[WARNING] Peta choropleth belum bisa disiapkan: {e}")
+
+def load_data():
+    global DATA, MASTER_DATA
+    start = time.perf_counter()
+    log_status(f"--- MEMULAI PROSES LOADING DATA ---")
+    log_status(f"Current Directory: {os.getcwd()}")
+    log_status(f"Files: {os.listdir('.')}")
+
+    progress = LOAD_STATUS["reload"]
+    progress.update(state="running", started_at=time.time(), parsed=[], reused=[], error=None)
+    snapshot, message = build_data(None, progress)
+    if snapshot.master is not None:
+        swap_data(snapshot, message)
+    else:
+        DATA = snapshot
+        LOAD_STATUS["status"] = "error"
+        LOAD_STATUS["message"] = message
+    progress.update(state="idle", step=None, finished_at=time.time())
+    log_status(f"[INFO] Loading selesai dalam {(time.perf_counter() - start) * 1000:.1f} ms")
+
+def reload_data():
+    # Dipanggil watcher jika isi file sumber berubah. Jika gagal, data lama tetap dipakai.
+    with RELOAD_LOCK:
+        start = time.perf_counter()
+        progress = LOAD_STATUS["reload"]
+        progress.update(state="running", step="fingerprint", started_at=time.time(), finished_at=None,
+                        parsed=[], reused=[], error=None)
+        log_status("--- RELOAD DATA (file sumber berubah) ---")
+        try:
+            snapshot, message = build_data(DATA, progress)
+            if snapshot.master is None:
+                raise ValueError(message)
+            swap_data(snapshot, message)
+            progress.update(state="idle", reloads=progress["reloads"] + 1)
+            log_status(f"[RELOAD] Data versi {snapshot.version} aktif "
+                       f"({(time.perf_counter() - start) * 1000:.1f} ms)")
+        except Exception as e:
+            progress.update(state="error", error=str(e))
+            log_status(f"[ERROR] Reload gagal, data lama tetap dipakai: {e}")
+        progress.update(step=None, finished_at=time.time())
+
+def watch_sources():
+    while True:
+        time.sleep(DATA_CHECK_INTERVAL)
+        try:
+            current = DATA.sources if DATA else {}
+            sources = source_fingerprint(current)
+            if content_hashes(sources) != content_hashes(current):
+                reload_data()
+            elif DATA is not None:
+                # Hanya mtime yang berubah: simpan supaya file tidak di-hash ulang terus
+                DATA.sources = sources
+        except Exception as e:
+            log_status(f"[ERROR] Watcher data: {e}")
+
+def analysis_payload(df_curr, year):
+    # Isi respons /api/dashboard_analysis untuk data satu tahun (tanpa iterrows)
+    df_curr = widen(df_curr)
+    scores = df_curr['score']
+    top_5 = df_curr.nlargest(5, 'score')[['city', 'score', 'growth']].to_dict(orient='records')
+    bottom_5 = df_curr.nsmallest(5, 'score')[['city', 'score', 'growth']].to_dict(orient='records')
+
+    # Data Kuadran: x = infrastruktur, y = rata-rata skill & pemberdayaan, r = skor / 5
+    zeros = pd.Series(0, index=df_curr.index)
+    hc = (df_curr.get('skill', zeros) + df_curr.get('empowerment', zeros)) / 2
+    quadrant = pd.DataFrame({
+        'city': df_curr['city'],
+        'x': df_curr.get('infra', zeros),
+        'y': hc,
+        'r': scores / 5
+    }).to_dict(orient='records')
+
+    # Watchlist (Growth Negatif)
+    declining = df_curr[df_curr['growth'] < 0][['city', 'growth', 'score']].to_dict(orient='records')
+
+    return {
+        'year': year,
+        'stats': {
+            'avg': round(scores.mean(), 2),
+            'gap': round(scores.max() - scores.min(), 2),
+            'highest': top_5[0]['city'] if top_5 else '-',
+            'lowest': bottom_5[0]['city'] if bottom_5 else '-'
+        },
+        'top_5': top_5,
+        'bottom_5': bottom_5,
+        'declining': declining,
+        'quadrant': quadrant
+    }
+
+def build_snapshots(master):
+    # Respons /api/dashboard_analysis per tahun, diserialisasi sekali per load;
+    # endpoint cukup lookup dict
+    snapshots = {}
+    if master is not None and not master.empty:
+        for year, df_curr in master.groupby('year', sort=True):
+            snapshots[int(year)] = app.json.dumps(analysis_payload(df_curr, int(year)))
+    return snapshots
+
+def build_indexes(master):
+    # (index (city, year), baris tahun terakhir per kota, rata-rata provinsi
+    # METRIC_COLS per tahun): lookup kota tanpa scan seluruh data per request
+    if master is None or master.empty:
+        return None, None, None
+    by_city = master.sort_values(['city', 'year'], kind='stable')
+    city_year = by_city.set_index(['city', 'year'], drop=False).sort_index()
+    city_latest = by_city.groupby('city').tail(1).set_index('city', drop=False)
+    metrics = [c for c in METRIC_COLS if c in master.columns]
+    prov_avg = widen(master[['year'] + metrics]).groupby('year')[metrics].mean()
+    return city_year, city_latest, prov_avg
+
+def build_choropleth(data, level, year):
+    # GeoJSON (bytes) satu zoom level dengan skor satu tahun.
+    # Kab/kota tanpa data tahun itu tetap digambar dengan nilai null.
+    names, geometries = GEOMETRY.get(level)
+    cols = [c for c in GEO_COLS if c in data.master.columns]
+    rows = widen(data.master[data.master['year'] == year].drop_duplicates('city', keep='last').set_index('city')[cols])
+    values = rows.astype(object).where(rows.notna(), None)
+    properties = []
+    for name in names:
+        city = name.upper()
+        props = {'name': name, 'city': city, 'year': year}
+        if city in values.index:
+            props.update(values.loc[city].to_dict())
+        else:
+            props.update(dict.fromkeys(cols))
+        properties.append(props)
+
+    return feature_collection(geometries, properties, {'year': year, 'level': level}).encode()
+
+def choropleth_key(level, year):
+    # Hash shapefile ikut di kunci (dan ETag): shapefile bukan bagian dari tag versi data
+    GEOMETRY.get(level)
+    return f"choropleth:{level}:{year}:{GEOMETRY.source_hash}"
+
+def cached_payload(data, key, build):
+    # (etag, {encoding: bytes}) untuk respons `key` dari snapshot `data`;
+    # build() -> bytes hanya dipanggil sekali per versi data
+    payload = data.responses.get(key)
+    if payload is None:
+        body = build()
+        encoded = {'identity': body}
+        if len(body) >= MIN_COMPRESS_BYTES:
+            encoded['gzip'] = gzip.compress(body, 9, mtime=0)
+            if brotli is not None:
+                encoded['br'] = brotli.compress(body, quality=11)
+        payload = data.responses[key] = (response_etag(data, key), encoded)
+    return payload
+
+def response_etag(data, key):
+    return hashlib.sha256(f"{data.tag}:{key}".encode()).hexdigest()[:24]
+
+def send_cached(data, key, build, mimetype=None):
+    # Respons dari cached_payload(): 304 jika klien masih punya varian yang
+    # boleh dipakainya (encoding yang diterima), tanpa membuat payload;
+    # selain itu brotli/gzip jika klien menerimanya
+    etag = response_etag(data, key)
+    accepted = [e for e in ('br', 'gzip') if request.accept_encodings[e]] + ['identity']
+    encoding = next((e for e in accepted if request.if_none_match.contains(etag + ETAG_SUFFIXES[e])), None)
+    if encoding is not None:
+        response = app.response_class(status=304)
+    else:
+        _, encoded = cached_payload(data, key, build)
+        encoding = next(e for e in accepted if e in encoded)
+        response = app.response_class(encoded[encoding], mimetype=mimetype or app.json.mimetype)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag + ETAG_SUFFIXES[encoding])
+    # no-cache: browser boleh menyimpan, tapi selalu revalidasi (murah: 304)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    return response
+
+def build_simulation(master):
+    # Per tahun: array pilar dan skor semua kota + bobot tiap pilar dalam skor.
+    # Skor IMDI bukan rata-rata sederhana keempat pilar dan bobotnya berbeda per
+    # tahun, jadi bobot diestimasi dari data (least squares). Jika datanya tidak
+    # cukup, dipakai bobot sama rata.
+    models = {}
+    if master is None or master.empty or any(c not in master.columns for c in PILLAR_COLS):
+        return models
+    for year, df in master.groupby('year', sort=True):
+        df = widen(df.dropna(subset=['score'] + PILLAR_COLS).drop_duplicates('city', keep='last'))
+        pillars = df[PILLAR_COLS].to_numpy(dtype=float)
+        scores = df['score'].to_numpy(dtype=float)
+        weights = np.full(len(PILLAR_COLS), 1 / len(PILLAR_COLS))
+        if len(df) > len(PILLAR_COLS) + 1:
+            design = np.column_stack([pillars, np.ones(len(df))])
+            fit, _, rank, _ = np.linalg.lstsq(design, scores, rcond=None)
+            if rank == design.shape[1]:
+                weights = fit[:-1]
+        cities = df['city'].tolist()
+        models[int(year)] = {
+            'cities': cities,
+            'index': {city: i for i, city in enumerate(cities)},
+            'pillars': pillars,
+            'scores': scores,
+            'ranks': score_ranks(scores),
+            'weights': weights,
+        }
+    return models
+
+def score_ranks(scores):
+    # Peringkat 1 = skor tertinggi; skor sama mendapat peringkat yang sama
+    return np.searchsorted(np.sort(-scores), -scores, side='left') + 1
+
+def quadrant_labels(x, y):
+    # Sama dengan warna kuadran di grafik dashboard
+    labels = np.array(['tertinggal', 'sdm_kuat', 'infra_kuat', 'unggul'])
+    return labels[(x > QUADRANT_SPLIT) * 2 + (y > QUADRANT_SPLIT)]
+
+def run_simulation(model, rows, set_values, add_values):
+    # Terapkan perubahan pilar ke baris `rows` (None = semua kota) lalu hitung
+    # ulang skor, peringkat, dan posisi kuadran semua kota dalam satu operasi
+    # array. Skor baru = skor asli + perubahan pilar x bobot, jadi kota yang
+    # tidak diubah tetap memakai skor aslinya.
+    base = model['pillars']
+    rows = slice(None) if rows is None else rows
+    target = np.nan_to_num(set_values, nan=0.0) + np.isnan(set_values) * base[rows] + add_values
+    pillars = base.copy()
+    pillars[rows] = np.clip(target, 0, 100)
+    scores = model['scores'] + (pillars - base) @ model['weights']
+
+    infra = pillars[:, PILLAR_COLS.index('infra')]
+    hc = (pillars[:, PILLAR_COLS.index('skill')] + pillars[:, PILLAR_COLS.index('empowerment')]) / 2
+    base_infra = base[:, PILLAR_COLS.index('infra')]
+    base_hc = (base[:, PILLAR_COLS.index('skill')] + base[:, PILLAR_COLS.index('empowerment')]) / 2
+    return {
+        'pillars': pillars,
+        'scores': scores,
+        'ranks': score_ranks(scores),
+        'x': infra,
+        'y': hc,
+        'quadrant': quadrant_labels(infra, hc),
+        'base_quadrant': quadrant_labels(base_infra, base_hc),
+    }
+
+def city_recommendations(comparison):
+    recommendations = []
+    if comparison['infra_diff'] < -5:
+        recommendations.append("🚨 KRITIS: Infrastruktur tertinggal. Prioritaskan akses internet.")
+    if comparison['skill_diff'] < 0:
+        recommendations.append("⚠️ Skill Digital di bawah rata-rata. Perbanyak pelatihan.")
+    if comparison['empowerment_diff'] < 0:
+        recommendations.append("💡 Pemberdayaan rendah. Dorong adopsi digital UMKM.")
+        
+    if not recommendations: recommendations.append("✅ Kinerja Baik. Pertahankan.")
+    return recommendations
+
+def reuse_part(previous, source_id, fingerprint, progress, label):
+    # Frame lama untuk sheet/CSV yang isinya tidak berubah, atau None
+    if previous is None or source_id not in previous.parts:
+        return None
+    if previous.parts[source_id]['fingerprint'] != fingerprint:
+        return None
+    df = previous.part_frame(source_id)
+    if df is not None:
+        progress["reused"].append(label)
+    return df
+
+def parse_sources(sources, previous=None, progress=None):
+    # Baca Excel (atau CSV pecahan) dan normalisasi menjadi satu DataFrame.
+    # Sheet/CSV yang fingerprint-nya sama dengan di `previous` tidak di-parse
+    # ulang. Hasil: (data, parts, pesan); data None jika gagal.
+    if progress is None:
+        progress = {"parsed": [], "reused": []}
+    data = None
+    message = None
+    all_dfs = []
+    parts = {}
+    csv_files = glob.glob("*.csv")
+    target_years = set(BASE_YEARS) | {int(y) for f in csv_files for y in YEAR_PATTERN.findall(f)}
+    
+    # Mapping nama kolom agar seragam
+    col_mapping_base = {
+        'kab/kota': 'city',
+        'Pilar Infrastruktur dan Ekosistem': 'infra',
+        'Pilar Keterampilan Digital': 'skill',
+        'Pilar Pemberdayaan': 'empowerment',
+        'Pilar Pekerjaan': 'job'
+    }
+
+    # 1. COBA BACA EXCEL LANGSUNG (Prioritas Utama)
+    if os.path.exists(EXCEL_FILE):
+        log_status(f"[OK] File Excel ditemukan: {EXCEL_FILE}")
+        try:
+            # Workbook hanya dibuka jika ada sheet yang perlu di-parse ulang,
+            # dan setiap sheet di-parse dari objek yang sama
+            xl = None
+            sheet_keys = sheet_fingerprints(EXCEL_FILE)
+            if sheet_keys is None:
+                xl = pd.ExcelFile(EXCEL_FILE)
+                excel_hash = sources.get(EXCEL_FILE, {}).get('sha256', '')
+                sheet_keys = {sheet: f"{excel_hash}:{sheet}" for sheet in xl.sheet_names}
+            sheet_names = list(sheet_keys)
+            log_status(f"[INFO] Sheet ditemukan: {sheet_names}")
+            target_years |= {int(y) for sheet in sheet_names for y in YEAR_PATTERN.findall(sheet)}
+            target_years = sorted(target_years)
+            
+            for sheet in sheet_names:
+                # Cek apakah nama sheet mengandung tahun target
+                year = None
+                for y in target_years:
+                    if str(y) in sheet:
+                        year = y
+                        break
+                
+                if year:
+                    source_id = f"excel:{sheet}"
+                    df = reuse_part(previous, source_id, sheet_keys[sheet], progress, sheet)
+                    if df is not None:
+                        parts[source_id] = {'fingerprint': sheet_keys[sheet], 'year': year, 'frame': df}
+                        all_dfs.append(df)
+                        log_status(f"[REUSE] Sheet '{sheet}' tidak berubah")
+                        continue
+                    try:
+                        if xl is None:
+                            xl = pd.ExcelFile(EXCEL_FILE)
+                        df = xl.parse(sheet)
+                        # Bersihkan nama kolom
+                        df.columns = [str(c).strip() for c in df.columns]
+                        
+                        # Rename kolom sesuai mapping
+                        new_cols = {}
+                        for col in df.columns:
+                            for k, v in col_mapping_base.items():
+                                if k.lower() in col.lower():
+                                    new_cols[col] = v
+                        df.rename(columns=new_cols, inplace=True)
+                        
+                        df['year'] = year
+                        
+                        # Kolom skor biasanya bernama tahun (misal '2025')
+                        if str(year) in df.columns:
+                            df['score'] = df[str(year)]
+                        elif 'score' not in df.columns:
+                            # Fallback: hitung rata-rata pilar jika ada
+                            pilar_cols = [c for c in ['infra', 'skill', 'empowerment', 'job'] if c in df.columns]
+                            if pilar_cols:
+                                df['score'] = df[pilar_cols].mean(axis=1)
+                            else:
+                                df['score'] = 0
+                        
+                        if 'city' in df.columns:
+                            all_dfs.append(df)
+                            parts[source_id] = {'fingerprint': sheet_keys[sheet], 'year': year, 'frame': df}
+                            progress["parsed"].append(sheet)
+                            log_status(f"[SUKSES] Data Excel tahun {year} dimuat dari sheet '{sheet}'")
+                    except Exception as e:
+                        log_status(f"[ERROR] Gagal baca sheet {sheet}: {e}")
+        except Exception as e:
+            log_status(f"[ERROR] Gagal membuka file Excel: {e}")
+    else:
+        log_status(f"[INFO] File {EXCEL_FILE} tidak ditemukan, beralih ke CSV...")
+    target_years = sorted(target_years)
+
+    # 2. COBA BACA CSV (Fallback / Alternatif jika Excel dipecah)
+    # Sistem mungkin memecah Excel menjadi: "data_dashboard_internet.xlsx - IMDI 2025.csv"
+    if len(all_dfs) < len(target_years):
+        log_status(f"[INFO] File CSV ditemukan: {csv_files}")
+        
+        for year in target_years:
+            # Skip jika tahun ini sudah didapat dari Excel
+            if any(not d.empty and d['year'].iloc[0] == year for d in all_dfs):
+                continue
+                
+            # Cari file yang mengandung tahun tersebut
+            # Case insensitive search
+            matching = [f for f in csv_files if str(year) in f and "IMDI" in f]
+            if not matching: 
+                 matching = [f for f in csv_files if str(year) in f] # Coba pencarian lebih luas
+            
+            if matching:
+                fname = matching[0]
+                source_id = f"csv:{fname}"
+                fingerprint = sources.get(fname, {}).get('sha256')
+                df = reuse_part(previous, source_id, fingerprint, progress, fname)
+                if df is not None:
+                    parts[source_id] = {'fingerprint': fingerprint, 'year': year, 'frame': df}
+                    all_dfs.append(df)
+                    log_status(f"[REUSE] CSV {fname} tidak berubah")
+                    continue
+                try:
+                    df = pd.read_csv(fname)
+                    # Bersihkan nama kolom
+                    df.columns = [str(c).strip() for c in df.columns]
+                    
+                    # Rename
+                    new_cols = {}
+                    for col in df.columns:
+                        for k, v in col_mapping_base.items():
+                            if k.lower() in col.lower():
+                                new_cols[col] = v
+                    df.rename(columns=new_cols, inplace=True)
+                    
+                    if 'city' not in df.columns:
+                        log_status(f"[SKIP] File {fname} tidak memiliki kolom kota.")
+                        continue
+
+                    df['year'] = year
+                    
+                    # Skor
+                    if str(year) in df.columns:
+                        df['score'] = df[str(year)]
+                    else:
+                        pilar_cols = [c for c in ['infra', 'skill', 'empowerment', 'job'] if c in df.columns]
+                        if pilar_cols:
+                            df['score'] = df[pilar_cols].mean(axis=1)
+                        else:
+                            df['score'] = 0
+                    
+                    all_dfs.append(df)
+                    parts[source_id] = {'fingerprint': fingerprint, 'year': year, 'frame': df}
+                    progress["parsed"].append(fname)
+                    log_status(f"[SUKSES] Data CSV tahun {year} dimuat dari file: {fname}")
+                except Exception as e:
+                    log_status(f"[ERROR] Gagal baca CSV {fname}: {e}")
+            else:
+                log_status(f"[WARNING] Tidak ditemukan file data untuk tahun {year}")
+
+    # 3. GABUNGKAN SEMUA
+    if all_dfs:
+        try:
+            data = pd.concat(all_dfs, ignore_index=True)
+            
+            # Konversi Tipe Data
+            numeric_cols = ['score', 'infra', 'skill', 'empowerment', 'job']
+            for col in numeric_cols:
+                if col in data.columns:
+                    data[col] = pd.to_numeric(data[col], errors='coerce').fillna(0)
+            
+            # Standardisasi Nama Kota
+            data['city'] = data['city'].astype(str).str.upper().str.strip()
+            
+            # Hitung Growth (YoY)
+            data.sort_values(by=['city', 'year'], inplace=True)
+            data['growth'] = data.groupby('city')['score'].pct_change() * 100
+            data['growth'] = data['growth'].fillna(0).round(2)
+            
+            message = f"Berhasil memuat {len(data)} baris data."
+            log_status("[FINAL] Data berhasil digabungkan dan siap digunakan.")
+        except Exception as e:
+            data = None
+            message = f"Error penggabungan data: {e}"
+    else:
+        message = "Tidak ada data yang berhasil dimuat dari Excel maupun CSV."
+    return data, parts, message
+
+# Load data saat aplikasi start
+load_data()
+if DATA_WATCH_ENABLED:
+    threading.Thread(target=watch_sources, name='data-watch', daemon=True).start()
+
+# --- ROUTES ---
+
+@app.route('/')
+def index():
+    return render_template('index.html')
+
+@app.route('/api/debug_status')
+def debug_status():
+    """Endpoint untuk mengecek log loading data"""
+    # Salinan, karena watcher bisa sedang menulis LOAD_STATUS
+    status = dict(LOAD_STATUS)
+    status["details"] = list(status["details"])
+    status["reload"] = dict(status["reload"])
+    return jsonify(status)
+
+@app.route('/api/dashboard_analysis')
+def get_dashboard_analysis():
+    data = DATA
+    if data is None or data.master is None or data.master.empty:
+        return jsonify({
+            'error': True, 
+            'message': LOAD_STATUS['message'],
+            'details': LOAD_STATUS['details']
+        })
+
+    try:
+        year_param = int(request.args.get('year', 2025))
+        
+        # Snapshot sudah dihitung saat load (build_snapshots)
+        year = year_param if year_param in data.analysis else None
+        if year is None:
+            # Jika tahun 2025 belum ada, gunakan tahun terakhir yang tersedia (year di respons ikut berubah)
+            year = max(data.analysis)
+
+        return send_cached(data, f"dashboard_analysis:{year}", lambda: data.analysis[year].encode())
+    except Exception as e:
+        return jsonify({'error': True, 'message': f"Runtime Error: {str(e)}"})
+
+@app.route('/api/simulation_data')
+def get_simulation_data():
+    data = DATA
+    if data is None or data.master is None or data.master.empty: return jsonify([])
+    return send_cached(data, "simulation_data",
+                       lambda: app.json.dumps(sorted(data.master['city'].unique().tolist())).encode())
+
+@app.route('/api/analyze_city')
+def analyze_city():
+    city = request.args.get('city', '').upper()
+    data = DATA
+    if data is None or data.master is None or data.master.empty: return jsonify({'error': 'No Data'})
+    
+    if city not in data.city_latest.index: return jsonify({'found': False})
+
+    return send_cached(data, f"analyze_city:{city}", lambda: app.json.dumps(city_analysis(data, city)).encode())
+
+def city_analysis(data, city):
+    # Isi respons /api/analyze_city untuk kota yang ada di data
+    latest = widen(data.city_latest.loc[[city]]).iloc[0]
+    curr_year = latest['year']
+    
+    prov_avg = data.prov_avg.loc[curr_year].rename(None)
+    
+    comparison = {
+        'score_diff': latest['score'] - prov_avg['score'],
+        'infra_diff': latest['infra'] - prov_avg['infra'],
+        'skill_diff': latest['skill'] - prov_avg['skill'],
+        'empowerment_diff': latest['empowerment'] - prov_avg['empowerment'],
+        'job_diff': latest['job'] - prov_avg['job']
+    }
+    
+    return {
+        'found': True,
+        'city': city,
+        'latest_data': latest.to_dict(),
+        'prov_avg': prov_avg.to_dict(),
+        'comparison': comparison,
+        'recommendations': city_recommendations(comparison)
+    }
+
+@app.route('/api/compare_cities', methods=['GET', 'POST'])
+def compare_cities():
+    """Bandingkan banyak kota dengan rata-rata provinsi sekaligus.
+
+    GET ?cities=SURABAYA,MALANG&year=2024 atau POST {"cities": [...], "year": 2024}.
+    Tanpa year dipakai tahun terakhir setiap kota. Parameter tidak valid
+    dijawab 400, tahun yang tidak ada di data 404.
+    """
+    data = DATA
+    if data is None or data.master is None or data.master.empty: return jsonify({'error': 'No Data'})
+
+    if request.method == 'POST':
+        body = request.get_json(silent=True) or {}
+        cities = body.get('cities') or []
+        year = body.get('year')
+    else:
+        cities = request.args.get('cities', '').split(',')
+        year = request.args.get('year')
+    cities = [str(c).upper().strip() for c in cities if str(c).strip()]
+    if not cities: return jsonify({'error': 'Parameter cities kosong'}), 400
+    try:
+        year = int(year) if year not in (None, '') else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Parameter year tidak valid'}), 400
+    if year is not None and year not in data.prov_avg.index:
+        return jsonify({'error': f"Tidak ada data tahun {year}"}), 404
+
+    # Satu reindex untuk semua kota, lalu selisih dengan rata-rata provinsi tahunnya
+    if year is None:
+        rows = data.city_latest.reindex(cities)
+    else:
+        rows = data.city_year.reindex(pd.MultiIndex.from_arrays([cities, [year] * len(cities)]))
+    found = rows['year'].notna().to_numpy()
+    years = rows['year'].fillna(-1).astype(int).to_numpy()
+    prov_avg = data.prov_avg
+    values = widen(rows[prov_avg.columns]).to_numpy(dtype=float)
+    prov = prov_avg.reindex(years).to_numpy(dtype=float)
+    diffs = values - prov
+
+    results = []
+    for i, city in enumerate(cities):
+        if not found[i]:
+            results.append({'city': city, 'found': False})
+            continue
+        comparison = {f'{c}_diff': float(d) for c, d in zip(prov_avg.columns, diffs[i])}
+        results.append({
+            'city': city,
+            'found': True,
+            'year': int(years[i]),
+            'values': {c: float(v) for c, v in zip(prov_avg.columns, values[i])},
+            'prov_avg': {c: float(v) for c, v in zip(prov_avg.columns, prov[i])},
+            'comparison': comparison,
+            'recommendations': city_recommendations(comparison)
+        })
+    return jsonify({'year': year, 'cities': results})
+
+@app.route('/api/simulate', methods=['GET', 'POST'])
+def simulate():
+    """Simulasi what-if perubahan pilar untuk satu kota atau seluruh provinsi.
+
+    POST {"city": "KOTA SURABAYA", "year": 2025, "set": {"infra": 80}, "add": {"skill": 5}}
+    atau GET ?city=...&year=...&infra=80 (nilai absolut, seperti slider).
+    "set" mengganti nilai pilar, "add" menambahkan poin; nilai dibatasi 0-100.
+    Tanpa city, perubahan berlaku untuk semua kota (skenario provinsi).
+    Tanpa year dipakai tahun terakhir kota tersebut (atau tahun terakhir data).
+    Parameter tidak valid dijawab 400, tahun yang tidak ada di data 404.
+    """
+    data = DATA
+    if data is None or not data.simulation: return jsonify({'error': 'No Data'})
+
+    if request.method == 'POST':
+        body = request.get_json(silent=True) or {}
+        if not isinstance(body, dict):
+            return jsonify({'error': 'Body harus berupa objek JSON'}), 400
+        city, year = body.get('city'), body.get('year')
+        set_values, add_values = body.get('set', {}), body.get('add', {})
+        if not isinstance(set_values, dict) or not isinstance(add_values, dict):
+            return jsonify({'error': '"set" dan "add" harus berupa objek {pilar: angka}'}), 400
+        # Nilai JSON harus angka; string, bool dan null ditolak
+        values = list(set_values.values()) + list(add_values.values())
+        if any(isinstance(v, bool) or not isinstance(v, (int, float)) for v in values):
+            return jsonify({'error': 'Nilai pilar harus berupa angka'}), 400
+    else:
+        city, year = request.args.get('city'), request.args.get('year')
+        set_values = {c: request.args[c] for c in PILLAR_COLS if c in request.args}
+        add_values = {c[4:]: request.args[c] for c in request.args if c.startswith('add_')}
+    city = str(city).upper().strip() if city else None
+
+    unknown = set(set_values) - set(PILLAR_COLS) | set(add_values) - set(PILLAR_COLS)
+    if unknown: return jsonify({'error': f"Pilar tidak dikenal: {sorted(unknown)}. Pilihan: {PILLAR_COLS}"}), 400
+    try:
+        year = int(year) if year not in (None, '') else None
+        set_vector = np.array([float(set_values.get(c, 'nan')) for c in PILLAR_COLS])
+        add_vector = np.array([float(add_values.get(c, 0)) for c in PILLAR_COLS])
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Parameter year atau nilai pilar tidak valid'}), 400
+    if not np.isfinite(add_vector).all() or np.isinf(set_vector).any():
+        return jsonify({'error': 'Nilai pilar tidak valid'}), 400
+
+    if year is None:
+        if city is not None and data.city_latest is not None and city in data.city_latest.index:
+            year = int(data.city_latest.loc[city, 'year'])
+        else:
+            year = max(data.simulation)
+    model = data.simulation.get(year)
+    if model is None: return jsonify({'error': f"Tidak ada data tahun {year}"}), 404
+
+    row = None
+    if city is not None:
+        row = model['index'].get(city)
+        if row is None: return jsonify({'found': False, 'city': city, 'year': year})
+
+    result = run_simulation(model, None if row is None else [row], set_vector, add_vector)
+    scores, ranks, base_scores, base_ranks = result['scores'], result['ranks'], model['scores'], model['ranks']
+    cities = [
+        {
+            'city': name,
+            'score': base,
+            'projected': projected,
+            'delta': projected - base,
+            'rank': rank,
+            'projected_rank': new_rank,
+            'rank_change': rank - new_rank,
+            'x': x, 'y': y, 'r': projected / 5,
+            'quadrant': quadrant,
+            'quadrant_changed': quadrant != base_quadrant,
+        }
+        for name, base, projected, rank, new_rank, x, y, quadrant, base_quadrant in zip(
+            model['cities'], base_scores.tolist(), scores.tolist(), base_ranks.tolist(), ranks.tolist(),
+            result['x'].tolist(), result['y'].tolist(), result['quadrant'].tolist(),
+            result['base_quadrant'].tolist())
+    ]
+    response = {
+        'found': True,
+        'year': year,
+        'city': city,
+        'weights': dict(zip(PILLAR_COLS, model['weights'].tolist())),
+        'stats': {
+            'avg': float(base_scores.mean()),
+            'projected_avg': float(scores.mean()),
+            'gap': float(base_scores.max() - base_scores.min()),
+            'projected_gap': float(scores.max() - scores.min()),
+        },
+        'cities': cities,
+    }
+    if row is not None:
+        response['target'] = {**cities[row], 'pillars': dict(zip(PILLAR_COLS, result['pillars'][row].tolist()))}
+    return jsonify(response)
+
+@app.route('/api/choropleth')
+def choropleth_map():
+    """GeoJSON batas kab/kota dengan skor IMDI, untuk peta choropleth.
+
+    ?year=2024&level=low|medium|high. Tanpa year dipakai tahun terakhir;
+    tahun yang tidak ada di data dijawab 404, level atau year yang tidak
+    valid 400. level low cukup untuk peta provinsi utuh.
+    """
+    data = DATA
+    if data is None or data.master is None or data.master.empty: return jsonify({'error': 'No Data'})
+
+    level = request.args.get('level', 'low')
+    if level not in ZOOM_LEVELS:
+        return jsonify({'error': f"Parameter level harus salah satu dari {list(ZOOM_LEVELS)}"}), 400
+    try:
+        year = int(request.args.get('year') or max(data.analysis))
+    except ValueError:
+        return jsonify({'error': 'Parameter year tidak valid'}), 400
+    if year not in data.analysis:
+        return jsonify({'error': f"Tidak ada data tahun {year}"}), 404
+
+    try:
+        key = choropleth_key(level, year)
+    except (OSError, ValueError) as e:
+        return jsonify({'error': f"Shapefile tidak bisa dibaca: {e}"})
+    return send_cached(data, key, lambda: build_choropleth(data, level, year))
+
+if __name__ == '__main__':
     app.run(debug=True, port=5000)
\ No newline at end of file
@@ -0,0 +1,265 @@
+"""Peta choropleth kab/kota dari shapefile jatimshp, tanpa dependensi GIS.
+
+Shapefile (.shp/.dbf) dibaca langsung, lalu batas wilayah disederhanakan
+(Douglas-Peucker) dan koordinatnya dibulatkan per tingkat zoom. Garis batas
+yang dipakai bersama dua wilayah dipotong di titik pertemuan (junction) dan
+disederhanakan dengan cara yang sama di kedua wilayah, jadi tidak muncul
+celah atau tumpang tindih antar kab/kota setelah penyederhanaan.
+"""
+import os
+import json
+import struct
+import hashlib
+import threading
+import numpy as np
+
+# Tingkat zoom: (toleransi penyederhanaan dalam derajat, jumlah desimal koordinat)
+ZOOM_LEVELS = {
+    'low': (0.01, 3),      # ~1 km, peta provinsi utuh di layar kecil
+    'medium': (0.002, 4),  # ~200 m
+    'high': (0.0005, 5),   # ~50 m, zoom ke satu kab/kota
+}
+GEOMETRY_VERSION = 1  # Naikkan jika logika penyederhanaan berubah
+
+
+def read_dbf(path, encoding='utf-8'):
+    # Record .dbf sebagai list dict {nama field: string}
+    with open(path, 'rb') as f:
+        data = f.read()
+    count, header_len, record_len = struct.unpack('<IHH', data[4:12])
+    fields = []
+    for offset in range(32, header_len - 1, 32):
+        name = data[offset:offset + 11].split(b'\0')[0].decode('ascii')
+        fields.append((name, data[offset + 16]))
+
+    records = []
+    for i in range(count):
+        record = data[header_len + i * record_len:header_len + (i + 1) * record_len]
+        if record[:1] == b'*':  # Record terhapus
+            continue
+        values = {}
+        pos = 1
+        for name, length in fields:
+            values[name] = record[pos:pos + length].decode(encoding, errors='replace').strip()
+            pos += length
+        records.append(values)
+    return records
+
+
+def read_polygons(path):
+    # Ring setiap record .shp (tipe Polygon): list berisi list array (n, 2) lon/lat
+    with open(path, 'rb') as f:
+        data = f.read()
+    shapes = []
+    pos = 100
+    while pos + 8 <= len(data):
+        content_len = struct.unpack('>i', data[pos + 4:pos + 8])[0] * 2
+        content = data[pos + 8:pos + 8 + content_len]
+        pos += 8 + content_len
+        shape_type = struct.unpack('<i', content[:4])[0]
+        if shape_type == 0:
+            shapes.append([])
+            continue
+        if shape_type not in (5, 15, 25):
+            raise ValueError(f"Tipe shape {shape_type} bukan polygon")
+        num_parts, num_points = struct.unpack('<ii', content[36:44])
+        starts = np.frombuffer(content, '<i4', num_parts, 44)
+        points = np.frombuffer(content, '<f8', num_points * 2, 44 + 4 * num_parts).reshape(-1, 2)
+        ends = list(starts[1:]) + [num_points]
+        shapes.append([points[s:e] for s, e in zip(starts, ends)])
+    return shapes
+
+
+def signed_area(ring):
+    x, y = ring[:, 0], ring[:, 1]
+    return 0.5 * float(np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1]))
+
+
+def point_in_ring(point, ring):
+    x, y = point
+    xs, ys = ring[:, 0], ring[:, 1]
+    x2, y2 = np.roll(xs, -1), np.roll(ys, -1)
+    crosses = (ys > y) != (y2 > y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        at_x = xs + (y - ys) * (x2 - xs) / (y2 - ys)
+    return bool(np.count_nonzero(crosses & (x < at_x)) % 2)
+
+
+def simplify_line(points, tolerance):
+    # Douglas-Peucker (iteratif). Titik awal dan akhir selalu dipertahankan.
+    n = len(points)
+    if n < 3:
+        return points
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        a, b = points[start], points[end]
+        segment = points[start + 1:end]
+        dx, dy = b - a
+        length = np.hypot(dx, dy)
+        if length == 0:
+            dist = np.hypot(segment[:, 0] - a[0], segment[:, 1] - a[1])
+        else:
+            dist = np.abs(dx * (segment[:, 1] - a[1]) - dy * (segment[:, 0] - a[0])) / length
+        i = int(dist.argmax())
+        if dist[i] > tolerance:
+            keep[start + 1 + i] = True
+            stack.append((start, start + 1 + i))
+            stack.append((start + 1 + i, end))
+    return points[keep]
+
+
+class RegionGeometry:
+    # Batas semua kab/kota dari satu shapefile, siap disederhanakan per zoom
+
+    def __init__(self, base_path, name_field='Kabupaten'):
+        self.base_path = base_path
+        encoding = 'utf-8'
+        if os.path.exists(base_path + '.cpg'):
+            with open(base_path + '.cpg') as f:
+                encoding = f.read().strip() or encoding
+        records = read_dbf(base_path + '.dbf', encoding)
+        shapes = read_polygons(base_path + '.shp')
+        self.names = [r.get(name_field, '') for r in records]
+
+        # Semua ring tanpa titik penutup ganda, plus pemiliknya
+        self.rings = []  # (index fitur, array titik)
+        for feature, parts in enumerate(shapes):
+            for ring in parts:
+                if len(ring) > 1 and np.array_equal(ring[0], ring[-1]):
+                    ring = ring[:-1]
+                if len(ring) >= 3:
+                    self.rings.append((feature, np.ascontiguousarray(ring)))
+        self.junctions = self._find_junctions()
+
+    def _find_junctions(self):
+        # Per ring: indeks titik tempat himpunan ring pemiliknya berubah
+        # (ujung garis batas bersama). Koordinat dibandingkan pada grid 1e-7
+        # derajat supaya sisa pembulatan float tidak memisahkan titik yang sama.
+        keys = [[tuple(p) for p in np.round(ring * 1e7).astype(np.int64)] for _, ring in self.rings]
+        owners = {}
+        for ring_id, ring_keys in enumerate(keys):
+            for key in ring_keys:
+                owners.setdefault(key, set()).add(ring_id)
+
+        junctions = []
+        for ring_keys in keys:
+            sets = [frozenset(owners[k]) for k in ring_keys]
+            n = len(sets)
+            marks = [i for i in range(n)
+                     if len(sets[i]) > 2 or sets[i] != sets[i - 1] or sets[i] != sets[(i + 1) % n]]
+            if not marks:
+                # Ring tanpa junction (pulau, atau enklave yang seluruhnya
+                # berbatasan dengan satu wilayah): mulai dari titik terkecil,
+                # sama untuk kedua ring yang berbagi batas
+                marks = [min(range(n), key=lambda i: ring_keys[i])]
+            junctions.append(marks)
+        return junctions
+
+    def simplify(self, tolerance, decimals):
+        # Geometri GeoJSON (MultiPolygon) per fitur untuk satu tingkat zoom
+        polygons = [[] for _ in self.names]  # fitur -> list [outer, holes...]
+        holes = []
+        for (feature, ring), marks in zip(self.rings, self.junctions):
+            # Potong ring di setiap junction, sederhanakan tiap arc secara terpisah
+            pieces = []
+            for a, b in zip(marks, marks[1:] + [marks[0] + len(ring)]):
+                arc = np.take(ring, np.arange(a, b + 1), axis=0, mode='wrap')
+                pieces.append(simplify_line(arc, tolerance)[:-1])
+            simplified = np.round(np.concatenate(pieces), decimals)
+            # Buang titik berurutan yang sama setelah pembulatan
+            same = np.all(simplified == np.roll(simplified, 1, axis=0), axis=1)
+            simplified = simplified[~same] if not same.all() else simplified[:1]
+            if len(simplified) < 3:
+                continue
+            closed = np.vstack([simplified, simplified[:1]])
+            area = signed_area(closed)
+            if area == 0:
+                continue
+            # Shapefile: outer searah jarum jam (luas negatif), hole sebaliknya
+            if area < 0:
+                polygons[feature].append([closed[::-1]])  # GeoJSON: outer berlawanan jarum jam
+            else:
+                holes.append((feature, closed[::-1]))
+
+        for feature, hole in holes:
+            # Hole masuk ke outer ring milik fitur yang sama yang memuatnya
+            for polygon in polygons[feature]:
+                if point_in_ring(hole[0], polygon[0]):
+                    polygon.append(hole)
+                    break
+
+        geometries = []
+        for polygon_list in polygons:
+            coordinates = [[ring.tolist() for ring in polygon] for polygon in polygon_list]
+            geometries.append({'type': 'MultiPolygon', 'coordinates': coordinates})
+        return geometries
+
+
+def shapefile_hash(base_path):
+    digest = hashlib.sha256()
+    for ext in ('.shp', '.dbf'):
+        with open(base_path + ext, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class GeometryCache:
+    # (nama fitur, geometri JSON per fitur) per zoom level: dari memori, lalu
+    # dari file di cache_dir (kunci = hash shapefile), baru dihitung ulang dari
+    # shapefile jika keduanya tidak ada. Shapefile hanya dibaca saat cache miss.
+
+    def __init__(self, base_path, cache_dir):
+        self.base_path = base_path
+        self.cache_dir = cache_dir
+        self.lock = threading.Lock()
+        self.region = None
+        self.source_hash = None
+        self.levels = {}
+
+    def get(self, level):
+        cached = self.levels.get(level)
+        if cached is not None:
+            return cached
+        with self.lock:
+            if level not in self.levels:
+                self.levels[level] = self._load(level)
+            return self.levels[level]
+
+    def _load(self, level):
+        tolerance, decimals = ZOOM_LEVELS[level]
+        if self.source_hash is None:
+            self.source_hash = shapefile_hash(self.base_path)
+        key = hashlib.sha256(f"{self.source_hash}:{GEOMETRY_VERSION}:{level}".encode()).hexdigest()[:16]
+        path = os.path.join(self.cache_dir, f"geometry_{level}_{key}.json")
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                cached = json.load(f)
+            return cached['names'], cached['geometries']
+
+        if self.region is None:
+            self.region = RegionGeometry(self.base_path)
+        names = self.region.names
+        geometries = [json.dumps(g, separators=(',', ':')) for g in self.region.simplify(tolerance, decimals)]
+        # Tulis ke file sementara lalu rename, supaya worker lain tidak membaca file setengah jadi
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'names': names, 'geometries': geometries}, f)
+        os.replace(tmp_path, path)
+        return names, geometries
+
+
+def feature_collection(geometries, properties, members=None):
+    # FeatureCollection sebagai string JSON; geometri sudah berupa string jadi
+    # tidak diserialisasi ulang setiap kali skor (per tahun) berubah
+    features = []
+    for geometry, props in zip(geometries, properties):
+        props = json.dumps(props, separators=(',', ':'), allow_nan=False)
+        features.append(f'{{"type":"Feature","properties":{props},"geometry":{geometry}}}')
+    head = ''.join(f'{json.dumps(k)}:{json.dumps(v)},' for k, v in (members or {}).items())
+    return f'{{"type":"FeatureCollection",{head}"features":[' + ','.join(features) + ']}'
@@ -0,0 +1,43 @@
+import os
+import sys
+import shutil
+import tempfile
+import pytest
+
+# app.py membaca data dan menulis cache relatif terhadap folder kerja, jadi
+# test berjalan di salinan sementara: master_data_cache.feather dan
+# geo_cache/ tidak tertinggal di folder dashboard.
+DASHBOARD_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DASHBOARD_DIR)
+WORK_DIR = tempfile.mkdtemp(prefix='imdi-dashboard-')
+shutil.copy(os.path.join(DASHBOARD_DIR, 'data_dashboard_internet.xlsx'), WORK_DIR)
+shutil.copytree(os.path.join(DASHBOARD_DIR, 'jatimshp'), os.path.join(WORK_DIR, 'jatimshp'))
+ORIGINAL_DIR = os.getcwd()
+os.chdir(WORK_DIR)
+
+
+def pytest_sessionfinish(session):
+    os.chdir(ORIGINAL_DIR)
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+
+@pytest.fixture(scope='session')
+def dashboard():
+    import app
+    assert app.DATA is not None and not app.DATA.master.empty, app.LOAD_STATUS['message']
+    return app
+
+
+@pytest.fixture
+def client(dashboard):
+    return dashboard.app.test_client()
+
+
+@pytest.fixture(scope='session')
+def cities(dashboard):
+    return sorted(dashboard.DATA.city_latest.index)
+
+
+@pytest.fixture(scope='session')
+def years(dashboard):
+    return sorted(dashboard.DATA.analysis)
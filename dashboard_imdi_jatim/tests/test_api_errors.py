@@ -0,0 +1,50 @@
+"""Parameter tidak valid dijawab 400, tahun yang tidak ada di data 404."""
+import pytest
+
+
+@pytest.mark.parametrize('url', [
+    '/api/compare_cities?cities=&year=2024',
+    '/api/compare_cities?cities=KOTA%20MALANG&year=dua',
+    '/api/simulate?year=dua',
+    '/api/simulate?infra=banyak',
+    '/api/simulate?add_speed=5',
+    '/api/choropleth?level=ultra',
+    '/api/choropleth?year=dua',
+])
+def test_invalid_parameters_get_400(client, url):
+    response = client.get(url)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+@pytest.mark.parametrize('body', [
+    [1, 2],
+    {'set': [80]},
+    {'set': {'infra': '80'}},
+    {'add': {'skill': True}},
+    {'year': 'dua'},
+])
+def test_invalid_simulate_body_gets_400(client, body):
+    response = client.post('/api/simulate', json=body)
+    assert response.status_code == 400
+
+
+def test_compare_cities_post_with_bad_year(client):
+    assert client.post('/api/compare_cities', json={'cities': ['KOTA MALANG'], 'year': [2024]}).status_code == 400
+
+
+@pytest.mark.parametrize('url', [
+    '/api/compare_cities?cities=KOTA%20MALANG&year=1999',
+    '/api/simulate?year=1999',
+    '/api/choropleth?year=1999',
+])
+def test_unknown_year_gets_404(client, url):
+    response = client.get(url)
+    assert response.status_code == 404
+    assert '1999' in response.get_json()['error']
+
+
+def test_valid_requests_still_200(client, cities, years):
+    assert client.get(f'/api/compare_cities?cities={cities[0]}&year={years[-1]}').status_code == 200
+    assert client.get(f'/api/simulate?year={years[-1]}&infra=80').status_code == 200
+    assert client.get(f'/api/choropleth?year={years[0]}').status_code == 200
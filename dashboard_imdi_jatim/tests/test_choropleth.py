@@ -0,0 +1,58 @@
+"""/api/choropleth: GeoJSON per zoom level dengan skor IMDI per tahun."""
+import os
+import json
+import gzip
+import numpy as np
+import pytest
+
+from choropleth import ZOOM_LEVELS, GeometryCache
+
+
+def get_map(client, level, year):
+    response = client.get(f'/api/choropleth?level={level}&year={year}', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    return response, json.loads(gzip.decompress(response.data))
+
+
+def coordinates(geometry):
+    rings = geometry['coordinates'] if geometry['type'] == 'Polygon' else \
+        [ring for polygon in geometry['coordinates'] for ring in polygon]
+    return np.vstack([np.asarray(ring) for ring in rings])
+
+
+def test_every_region_joined_to_scores(client, dashboard, years):
+    year = years[-1]
+    _, geojson = get_map(client, 'low', year)
+    assert (geojson['type'], geojson['year'], geojson['level']) == ('FeatureCollection', year, 'low')
+
+    master = dashboard.widen(dashboard.DATA.master)
+    scores = master[master['year'] == year].set_index('city')['score']
+    cities = [feature['properties']['city'] for feature in geojson['features']]
+    assert sorted(cities) == sorted(scores.index)
+    for feature in geojson['features']:
+        assert feature['properties']['score'] == pytest.approx(scores[feature['properties']['city']])
+
+
+@pytest.mark.parametrize('level', list(ZOOM_LEVELS))
+def test_coordinates_quantized(client, years, level):
+    _, geojson = get_map(client, level, years[-1])
+    decimals = ZOOM_LEVELS[level][1]
+    points = np.vstack([coordinates(feature['geometry']) for feature in geojson['features']])
+    assert np.allclose(points, points.round(decimals), rtol=0, atol=1e-9)
+
+
+def test_low_level_is_small(client, years):
+    sizes = {level: len(get_map(client, level, years[-1])[0].data) for level in ZOOM_LEVELS}
+    assert sizes['low'] < sizes['medium'] < sizes['high']
+    assert sizes['low'] < 50 * 1024
+
+
+def test_geometry_cached_on_disk(dashboard, tmp_path):
+    cache_dir = str(tmp_path / 'geo')
+    names, geometries = GeometryCache(dashboard.SHAPEFILE, cache_dir).get('low')
+    assert len(os.listdir(cache_dir)) == 1
+
+    reloaded = GeometryCache(dashboard.SHAPEFILE, cache_dir)
+    assert reloaded.get('low') == (names, geometries)
+    assert reloaded.region is None  # shapefile tidak dibaca ulang
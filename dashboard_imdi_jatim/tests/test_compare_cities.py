@@ -0,0 +1,49 @@
+"""/api/analyze_city dan /api/compare_cities dibanding hitungan langsung dari MASTER_DATA."""
+import pytest
+
+METRICS = ['score', 'infra', 'skill', 'empowerment', 'job']
+
+
+def expected_row(dashboard, city, year):
+    master = dashboard.widen(dashboard.DATA.master)
+    row = master[(master['city'] == city) & (master['year'] == year)].iloc[0]
+    prov = master[master['year'] == year][METRICS].mean()
+    return row, prov
+
+
+def test_analyze_city_matches_master(client, dashboard, cities):
+    data = client.get(f'/api/analyze_city?city={cities[0].lower()}').get_json()
+    assert data['found'] and data['city'] == cities[0]
+    row, prov = expected_row(dashboard, cities[0], data['latest_data']['year'])
+    for metric in METRICS:
+        assert data['latest_data'][metric] == pytest.approx(row[metric])
+        assert data['comparison'][f'{metric}_diff'] == pytest.approx(row[metric] - prov[metric])
+
+
+@pytest.mark.parametrize('method', ['GET', 'POST'])
+def test_compare_many_cities(client, dashboard, cities, years, method):
+    names = [cities[0], cities[-1], 'KOTA ATLANTIS']
+    year = years[0]
+    if method == 'GET':
+        response = client.get(f"/api/compare_cities?cities={','.join(names)}&year={year}")
+    else:
+        response = client.post('/api/compare_cities', json={'cities': names, 'year': year})
+    data = response.get_json()
+    assert response.status_code == 200 and data['year'] == year
+
+    results = {r['city']: r for r in data['cities']}
+    assert list(results) == names
+    assert results['KOTA ATLANTIS'] == {'city': 'KOTA ATLANTIS', 'found': False}
+    for city in names[:2]:
+        row, prov = expected_row(dashboard, city, year)
+        assert results[city]['year'] == year
+        for metric in METRICS:
+            assert results[city]['values'][metric] == pytest.approx(row[metric])
+            assert results[city]['prov_avg'][metric] == pytest.approx(prov[metric])
+            assert results[city]['comparison'][f'{metric}_diff'] == pytest.approx(row[metric] - prov[metric])
+
+
+def test_compare_without_year_uses_latest(client, cities, years):
+    data = client.get(f'/api/compare_cities?cities={cities[0]}').get_json()
+    assert data['year'] is None
+    assert data['cities'][0]['year'] == years[-1]
@@ -0,0 +1,70 @@
+"""Cache Feather MASTER_DATA: dipakai selama isi file sumber sama, dan
+hanya sheet/CSV yang berubah yang di-parse ulang.
+"""
+import os
+import pytest
+
+EXTRA_CSV = 'IMDI 2026.csv'
+
+
+def build(dashboard):
+    progress = {'step': None, 'parsed': [], 'reused': []}
+    snapshot, message = dashboard.build_data(dashboard.DATA, progress)
+    return snapshot, message, progress
+
+
+def test_startup_wrote_cache(dashboard):
+    table, key = dashboard.read_cache()
+    assert table is not None
+    assert key['version'] == dashboard.CACHE_VERSION
+    assert dashboard.content_hashes(key['sources']) == dashboard.content_hashes(dashboard.DATA.sources)
+
+
+def test_touched_source_keeps_cache(dashboard):
+    path = dashboard.EXCEL_FILE
+    mtime = os.stat(path).st_mtime_ns + 10 ** 10
+    os.utime(path, ns=(mtime, mtime))
+
+    snapshot, message, progress = build(dashboard)
+    assert message.endswith('(cache).')
+    assert progress['parsed'] == []
+    assert dashboard.read_cache()[1]['sources'][path]['mtime'] == mtime
+    assert snapshot.master.equals(dashboard.DATA.master)
+
+
+@pytest.fixture
+def extra_csv(dashboard):
+    # Tahun baru sebagai CSV, berisi nilai 2025 yang sedikit dinaikkan
+    rows = dashboard.DATA.master[dashboard.DATA.master['year'] == 2025]
+    frame = dashboard.widen(rows)[['city', 'score'] + dashboard.PILLAR_COLS]
+    frame = frame.rename(columns={'city': 'kab/kota', 'score': '2026',
+                                  'infra': 'Pilar Infrastruktur dan Ekosistem',
+                                  'skill': 'Pilar Keterampilan Digital',
+                                  'empowerment': 'Pilar Pemberdayaan', 'job': 'Pilar Pekerjaan'})
+    frame['2026'] += 1
+    frame.to_csv(EXTRA_CSV, index=False)
+    yield EXTRA_CSV
+    os.remove(EXTRA_CSV)
+    build(dashboard)  # kembalikan cache ke data awal
+
+
+def test_new_source_parses_only_that_source(dashboard, extra_csv):
+    snapshot, message, progress = build(dashboard)
+    assert not message.endswith('(cache).')
+    assert progress['parsed'] == [extra_csv]
+    assert len(progress['reused']) == len(dashboard.DATA.analysis)
+    assert sorted(snapshot.analysis) == sorted(dashboard.DATA.analysis) + [2026]
+
+    growth = snapshot.master.loc[snapshot.master['year'] == 2026, 'growth']
+    assert (growth > 0).all()
+    assert build(dashboard)[1].endswith('(cache).')
+
+
+def test_cache_version_bump_reparses(dashboard, monkeypatch):
+    with monkeypatch.context() as patch:
+        patch.setattr(dashboard, 'CACHE_VERSION', dashboard.CACHE_VERSION + 1)
+        snapshot, message, progress = build(dashboard)
+        assert not message.endswith('(cache).')
+        assert snapshot.master.equals(dashboard.DATA.master)
+    build(dashboard)
+    assert dashboard.read_cache()[1]['version'] == dashboard.CACHE_VERSION
@@ -0,0 +1,98 @@
+"""ETag/304 per content-coding pada endpoint yang memakai send_cached()."""
+import gzip
+import pytest
+
+# simulation_data (daftar kota) lebih kecil dari MIN_COMPRESS_BYTES
+SMALL = '/api/simulation_data'
+
+
+def endpoint(name, cities, years):
+    return {
+        'simulation_data': SMALL,
+        'choropleth': '/api/choropleth',
+        'dashboard_analysis': f'/api/dashboard_analysis?year={years[-1]}',
+        'analyze_city': f'/api/analyze_city?city={cities[0]}',
+    }[name]
+
+
+@pytest.fixture(params=['simulation_data', 'choropleth', 'dashboard_analysis', 'analyze_city'])
+def url(request, cities, years):
+    return endpoint(request.param, cities, years)
+
+
+@pytest.fixture(params=['choropleth', 'dashboard_analysis', 'analyze_city'])
+def large_url(request, cities, years):
+    return endpoint(request.param, cities, years)
+
+
+def get(client, url, encoding, etag=None):
+    headers = {'Accept-Encoding': encoding}
+    if etag:
+        headers['If-None-Match'] = etag
+    return client.get(url, headers=headers)
+
+
+def test_revalidation_per_encoding(client, url):
+    for encoding in ('identity', 'gzip'):
+        response = get(client, url, encoding)
+        assert response.status_code == 200
+        assert response.headers['Cache-Control'] == 'no-cache'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        etag = response.headers['ETag']
+
+        revalidated = get(client, url, encoding, etag)
+        assert revalidated.status_code == 304
+        assert revalidated.data == b''
+        assert revalidated.headers['ETag'] == etag
+        assert 'Accept-Encoding' in revalidated.headers['Vary']
+
+
+def test_gzip_variant_has_own_etag(client, large_url):
+    plain = get(client, large_url, 'identity')
+    packed = get(client, large_url, 'gzip')
+    assert packed.headers['Content-Encoding'] == 'gzip'
+    assert packed.headers['ETag'] == plain.headers['ETag'][:-1] + '-gz"'
+    assert gzip.decompress(packed.data) == plain.data
+
+
+def test_gzip_etag_not_reused_without_gzip(client, large_url):
+    packed = get(client, large_url, 'gzip')
+    response = get(client, large_url, 'identity', packed.headers['ETag'])
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
+    assert response.headers['ETag'] != packed.headers['ETag']
+    assert response.data == get(client, large_url, 'identity').data
+
+
+def test_small_response_not_compressed(client):
+    plain = get(client, SMALL, 'identity')
+    response = get(client, SMALL, 'gzip')
+    assert 'Content-Encoding' not in response.headers
+    assert response.headers['ETag'] == plain.headers['ETag']
+    assert response.data == plain.data
+
+
+def test_identity_etag_still_valid_for_gzip_client(client, url):
+    etag = get(client, url, 'identity').headers['ETag']
+    response = get(client, url, 'gzip', etag)
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+
+
+def test_brotli_variant(client, dashboard):
+    if dashboard.brotli is None:
+        pytest.skip('modul brotli tidak terpasang')
+    plain = get(client, '/api/choropleth', 'identity')
+    packed = get(client, '/api/choropleth', 'br, gzip')
+    assert packed.headers['Content-Encoding'] == 'br'
+    assert packed.headers['ETag'] == plain.headers['ETag'][:-1] + '-br"'
+    assert dashboard.brotli.decompress(packed.data) == plain.data
+    assert get(client, '/api/choropleth', 'br', packed.headers['ETag']).status_code == 304
+
+
+def test_etag_follows_data_tag(client, dashboard, monkeypatch):
+    etag = get(client, '/api/simulation_data', 'identity').headers['ETag']
+    monkeypatch.setattr(dashboard.DATA, 'tag', dashboard.DATA.tag + 'x')
+    response = get(client, '/api/simulation_data', 'identity', etag)
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
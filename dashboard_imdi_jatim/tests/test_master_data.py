@@ -0,0 +1,32 @@
+"""MASTER_DATA: kolom ringkas, cache Feather, dan memory-map."""
+import numpy as np
+import pytest
+
+
+def fresh_progress():
+    return {'step': None, 'parsed': [], 'reused': []}
+
+
+def test_master_is_compact(dashboard):
+    master = dashboard.DATA.master
+    assert list(master.columns) == dashboard.MASTER_COLS
+    assert master['city'].dtype == 'category'
+    assert master['year'].dtype == np.int16
+    assert all(master[c].dtype == np.float32 for c in dashboard.METRIC_COLS + ['growth'])
+    assert dashboard.DATA.memory['bytes'] < dashboard.DATA.memory['float64_bytes']
+
+
+@pytest.mark.parametrize('mmap', [True, False])
+def test_cache_mapped_only_with_mmap(dashboard, monkeypatch, mmap):
+    monkeypatch.setattr(dashboard, 'MASTER_DATA_MMAP', mmap)
+    calls = []
+    read_table = dashboard.feather.read_table
+    monkeypatch.setattr(dashboard.feather, 'read_table',
+                        lambda path, **kwargs: calls.append(kwargs) or read_table(path, **kwargs))
+
+    snapshot, message = dashboard.build_data(None, fresh_progress())
+    assert message.endswith('(cache).')
+    assert calls == [{'memory_map': mmap}]
+    assert snapshot.memory['memory_mapped'] is mmap
+    assert snapshot.master.equals(dashboard.DATA.master)
+
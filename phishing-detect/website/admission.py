@@ -0,0 +1,104 @@
+import math
+import time
+import threading
+from collections import OrderedDict
+
+
+class AdmissionRejected(Exception):
+    # Raised when a request is turned away; status is 429 or 503
+    def __init__(self, status, reason, retry_after):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionGate:
+    # At most max_concurrent holders at once and at most max_queue waiting
+    # behind them. A request arriving to a full queue, or waiting longer
+    # than queue_timeout, is rejected at once with a 503 instead of
+    # occupying a worker until it times out.
+
+    def __init__(self, max_concurrent, max_queue, queue_timeout):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.condition = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+        self.avg_hold = 1.0  # moving average of seconds a slot is held
+        self.stats = {'admitted': 0, 'queue_full': 0, 'queue_timeout': 0}
+
+    def retry_after(self):
+        # Seconds until the queue ahead of a new request should have drained
+        return max(1, math.ceil((self.waiting + 1) * self.avg_hold / self.max_concurrent))
+
+    def acquire(self):
+        # Returns the seconds spent waiting for a slot
+        start = time.perf_counter()
+        with self.condition:
+            if self.active >= self.max_concurrent:
+                if self.waiting >= self.max_queue:
+                    self.stats['queue_full'] += 1
+                    raise AdmissionRejected(503, 'queue_full', self.retry_after())
+                self.waiting += 1
+                try:
+                    admitted = self.condition.wait_for(lambda: self.active < self.max_concurrent,
+                                                       timeout=self.queue_timeout)
+                finally:
+                    self.waiting -= 1
+                if not admitted:
+                    self.stats['queue_timeout'] += 1
+                    raise AdmissionRejected(503, 'queue_timeout', self.retry_after())
+            self.active += 1
+            self.stats['admitted'] += 1
+        return time.perf_counter() - start
+
+    def release(self, held):
+        with self.condition:
+            self.active -= 1
+            self.avg_hold = 0.9 * self.avg_hold + 0.1 * held
+            self.condition.notify()
+
+    def snapshot(self):
+        with self.condition:
+            stats = dict(self.stats)
+            stats.update(active=self.active, waiting=self.waiting, max_concurrent=self.max_concurrent,
+                         max_queue=self.max_queue, avg_hold_s=round(self.avg_hold, 3))
+        return stats
+
+
+class RateLimiter:
+    # Token bucket per client: `rate` requests per second on average with
+    # bursts of up to `burst`. Only the max_clients most recently seen
+    # clients are tracked.
+
+    def __init__(self, rate, burst, max_clients=100000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.lock = threading.Lock()
+        self.buckets = OrderedDict()  # client -> (tokens, updated_at)
+        self.stats = {'allowed': 0, 'limited': 0}
+
+    def check(self, client):
+        # Raises AdmissionRejected (429) when the client is over its rate
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated_at = self.buckets.get(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+            if tokens < 1:
+                self.buckets[client] = (tokens, now)
+                self.stats['limited'] += 1
+                raise AdmissionRejected(429, 'rate_limited', max(1, math.ceil((1 - tokens) / self.rate)))
+            self.buckets[client] = (tokens - 1, now)
+            self.buckets.move_to_end(client)
+            while len(self.buckets) > self.max_clients:
+                self.buckets.popitem(last=False)
+            self.stats['allowed'] += 1
+
+    def snapshot(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats['clients'] = len(self.buckets)
+        return stats
@@ -1,447 +1,1265 @@
-import os
-import re
-import socket
-import ssl
-import whois
-import requests
-import pickle
-import ipaddress
-import tldextract
-import numpy as np
-from flask import Flask, render_template, request, jsonify
-from urllib.parse import urlparse, urlencode
-from datetime import datetime
-from bs4 import BeautifulSoup
-
-app = Flask(__name__)
-
-# Load Model
-MODEL_PATH = 'randomforest_model.pkl'
-model = None
-
-try:
-    with open(MODEL_PATH, 'rb') as f:
-        model = pickle.load(f)
-    print(f"Model loaded successfully from {MODEL_PATH}")
-except FileNotFoundError:
-    print(f"WARNING: Model file {MODEL_PATH} not found. Prediction will use dummy random values.")
-    model = None
-except Exception as e:
-    print(f"ERROR: Could not load model: {e}")
-    model = None
-
-class FeatureExtractor:
-    def __init__(self, url):
-        self.url = url
-        self.domain = ""
-        self.whois_response = None
-        self.url_parse = None
-        self.response = None
-        self.soup = None
-
-        try:
-            self.response = requests.get(url, timeout=5)
-            self.soup = BeautifulSoup(self.response.text, 'html.parser')
-        except:
-            pass
-
-        try:
-            self.url_parse = urlparse(url)
-            self.domain = self.url_parse.netloc
-        except:
-            pass
-
-        try:
-            self.whois_response = whois.whois(self.domain)
-        except:
-            pass
-
-    def get_features(self):
-        features = []
-        # 1. UsingIP
-        features.append(self.using_ip())
-        # 2. LongURL
-        features.append(self.long_url())
-        # 3. ShortURL
-        features.append(self.short_url())
-        # 4. Symbol@
-        features.append(self.symbol_at())
-        # 5. Redirecting//
-        features.append(self.redirecting_double_slash())
-        # 6. PrefixSuffix-
-        features.append(self.prefix_suffix_hyphen())
-        # 7. SubDomains
-        features.append(self.sub_domains())
-        # 8. HTTPS
-        features.append(self.http_s())
-        # 9. DomainRegLen
-        features.append(self.domain_reg_len())
-        # 10. Favicon
-        features.append(self.favicon())
-        # 11. NonStdPort
-        features.append(self.non_std_port())
-        # 12. HTTPSDomainURL
-        features.append(self.https_domain_url())
-        # 13. RequestURL
-        features.append(self.request_url())
-        # 14. AnchorURL
-        features.append(self.anchor_url())
-        # 15. LinksInScriptTags
-        features.append(self.links_in_script_tags())
-        # 16. ServerFormHandler
-        features.append(self.server_form_handler())
-        # 17. InfoEmail
-        features.append(self.info_email())
-        # 18. AbnormalURL
-        features.append(self.abnormal_url())
-        # 19. WebsiteForwarding
-        features.append(self.website_forwarding())
-        # 20. StatusBarCust
-        features.append(self.status_bar_cust())
-        # 21. DisableRightClick
-        features.append(self.disable_right_click())
-        # 22. UsingPopupWindow
-        features.append(self.using_popup_window())
-        # 23. IframeRedirection
-        features.append(self.iframe_redirection())
-        # 24. AgeofDomain
-        features.append(self.age_of_domain())
-        # 25. DNSRecording
-        features.append(self.dns_recording())
-        # 26. WebsiteTraffic
-        features.append(self.website_traffic())
-        # 27. PageRank
-        features.append(self.page_rank())
-        # 28. GoogleIndex
-        features.append(self.google_index())
-        # 29. LinksPointingToPage
-        features.append(self.links_pointing_to_page())
-        # 30. StatsReport
-        features.append(self.stats_report())
-
-        return features
-
-    # Feature Implementations
-    # Return -1 (Phishing), 0 (Suspicious), 1 (Legitimate) based on UCI dataset conventions usually.
-    # HOWEVER, checking standard mappings: often 1 is Phishing, -1 is Safe? Or vice versa.
-    # Usually datasets like UCI have {-1, 0, 1}.
-    # Let's assume standardized output: -1: Legitimate, 0: Suspicious, 1: Phishing
-    # OR standard UCI: -1: Phishing, 1: Legitimate. The user's prompt says "Phishing" or "Aman".
-    # Without seeing the model training, I have to guess.
-    # I will assume standard UCI labeling: -1: Phishing, 1: Legitimate.
-    # Wait, most pickle models from tutorials use: 1 = Phishing, 0 = Safe.
-    # Or -1 = Phishing, 1 = Safe.
-    # I will implement logic to produce {-1, 0, 1} and user can map it.
-    # Let's try to follow what seems to be "Bad" -> 1 (Phishing), "Good" -> -1 or 0.
-    # Actually, UCI dataset says: "1" is Phishing usually? No, it varies.
-    # Let's stick to standard heuristic return values and see result.
-    # Common convention: -1: Phishing, 1: Legitimate. (Safe)
-
-    def using_ip(self):
-        try:
-            ipaddress.ip_address(self.domain)
-            return -1 # Phishing
-        except:
-            return 1 # Legitimate
-
-    def long_url(self):
-        if len(self.url) < 54: return 1
-        if len(self.url) >= 54 and len(self.url) <= 75: return 0
-        return -1
-
-    def short_url(self):
-        match = re.search('bit\.ly|goo\.gl|shorte\.st|go2l\.ink|x\.co|ow\.ly|t\.co|tinyurl|tr\.im|is\.gd|cli\.gs|'
-                        'yfrog\.com|migre\.me|ff\.im|tiny\.cc|url4\.eu|twit\.ac|su\.pr|twurl\.nl|snipurl\.com|'
-                        'short\.to|BudURL\.com|ping\.fm|post\.ly|Just\.as|bkite\.com|snipr\.com|fic\.kr|loopt\.us|'
-                        'doiop\.com|short\.ie|kl\.am|wp\.me|rubyurl\.com|om\.ly|to\.ly|bit\.do|t\.co|lnkd\.in|'
-                        'db\.tt|qr\.ae|adf\.ly|goo\.gl|bitly\.com|cur\.lv|tinyurl\.com|ow\.ly|bit\.ly|ity\.im|'
-                        'q\.gs|is\.gd|po\.st|bc\.vc|twitthis\.com|u\.to|j\.mp|buzurl\.com|cutt\.us|u\.bb|yourls\.org|'
-                        'x\.co|prettylinkpro\.com|scrnch\.me|filoops\.info|vzturl\.com|qr\.net|1url\.com|tweez\.me|v\.gd|'
-                        'tr\.im|link\.zip\.net', self.url)
-        if match:
-            return -1
-        return 1
-
-    def symbol_at(self):
-        if "@" in self.url:
-            return -1
-        return 1
-
-    def redirecting_double_slash(self):
-        list = [x.start(0) for x in re.finditer('//', self.url)]
-        if self.url_parse.scheme == 'https':
-            if len(list) > 1: return -1 # more than one // in url (besides the protocol)
-        else:
-             if len(list) > 0: return -1 # http should have 0? wait, http://... // is at index 5.
-        # Simple heuristic: last // should be within 7 chars
-        if self.url.rfind('//') > 7:
-            return -1
-        return 1
-
-    def prefix_suffix_hyphen(self):
-        if '-' in self.domain:
-            return -1
-        return 1
-
-    def sub_domains(self):
-        # Count dots
-        if self.domain.count('.') == 1:
-            return 1
-        elif self.domain.count('.') == 2:
-            return 0
-        return -1
-
-    def http_s(self):
-        if self.url_parse.scheme == 'https':
-            return 1
-        return -1
-
-    def domain_reg_len(self):
-        # Needs whois
-        try:
-            creation_date = self.whois_response.creation_date
-            expiration_date = self.whois_response.expiration_date
-            if (isinstance(creation_date, list)): creation_date = creation_date[0]
-            if (isinstance(expiration_date, list)): expiration_date = expiration_date[0]
-            
-            age = (expiration_date - creation_date).days
-            if age / 365 <= 1:
-                return -1
-            return 1
-        except:
-            return -1
-
-    def favicon(self):
-        # Heuristic: if favicon is external
-        if self.soup:
-            for link in self.soup.find_all('link', rel='icon'):
-                if self.domain not in link.get('href', ''):
-                    return -1
-        return 1
-
-    def non_std_port(self):
-        try:
-            port = self.domain.split(":")
-            if len(port) > 1:
-                return -1
-            return 1
-        except:
-            return 1
-
-    def https_domain_url(self):
-        if 'https' in self.domain:
-            return -1
-        return 1
-
-    def request_url(self):
-        # % of external objects
-        if not self.soup: return 0
-        i = 0
-        success = 0
-        for img in self.soup.find_all('img', src=True):
-            dots = [x.start(0) for x in re.finditer('\.', img['src'])]
-            if self.url in img['src'] or self.domain in img['src'] or len(dots) == 1:
-                success = success + 1
-            i = i + 1
-        
-        for audio in self.soup.find_all('audio', src=True):
-            dots = [x.start(0) for x in re.finditer('\.', audio['src'])]
-            if self.url in audio['src'] or self.domain in audio['src'] or len(dots) == 1:
-                success = success + 1
-            i = i + 1
-        
-        for embed in self.soup.find_all('embed', src=True):
-            dots = [x.start(0) for x in re.finditer('\.', embed['src'])]
-            if self.url in embed['src'] or self.domain in embed['src'] or len(dots) == 1:
-                success = success + 1
-            i = i + 1
-        
-        for iframe in self.soup.find_all('iframe', src=True):
-            dots = [x.start(0) for x in re.finditer('\.', iframe['src'])]
-            if self.url in iframe['src'] or self.domain in iframe['src'] or len(dots) == 1:
-                success = success + 1
-            i = i + 1
-            
-        try:
-            percentage = success/float(i) * 100
-            if percentage < 22.0: return 1
-            elif (percentage >= 22.0) and (percentage < 61.0): return 0
-            else: return -1
-        except:
-            return 1
-
-    def anchor_url(self):
-        if not self.soup: return 0
-        i = 0
-        unsafe = 0
-        for a in self.soup.find_all('a', href=True):
-            if "#" in a['href'] or "javascript" in a['href'].lower() or "mailto" in a['href'].lower() or not (self.url in a['href'] or self.domain in a['href']):
-                unsafe = unsafe + 1
-            i = i + 1
-        try:
-            percentage = unsafe / float(i) * 100
-            if percentage < 31.0: return 1
-            elif (percentage >= 31.0) and (percentage < 67.0): return 0
-            else: return -1
-        except:
-            return 1
-
-    def links_in_script_tags(self):
-        # Simplified: check % of script/link/meta tags with external links
-        # This is expensive, using placeholder logic for now or simple heuristic
-        if not self.soup: return 0
-        i = 0
-        success = 0
-        for link in self.soup.find_all('link', href=True):
-            if self.domain not in link['href']:
-                success = success + 1
-            i = i + 1
-        for script in self.soup.find_all('script', src=True):
-            if self.domain not in script['src']:
-                success = success + 1
-            i = i + 1
-            
-        try:
-            percentage = success / float(i) * 100
-            if percentage < 17.0: return 1
-            elif (percentage >= 17.0) and (percentage < 81.0): return 0
-            else: return -1
-        except:
-            return 1
-
-    def server_form_handler(self):
-        if not self.soup: return 0
-        for form in self.soup.find_all('form', action=True):
-            if form['action'] == "" or form['action'] == "about:blank":
-                return -1
-            if self.domain not in form['action'] and form['action'].startswith("http"):
-                return 0
-        return 1
-
-    def info_email(self):
-        # check mailto:
-        if self.soup and "mailto:" in self.response.text:
-            return -1
-        return 1
-
-    def abnormal_url(self):
-        # If response was failed, it's abnormal? Or if whois doesnt match?
-        if self.response is None: return -1
-        return 1
-
-    def website_forwarding(self):
-        if self.response and len(self.response.history) <= 1: return 1
-        elif self.response and len(self.response.history) >= 2 and len(self.response.history) < 4: return 0
-        return -1
-
-    def status_bar_cust(self):
-        # Cannot check JS effectively without headless browser, assume 1 (Safe)
-        return 1
-
-    def disable_right_click(self):
-        # Cannot check JS effectively, assume 1 (Safe)
-        return 1
-
-    def using_popup_window(self):
-        # Cannot check JS effectively, assume 1 (Safe)
-        return 1
-
-    def iframe_redirection(self):
-        if self.soup and self.soup.find_all('iframe'):
-            return 0 # Suspicious to have iframe
-        return 1
-
-    def age_of_domain(self):
-        try:
-            creation_date = self.whois_response.creation_date
-            if isinstance(creation_date, list): creation_date = creation_date[0]
-            if not creation_date: return -1
-            today = datetime.now()
-            age = (today - creation_date).days
-            if age >= 180: return 1
-            return -1
-        except:
-            return -1
-
-    def dns_recording(self):
-        if self.whois_response: return 1
-        return -1
-
-    def website_traffic(self):
-        # Alexa rank is dead. Use placeholder or always 0?
-        # Simulating logic based on popularity is hard without API.
-        # Check if indexed in google?
-        return 0 
-
-    def page_rank(self):
-        # Similar.
-        return 0
-
-    def google_index(self):
-        return 1 # Assume indexed
-
-    def links_pointing_to_page(self):
-        return 0
-
-    def stats_report(self):
-        return 1
-
-@app.route('/')
-def index():
-    return render_template('index.html')
-
-@app.route('/predict', methods=['POST'])
-def predict():
-    data = request.json
-    url = data.get('url')
-    
-    if not url:
-        return jsonify({'error': 'URL is required'}), 400
-
-    # Ensure URL has schema
-    if not url.startswith('http'):
-        url = 'http://' + url
-
-    try:
-        extractor = FeatureExtractor(url)
-        features = extractor.get_features()
-        
-        # Reshape for model (1, 30)
-        features_array = np.array(features).reshape(1, -1)
-        
-        result_text = "Aman" # Default
-        if model:
-            prediction = model.predict(features_array)[0]
-            # Assming: -1 is Phishing, 1 is Legitimate (based on common datasets)
-            # OR 1 is Phishing, 0 is Legitimate?
-            # It's safest to assume standard UCI Phishing Dataset encoding:
-            # -1: Phishing, 1: Legitimate.
-            # BUT let's invert logic if needed. 
-            # If the user provided model follows standard {1, -1}
-            # For this MVP, I will map based on prediction value.
-            # If prediction == -1 -> Phishing. If 1 -> Aman.
-            
-            # Let's verify what the user might expect.
-            # Usually: 1 = Phishing, 0 = Safe in modern binary classification.
-            # But UCI is {-1, 1}.
-            # I will return the raw result if it's a string, or map it.
-            
-            if prediction == -1:
-                result_text = "Phishing"
-            elif prediction == 1:
-                result_text = "Aman"
-            else:
-                # Fallback for 0/1 binary
-                result_text = "Phishing" if prediction == 1 else "Aman"
-        else:
-            # Dummy logic if model fails to load
-            result_text = "Aman" if len(url) < 60 else "Phishing"
-
-        return jsonify({'result': result_text})
-
-    except Exception as e:
-        print(e)
-        return jsonify({'error': str(e)}), 500
-
-if __name__ == '__main__':
-    app.run(debug=True)
+import os
+import re
+import socket
+import ssl
+import whois
+import pickle
+import time
+import threading
+import ipaddress
+import numpy as np
+from flask import Flask, Response, render_template, request, jsonify
+from urllib.parse import urlparse, urlencode
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait
+from html_scanner import scan_page
+from lexical import (lexical_features, scale_lexical, calibrated_threshold,
+                     LEXICAL_PHISHING_CLASS, LEXICAL_DISABLED)
+from metrics import MetricsRegistry
+from micro_batcher import MicroBatcher
+from model_registry import ModelRegistry
+from blocklist import Blocklist
+from deadline_timer import DeadlineTimer, shutdown_socket, time_left
+from dns_resolver import DnsResolver
+from admission import AdmissionGate, AdmissionRejected, RateLimiter
+from feature_store import FeatureStore
+from page_fetcher import PageFetcher
+from tree_engine import compile_or_keep
+from verdict_cache import VerdictCache
+from whois_cache import WhoisCache
+
+app = Flask(__name__)
+
+def load_model(path):
+    try:
+        with open(path, 'rb') as f:
+            loaded = pickle.load(f)
+        print(f"Model loaded successfully from {path}")
+        return loaded
+    except FileNotFoundError:
+        print(f"WARNING: Model file {path} not found. Prediction will use dummy random values.")
+    except Exception as e:
+        print(f"ERROR: Could not load model: {e}")
+    return None
+
+# Load Model
+# Models live in a registry: each file is loaded on first use and swapped for
+# the new version when it changes on disk (checked every MODEL_CHECK_INTERVAL
+# seconds). Tree ensembles are compiled to flat NumPy node arrays
+# (tree_engine.py) so scoring one row does not pay the scikit-learn /
+# XGBoost per-call overhead.
+# Full models: the 30 FeatureExtractor features (phishing.csv layout).
+# xgboosting_model.pkl was trained with classes mapped -1 -> 0, 1 -> 1.
+MODEL_PATH = 'xgboosting_model.pkl'
+GRADIENT_BOOSTING_MODEL_PATH = 'gradient_boosting_model.pkl'
+
+# Lexical model: the 13 URL-string features of dataset_lengkap.csv (1 = phishing).
+# It answers without any network I/O, but its verdict is only final above a
+# threshold measured on held-out URLs: calibrate_lexical.py writes
+# LEXICAL_CALIBRATION_PATH, and unless that file reaches
+# LEXICAL_TARGET_PRECISION on at least LEXICAL_MIN_SUPPORT verdicts for the
+# model file being served, the threshold stays above 1 and every URL goes on
+# to the full FeatureExtractor path. LEXICAL_CONFIDENCE_THRESHOLD can only
+# raise the calibrated threshold (None = use it as is).
+LEXICAL_MODEL_PATH = 'randomforest_model.pkl'
+LEXICAL_CALIBRATION_PATH = 'lexical_calibration.json'
+LEXICAL_TARGET_PRECISION = 0.99
+LEXICAL_MIN_SUPPORT = 1000
+LEXICAL_CONFIDENCE_THRESHOLD = None
+
+MODEL_PATHS = {
+    'xgboost': MODEL_PATH,
+    'gradient_boosting': GRADIENT_BOOSTING_MODEL_PATH,
+    'random_forest': LEXICAL_MODEL_PATH,
+}
+DEFAULT_MODEL = 'xgboost'
+LEXICAL_MODEL = 'random_forest'
+# Models a request may pick with "model", and that "shadow" / "ensemble" score
+FULL_MODELS = ['xgboost', 'gradient_boosting']
+PREDICT_MODES = ('single', 'shadow', 'ensemble')
+MODEL_CHECK_INTERVAL = 5
+model_registry = ModelRegistry(MODEL_PATHS, load=load_model, prepare=compile_or_keep,
+                               check_interval=MODEL_CHECK_INTERVAL)
+
+# Micro-batching: single-row predict calls from concurrent /predict requests
+# are queued and run as one vectorized call of up to PREDICT_MAX_BATCH rows.
+# The first row of a batch waits at most PREDICT_MAX_WAIT_MS for company.
+# Each batch asks the registry for the current model, so a hot swap takes
+# effect at the next batch.
+PREDICT_MAX_BATCH = 64
+PREDICT_MAX_WAIT_MS = 2
+PREDICT_TIMEOUT = 5  # seconds a request waits for its batch result
+model_batchers = {name: MicroBatcher(lambda X, name=name: score_rows(name, X), max_batch_size=PREDICT_MAX_BATCH,
+                                     max_wait_ms=PREDICT_MAX_WAIT_MS, name=name)
+                  for name in FULL_MODELS}
+lexical_batcher = MicroBatcher(lambda X: lexical_rows(X), max_batch_size=PREDICT_MAX_BATCH,
+                               max_wait_ms=PREDICT_MAX_WAIT_MS, name='lexical')
+
+# Batch scoring: URLs are extracted concurrently on a shared, bounded pool so a
+# single slow or dead host only occupies one worker.
+BATCH_MAX_URLS = 1000
+BATCH_WORKERS = 16
+BATCH_TIMEOUT = 30  # seconds the whole batch may spend on feature extraction
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix='extract')
+batch_slots = threading.BoundedSemaphore(BATCH_WORKERS)
+
+# Admission control for /predict. Full extractions (network-bound) go through
+# a gate of NETWORK_MAX_CONCURRENT slots with at most NETWORK_MAX_QUEUE
+# requests waiting; beyond that the request gets a 503 with Retry-After right
+# away. Blocklist, cache and lexical answers never wait behind it. Prediction
+# itself runs on the micro-batcher thread. Each client (IP) is also limited
+# to RATE_LIMIT_PER_SECOND requests with bursts of RATE_LIMIT_BURST (429).
+NETWORK_MAX_CONCURRENT = 16
+NETWORK_MAX_QUEUE = 32
+NETWORK_QUEUE_TIMEOUT = 2  # seconds a request may wait for a slot
+RATE_LIMIT_PER_SECOND = 5
+RATE_LIMIT_BURST = 20
+RATE_LIMIT_TRUST_PROXY = False  # take the client from X-Forwarded-For
+network_gate = AdmissionGate(NETWORK_MAX_CONCURRENT, NETWORK_MAX_QUEUE, NETWORK_QUEUE_TIMEOUT)
+rate_limiter = RateLimiter(RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST)
+
+# Deadline mode: the network stages (page fetch, WHOIS, DNS, TLS) run at the
+# same time and the whole extraction gets at most EXTRACTION_DEADLINE seconds.
+# Socket timeouts only bound each read, so the fetch, WHOIS and TLS sockets
+# are also shut down by deadline_timer when the deadline passes.
+FETCH_TIMEOUT = 5
+EXTRACTION_DEADLINE = 8
+NETWORK_STAGES = ['fetch', 'whois', 'dns', 'tls']
+deadline_timer = DeadlineTimer()
+# A gate slot (or batch slot) stays taken until every stage task of its
+# extraction has finished, but at most STAGE_GRACE seconds past the deadline:
+# a system DNS lookup or a server that never finishes its response headers
+# can not be interrupted, and must not hold the slot forever. Stages still
+# running then are counted in phishing_abandoned_stages_total. The pool has
+# one thread per stage for each slot, so stage tasks only queue inside it
+# while abandoned stages are still running.
+STAGE_GRACE = 2
+STAGE_WORKERS = len(NETWORK_STAGES) * (NETWORK_MAX_CONCURRENT + BATCH_WORKERS)
+stage_executor = ThreadPoolExecutor(max_workers=STAGE_WORKERS, thread_name_prefix='stage')
+
+# DNS: one resolver cache shared by the page fetch, the DNSRecording check and
+# the TLS check. Concurrent lookups of the same host wait for one answer, so a
+# request resolves each host at most once and repeat hosts not at all.
+DNS_CACHE_SIZE = 10000
+DNS_TTL = 300
+DNS_NEGATIVE_TTL = 60
+dns_resolver = DnsResolver(max_entries=DNS_CACHE_SIZE, ttl=DNS_TTL, negative_ttl=DNS_NEGATIVE_TTL)
+
+# TLS check for https URLs: does the certificate verify against the system CAs
+tls_context = ssl.create_default_context()
+
+# Page fetch: pooled keep-alive session, body streamed up to MAX_PAGE_BYTES
+MAX_PAGE_BYTES = 1024 * 1024
+page_fetcher = PageFetcher(max_bytes=MAX_PAGE_BYTES, pool_maxsize=STAGE_WORKERS, resolver=dns_resolver,
+                           timer=deadline_timer)
+
+# Column names in the same order as get_features() and phishing.csv
+FEATURE_COLUMNS = [
+    'UsingIP', 'LongURL', 'ShortURL', 'Symbol@', 'Redirecting//', 'PrefixSuffix-',
+    'SubDomains', 'HTTPS', 'DomainRegLen', 'Favicon', 'NonStdPort', 'HTTPSDomainURL',
+    'RequestURL', 'AnchorURL', 'LinksInScriptTags', 'ServerFormHandler', 'InfoEmail',
+    'AbnormalURL', 'WebsiteForwarding', 'StatusBarCust', 'DisableRightClick',
+    'UsingPopupWindow', 'IframeRedirection', 'AgeofDomain', 'DNSRecording',
+    'WebsiteTraffic', 'PageRank', 'GoogleIndex', 'LinksPointingToPage', 'StatsReport'
+]
+
+# Features that depend on each network stage. When a stage misses the deadline
+# these features are reported as degraded and get NEUTRAL_FEATURE_VALUE
+# (0 = "Suspicious", the midpoint of the {-1, 0, 1} encoding) instead of a
+# value computed from missing input.
+STAGE_FEATURES = {
+    'fetch': ['Favicon', 'RequestURL', 'AnchorURL', 'LinksInScriptTags', 'ServerFormHandler',
+              'InfoEmail', 'AbnormalURL', 'WebsiteForwarding', 'IframeRedirection'],
+    'whois': ['DomainRegLen', 'AgeofDomain'],
+    'dns': ['DNSRecording'],
+    'tls': ['HTTPS'],
+}
+NEUTRAL_FEATURE_VALUE = 0
+
+# Optional store of every extracted feature vector, so rescore.py can run a
+# new model over all URLs seen so far without fetching them again.
+# Bump EXTRACTOR_VERSION whenever a feature's logic changes.
+EXTRACTOR_VERSION = '2'
+FEATURE_STORE_ENABLED = False
+FEATURE_STORE_PATH = 'feature_vectors.sqlite3'
+feature_store = FeatureStore(FEATURE_STORE_PATH, len(FEATURE_COLUMNS)) if FEATURE_STORE_ENABLED else None
+
+# WHOIS cache keyed by registered domain (in-memory LRU + SQLite on disk)
+WHOIS_CACHE_PATH = 'whois_cache.sqlite3'
+WHOIS_CACHE_SIZE = 10000
+WHOIS_TTL = 7 * 24 * 3600
+WHOIS_NEGATIVE_TTL = 3600
+WHOIS_TIMEOUT = 10  # per socket operation, without a deadline (python-whois' default)
+whois_cache = WhoisCache(WHOIS_CACHE_PATH, max_entries=WHOIS_CACHE_SIZE,
+                         ttl=WHOIS_TTL, negative_ttl=WHOIS_NEGATIVE_TTL)
+
+# Final verdicts keyed by normalized URL (scheme/host lowercased, default port
+# and fragment dropped), so a URL sent again is answered from memory.
+VERDICT_CACHE_SIZE = 100000
+VERDICT_TTL = 3600
+verdict_cache = VerdictCache(max_entries=VERDICT_CACHE_SIZE, ttl=VERDICT_TTL)
+
+# Known-phishing URLs / domains, one per line. Checked through a Bloom filter
+# before anything else and reloaded when the file changes.
+BLOCKLIST_PATH = 'blocklist.txt'
+BLOCKLIST_ERROR_RATE = 1e-6
+BLOCKLIST_CHECK_INTERVAL = 30
+blocklist = Blocklist(BLOCKLIST_PATH, error_rate=BLOCKLIST_ERROR_RATE,
+                      check_interval=BLOCKLIST_CHECK_INTERVAL)
+
+# Metrics, exposed in Prometheus text format on GET /metrics. A request with
+# the DEBUG_TIMINGS_HEADER header also gets its own breakdown in the JSON.
+FEATURE_BUCKETS = [0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1]
+DEBUG_TIMINGS_HEADER = 'X-Debug-Timings'
+metrics = MetricsRegistry()
+metrics.histogram('phishing_stage_seconds', 'Time spent per pipeline stage')
+metrics.histogram('phishing_feature_seconds', 'Time spent computing each feature', FEATURE_BUCKETS)
+metrics.counter('phishing_errors_total', 'Errors by stage (fetch, whois, tls, lexical, model, extract, request)')
+metrics.counter('phishing_degraded_total', 'Network stages that missed the extraction deadline')
+metrics.counter('phishing_abandoned_stages_total',
+                'Network stages still running STAGE_GRACE seconds after the deadline, by stage')
+metrics.counter('phishing_verdicts_total', 'Verdicts returned, by tier')
+metrics.histogram('phishing_model_seconds', 'Time per predict_proba call, by model')
+metrics.counter('phishing_rejected_total', 'Requests turned away by admission control, by reason')
+
+class FeatureExtractor:
+    def __init__(self, url, deadline=None, stage_futures=None):
+        self.url = url
+        # Deadline mode adds its stage futures here (future -> stage), so the
+        # caller can tell when the last one (possibly after the deadline) has finished
+        self.stage_futures = stage_futures if stage_futures is not None else {}
+        self.domain = ""
+        self.whois_response = None
+        self.addresses = None
+        self.tls = None
+        self.url_parse = None
+        self.response = None
+        self.html = ""
+        self.page = None
+        self.degraded = []
+        self.timings = {'features': {}}
+
+        try:
+            self.url_parse = urlparse(url)
+            self.domain = self.url_parse.netloc
+        except:
+            pass
+
+        if deadline is None:
+            # Sequential mode: one network stage after the other
+            for stage, (fn, *args) in self.network_stages(FETCH_TIMEOUT, None).items():
+                result, elapsed, _ = self.run_stage(stage, fn, *args)
+                self.timings[f'{stage}_ms'] = round(elapsed * 1000, 3)
+                self.attach(stage, result)
+        else:
+            self.gather_inputs(deadline)
+
+    def network_stages(self, fetch_timeout, timeout, deadline=None):
+        # Stage name -> (function, *args), in NETWORK_STAGES order.
+        # `deadline` is a time.monotonic() value.
+        return {
+            'fetch': (self.fetch_page, fetch_timeout, deadline),
+            'whois': (self.lookup_whois, timeout, deadline),
+            'dns': (self.resolve_host,),
+            'tls': (self.check_tls, fetch_timeout, deadline),
+        }
+
+    def attach(self, stage, result):
+        if stage == 'fetch':
+            self.response, self.html, self.page = result
+        elif stage == 'whois':
+            self.whois_response = result
+        elif stage == 'dns':
+            self.addresses = result
+        elif stage == 'tls':
+            self.tls = result
+
+    def fetch_page(self, timeout, deadline=None):
+        response = None
+        html = ""
+        page = None
+        try:
+            response, html = page_fetcher.fetch(self.url, timeout, deadline)
+            page = scan_page(html)
+        except:
+            metrics.inc('phishing_errors_total', stage='fetch')
+        return response, html, page
+
+    def lookup_whois(self, timeout=None, deadline=None):
+        def query(domain):
+            try:
+                return query_whois(domain, timeout, deadline)
+            except Exception:
+                metrics.inc('phishing_errors_total', stage='whois')
+                raise
+
+        try:
+            return whois_cache.lookup(self.domain, query)
+        except:
+            return None
+
+    def resolve_host(self):
+        # IP addresses of the host, or None if it does not resolve
+        if not self.url_parse or not self.url_parse.hostname:
+            return None
+        try:
+            return dns_resolver.resolve(self.url_parse.hostname)
+        except:
+            return None
+
+    def check_tls(self, timeout, deadline=None):
+        # 'trusted' if an https host presents a certificate that verifies,
+        # 'untrusted' if it does not, None for http or an unreachable host
+        if not self.url_parse or self.url_parse.scheme != 'https' or not self.url_parse.hostname:
+            return None
+        host = self.url_parse.hostname
+        try:
+            address = dns_resolver.resolve(host)[0]
+            with socket.create_connection((address, self.url_parse.port or 443),
+                                          timeout=time_left(deadline, timeout)) as sock:
+                # The handshake is several reads; shut it down at the deadline
+                with deadline_timer.guard(sock, deadline):
+                    with tls_context.wrap_socket(sock, server_hostname=host):
+                        return 'trusted'
+        except ssl.SSLCertVerificationError:
+            return 'untrusted'
+        except socket.gaierror:
+            return None
+        except:
+            metrics.inc('phishing_errors_total', stage='tls')
+            return None
+
+    def run_stage(self, stage, fn, *args):
+        # Returns (result, seconds, finished_at). Timings are only written to
+        # self.timings by the request thread, never by a stage that finishes late.
+        start = time.perf_counter()
+        result = fn(*args)
+        elapsed = time.perf_counter() - start
+        metrics.observe('phishing_stage_seconds', elapsed, stage=stage)
+        return result, elapsed, time.monotonic()
+
+    def gather_inputs(self, deadline):
+        # Run every network stage at once and wait at most `deadline` seconds.
+        # The fetch, WHOIS and TLS stages get the absolute deadline and have
+        # their sockets shut down when it passes. A stage that has not
+        # finished by then, or that only returned because its socket was shut
+        # down, is reported degraded and its result is never attached to this
+        # extractor.
+        deadline_at = time.monotonic() + deadline
+        stages = {
+            stage_executor.submit(self.run_stage, stage, fn, *args): stage
+            for stage, (fn, *args) in self.network_stages(min(FETCH_TIMEOUT, deadline), deadline,
+                                                          deadline_at).items()
+        }
+        self.stage_futures.update(stages)
+        done, not_done = wait(stages, timeout=deadline)
+        late = {future for future in done if future.result()[2] >= deadline_at}
+
+        for future in not_done | late:
+            future.cancel()
+            self.degraded.extend(STAGE_FEATURES[stages[future]])
+            metrics.inc('phishing_degraded_total', stage=stages[future])
+
+        for future in done - late:
+            result, elapsed, _ = future.result()
+            self.timings[f'{stages[future]}_ms'] = round(elapsed * 1000, 3)
+            self.attach(stages[future], result)
+
+    def timed(self, column, feature):
+        start = time.perf_counter()
+        value = feature()
+        elapsed = time.perf_counter() - start
+        metrics.observe('phishing_feature_seconds', elapsed, feature=column)
+        self.timings['features'][column] = round(elapsed * 1000, 3)
+        return value
+
+    def get_features(self):
+        features = []
+        # 1. UsingIP
+        features.append(self.timed('UsingIP', self.using_ip))
+        # 2. LongURL
+        features.append(self.timed('LongURL', self.long_url))
+        # 3. ShortURL
+        features.append(self.timed('ShortURL', self.short_url))
+        # 4. Symbol@
+        features.append(self.timed('Symbol@', self.symbol_at))
+        # 5. Redirecting//
+        features.append(self.timed('Redirecting//', self.redirecting_double_slash))
+        # 6. PrefixSuffix-
+        features.append(self.timed('PrefixSuffix-', self.prefix_suffix_hyphen))
+        # 7. SubDomains
+        features.append(self.timed('SubDomains', self.sub_domains))
+        # 8. HTTPS
+        features.append(self.timed('HTTPS', self.http_s))
+        # 9. DomainRegLen
+        features.append(self.timed('DomainRegLen', self.domain_reg_len))
+        # 10. Favicon
+        features.append(self.timed('Favicon', self.favicon))
+        # 11. NonStdPort
+        features.append(self.timed('NonStdPort', self.non_std_port))
+        # 12. HTTPSDomainURL
+        features.append(self.timed('HTTPSDomainURL', self.https_domain_url))
+        # 13. RequestURL
+        features.append(self.timed('RequestURL', self.request_url))
+        # 14. AnchorURL
+        features.append(self.timed('AnchorURL', self.anchor_url))
+        # 15. LinksInScriptTags
+        features.append(self.timed('LinksInScriptTags', self.links_in_script_tags))
+        # 16. ServerFormHandler
+        features.append(self.timed('ServerFormHandler', self.server_form_handler))
+        # 17. InfoEmail
+        features.append(self.timed('InfoEmail', self.info_email))
+        # 18. AbnormalURL
+        features.append(self.timed('AbnormalURL', self.abnormal_url))
+        # 19. WebsiteForwarding
+        features.append(self.timed('WebsiteForwarding', self.website_forwarding))
+        # 20. StatusBarCust
+        features.append(self.timed('StatusBarCust', self.status_bar_cust))
+        # 21. DisableRightClick
+        features.append(self.timed('DisableRightClick', self.disable_right_click))
+        # 22. UsingPopupWindow
+        features.append(self.timed('UsingPopupWindow', self.using_popup_window))
+        # 23. IframeRedirection
+        features.append(self.timed('IframeRedirection', self.iframe_redirection))
+        # 24. AgeofDomain
+        features.append(self.timed('AgeofDomain', self.age_of_domain))
+        # 25. DNSRecording
+        features.append(self.timed('DNSRecording', self.dns_recording))
+        # 26. WebsiteTraffic
+        features.append(self.timed('WebsiteTraffic', self.website_traffic))
+        # 27. PageRank
+        features.append(self.timed('PageRank', self.page_rank))
+        # 28. GoogleIndex
+        features.append(self.timed('GoogleIndex', self.google_index))
+        # 29. LinksPointingToPage
+        features.append(self.timed('LinksPointingToPage', self.links_pointing_to_page))
+        # 30. StatsReport
+        features.append(self.timed('StatsReport', self.stats_report))
+
+        # Features whose input did not arrive before the deadline
+        for column in self.degraded:
+            features[FEATURE_COLUMNS.index(column)] = NEUTRAL_FEATURE_VALUE
+
+        return features
+
+    # Feature Implementations
+    # Return -1 (Phishing), 0 (Suspicious), 1 (Legitimate) based on UCI dataset conventions usually.
+    # HOWEVER, checking standard mappings: often 1 is Phishing, -1 is Safe? Or vice versa.
+    # Usually datasets like UCI have {-1, 0, 1}.
+    # Let's assume standardized output: -1: Legitimate, 0: Suspicious, 1: Phishing
+    # OR standard UCI: -1: Phishing, 1: Legitimate. The user's prompt says "Phishing" or "Aman".
+    # Without seeing the model training, I have to guess.
+    # I will assume standard UCI labeling: -1: Phishing, 1: Legitimate.
+    # Wait, most pickle models from tutorials use: 1 = Phishing, 0 = Safe.
+    # Or -1 = Phishing, 1 = Safe.
+    # I will implement logic to produce {-1, 0, 1} and user can map it.
+    # Let's try to follow what seems to be "Bad" -> 1 (Phishing), "Good" -> -1 or 0.
+    # Actually, UCI dataset says: "1" is Phishing usually? No, it varies.
+    # Let's stick to standard heuristic return values and see result.
+    # Common convention: -1: Phishing, 1: Legitimate. (Safe)
+
+    def using_ip(self):
+        try:
+            ipaddress.ip_address(self.domain)
+            return -1 # Phishing
+        except:
+            return 1 # Legitimate
+
+    def long_url(self):
+        if len(self.url) < 54: return 1
+        if len(self.url) >= 54 and len(self.url) <= 75: return 0
+        return -1
+
+    def short_url(self):
+        match = re.search('bit\.ly|goo\.gl|shorte\.st|go2l\.ink|x\.co|ow\.ly|t\.co|tinyurl|tr\.im|is\.gd|cli\.gs|'
+                        'yfrog\.com|migre\.me|ff\.im|tiny\.cc|url4\.eu|twit\.ac|su\.pr|twurl\.nl|snipurl\.com|'
+                        'short\.to|BudURL\.com|ping\.fm|post\.ly|Just\.as|bkite\.com|snipr\.com|fic\.kr|loopt\.us|'
+                        'doiop\.com|short\.ie|kl\.am|wp\.me|rubyurl\.com|om\.ly|to\.ly|bit\.do|t\.co|lnkd\.in|'
+                        'db\.tt|qr\.ae|adf\.ly|goo\.gl|bitly\.com|cur\.lv|tinyurl\.com|ow\.ly|bit\.ly|ity\.im|'
+                        'q\.gs|is\.gd|po\.st|bc\.vc|twitthis\.com|u\.to|j\.mp|buzurl\.com|cutt\.us|u\.bb|yourls\.org|'
+                        'x\.co|prettylinkpro\.com|scrnch\.me|filoops\.info|vzturl\.com|qr\.net|1url\.com|tweez\.me|v\.gd|'
+                        'tr\.im|link\.zip\.net', self.url)
+        if match:
+            return -1
+        return 1
+
+    def symbol_at(self):
+        if "@" in self.url:
+            return -1
+        return 1
+
+    def redirecting_double_slash(self):
+        list = [x.start(0) for x in re.finditer('//', self.url)]
+        if self.url_parse.scheme == 'https':
+            if len(list) > 1: return -1 # more than one // in url (besides the protocol)
+        else:
+             if len(list) > 0: return -1 # http should have 0? wait, http://... // is at index 5.
+        # Simple heuristic: last // should be within 7 chars
+        if self.url.rfind('//') > 7:
+            return -1
+        return 1
+
+    def prefix_suffix_hyphen(self):
+        if '-' in self.domain:
+            return -1
+        return 1
+
+    def sub_domains(self):
+        # Count dots
+        if self.domain.count('.') == 1:
+            return 1
+        elif self.domain.count('.') == 2:
+            return 0
+        return -1
+
+    def http_s(self):
+        # https with a verified certificate: 1, https otherwise: 0, http: -1
+        if self.url_parse.scheme != 'https':
+            return -1
+        if self.tls == 'trusted':
+            return 1
+        return 0
+
+    def domain_reg_len(self):
+        # Needs whois
+        try:
+            creation_date = self.whois_response.creation_date
+            expiration_date = self.whois_response.expiration_date
+            if (isinstance(creation_date, list)): creation_date = creation_date[0]
+            if (isinstance(expiration_date, list)): expiration_date = expiration_date[0]
+            
+            age = (expiration_date - creation_date).days
+            if age / 365 <= 1:
+                return -1
+            return 1
+        except:
+            return -1
+
+    def favicon(self):
+        # Heuristic: if favicon is external
+        if self.page:
+            for href in self.page.icon_hrefs:
+                if self.domain not in href:
+                    return -1
+        return 1
+
+    def non_std_port(self):
+        try:
+            port = self.domain.split(":")
+            if len(port) > 1:
+                return -1
+            return 1
+        except:
+            return 1
+
+    def https_domain_url(self):
+        if 'https' in self.domain:
+            return -1
+        return 1
+
+    def request_url(self):
+        # % of external objects
+        if not self.page: return 0
+        i = 0
+        success = 0
+        for src in self.page.resource_srcs:
+            if self.url in src or self.domain in src or src.count('.') == 1:
+                success = success + 1
+            i = i + 1
+
+        try:
+            percentage = success/float(i) * 100
+            if percentage < 22.0: return 1
+            elif (percentage >= 22.0) and (percentage < 61.0): return 0
+            else: return -1
+        except:
+            return 1
+
+    def anchor_url(self):
+        if not self.page: return 0
+        i = 0
+        unsafe = 0
+        for href in self.page.anchor_hrefs:
+            if "#" in href or "javascript" in href.lower() or "mailto" in href.lower() or not (self.url in href or self.domain in href):
+                unsafe = unsafe + 1
+            i = i + 1
+        try:
+            percentage = unsafe / float(i) * 100
+            if percentage < 31.0: return 1
+            elif (percentage >= 31.0) and (percentage < 67.0): return 0
+            else: return -1
+        except:
+            return 1
+
+    def links_in_script_tags(self):
+        # Simplified: check % of script/link/meta tags with external links
+        # This is expensive, using placeholder logic for now or simple heuristic
+        if not self.page: return 0
+        i = 0
+        success = 0
+        for href in self.page.link_hrefs:
+            if self.domain not in href:
+                success = success + 1
+            i = i + 1
+        for src in self.page.script_srcs:
+            if self.domain not in src:
+                success = success + 1
+            i = i + 1
+            
+        try:
+            percentage = success / float(i) * 100
+            if percentage < 17.0: return 1
+            elif (percentage >= 17.0) and (percentage < 81.0): return 0
+            else: return -1
+        except:
+            return 1
+
+    def server_form_handler(self):
+        if not self.page: return 0
+        for action in self.page.form_actions:
+            if action == "" or action == "about:blank":
+                return -1
+            if self.domain not in action and action.startswith("http"):
+                return 0
+        return 1
+
+    def info_email(self):
+        # check mailto:
+        if self.page and "mailto:" in self.html:
+            return -1
+        return 1
+
+    def abnormal_url(self):
+        # If response was failed, it's abnormal? Or if whois doesnt match?
+        if self.response is None: return -1
+        return 1
+
+    def website_forwarding(self):
+        if self.response and len(self.response.history) <= 1: return 1
+        elif self.response and len(self.response.history) >= 2 and len(self.response.history) < 4: return 0
+        return -1
+
+    def status_bar_cust(self):
+        # Cannot check JS effectively without headless browser, assume 1 (Safe)
+        return 1
+
+    def disable_right_click(self):
+        # Cannot check JS effectively, assume 1 (Safe)
+        return 1
+
+    def using_popup_window(self):
+        # Cannot check JS effectively, assume 1 (Safe)
+        return 1
+
+    def iframe_redirection(self):
+        if self.page and self.page.iframe_count:
+            return 0 # Suspicious to have iframe
+        return 1
+
+    def age_of_domain(self):
+        try:
+            creation_date = self.whois_response.creation_date
+            if isinstance(creation_date, list): creation_date = creation_date[0]
+            if not creation_date: return -1
+            today = datetime.now()
+            age = (today - creation_date).days
+            if age >= 180: return 1
+            return -1
+        except:
+            return -1
+
+    def dns_recording(self):
+        # The host has an address record
+        if self.addresses: return 1
+        return -1
+
+    def website_traffic(self):
+        # Alexa rank is dead. Use placeholder or always 0?
+        # Simulating logic based on popularity is hard without API.
+        # Check if indexed in google?
+        return 0 
+
+    def page_rank(self):
+        # Similar.
+        return 0
+
+    def google_index(self):
+        return 1 # Assume indexed
+
+    def links_pointing_to_page(self):
+        return 0
+
+    def stats_report(self):
+        return 1
+
+@app.route('/')
+def index():
+    return render_template('index.html')
+
+def normalize_url(url):
+    # Ensure URL has schema
+    if not url.startswith('http'):
+        url = 'http://' + url
+    return url
+
+def label_prediction(prediction):
+    # Assming: -1 is Phishing, 1 is Legitimate (based on common datasets)
+    # It's safest to assume standard UCI Phishing Dataset encoding:
+    # -1: Phishing, 1: Legitimate.
+    # If prediction == -1 -> Phishing. If 1 -> Aman.
+    if prediction == -1:
+        return "Phishing"
+    elif prediction == 1:
+        return "Aman"
+    else:
+        # Fallback for 0/1 binary: the XGBoost model maps Phishing (-1) to 0
+        return "Phishing" if prediction == 0 else "Aman"
+
+def score_rows(name, X):
+    # [(label, phishing probability), ...] for the rows of X. Probabilities
+    # and classes_ come from the same model object, even if it is swapped
+    # during the call.
+    model = model_registry.get(name)
+    if model is None:
+        raise RuntimeError(f"Model {name} is not available")
+    start = time.perf_counter()
+    proba = model.predict_proba(np.asarray(X))
+    metrics.observe('phishing_model_seconds', time.perf_counter() - start, model=name)
+    phishing_columns = [i for i, c in enumerate(model.classes_) if label_prediction(c) == "Phishing"]
+    labels = model.classes_[proba.argmax(axis=1)]
+    return [(label_prediction(label), round(float(p), 4))
+            for label, p in zip(labels, proba[:, phishing_columns].sum(axis=1))]
+
+def lexical_rows(rows):
+    # [(label, confidence), ...] from the lexical model for scaled rows
+    lexical_model = model_registry.get(LEXICAL_MODEL)
+    start = time.perf_counter()
+    proba = lexical_model.predict_proba(rows)
+    metrics.observe('phishing_model_seconds', time.perf_counter() - start, model=LEXICAL_MODEL)
+    classes = lexical_model.classes_[proba.argmax(axis=1)]
+    return [("Phishing" if c == LEXICAL_PHISHING_CLASS else "Aman", round(float(p), 4))
+            for c, p in zip(classes, proba.max(axis=1))]
+
+lexical_calibration = {'key': None, 'threshold': LEXICAL_DISABLED}
+
+def lexical_threshold():
+    # Confidence at which a lexical verdict is final. The calibration is
+    # checked again whenever the registry swaps the lexical model or the
+    # calibration file changes.
+    try:
+        calibration_mtime = os.path.getmtime(LEXICAL_CALIBRATION_PATH)
+    except OSError:
+        calibration_mtime = None
+    key = (model_registry.entries[LEXICAL_MODEL].loaded_at, calibration_mtime)
+    if key != lexical_calibration['key']:
+        threshold = LEXICAL_DISABLED
+        if calibration_mtime is not None and key[0] is not None:
+            threshold = calibrated_threshold(LEXICAL_CALIBRATION_PATH, LEXICAL_MODEL_PATH,
+                                             LEXICAL_TARGET_PRECISION, LEXICAL_MIN_SUPPORT)
+        lexical_calibration.update(key=key, threshold=threshold)
+    if LEXICAL_CONFIDENCE_THRESHOLD is None:
+        return lexical_calibration['threshold']
+    return max(lexical_calibration['threshold'], LEXICAL_CONFIDENCE_THRESHOLD)
+
+def lexical_tier_active(default_setup):
+    # The lexical model only decides for the default model and mode, and
+    # only once a calibration (or LEXICAL_CONFIDENCE_THRESHOLD) enables it
+    return default_setup and lexical_threshold() <= 1
+
+def classify_lexical(urls):
+    # Returns [(label, confidence), ...] from the lexical model, or None if
+    # it is not loaded. One predict_proba call for all URLs.
+    if model_registry.get(LEXICAL_MODEL) is None:
+        return None
+    if not urls:
+        return []
+    rows = scale_lexical([lexical_features(u) for u in urls])
+    if len(rows) == 1:
+        # Single URL (/predict): share a predict_proba call with concurrent requests
+        return [lexical_batcher.predict(rows[0], timeout=PREDICT_TIMEOUT)]
+    return lexical_rows(rows)
+
+def score_models(names, features):
+    # Scores one feature vector with every model in `names` at once (each on
+    # its own batcher). Returns {name: {result, phishing_probability,
+    # latency_ms} or {error}}.
+    start = time.perf_counter()
+    finished = {}
+    futures = {}
+    for name in names:
+        futures[name] = model_batchers[name].submit(features)
+        futures[name].add_done_callback(lambda _, name=name: finished.setdefault(name, time.perf_counter()))
+    results = {}
+    for name, future in futures.items():
+        try:
+            label, probability = future.result(timeout=PREDICT_TIMEOUT)
+        except Exception as e:
+            metrics.inc('phishing_errors_total', stage='model')
+            results[name] = {'error': str(e)}
+            continue
+        done = finished.get(name, time.perf_counter())
+        results[name] = {'result': label, 'phishing_probability': probability,
+                         'latency_ms': round((done - start) * 1000, 3)}
+    return results
+
+def combine_scores(scores, model_name, mode):
+    # Final label: the requested model's (single / shadow) or the mean
+    # phishing probability of every model that answered (ensemble).
+    if mode == 'ensemble':
+        probabilities = [s['phishing_probability'] for s in scores.values() if 'error' not in s]
+        if not probabilities:
+            raise RuntimeError('No model could score this URL')
+        return "Phishing" if np.mean(probabilities) >= 0.5 else "Aman"
+    if 'error' in scores[model_name]:
+        raise RuntimeError(scores[model_name]['error'])
+    return scores[model_name]['result']
+
+def dummy_label(url):
+    # Dummy logic if model fails to load
+    return "Aman" if len(url) < 60 else "Phishing"
+
+def remember_verdict(url, verdict):
+    # Degraded verdicts were made from partial data; don't cache them so the
+    # next submission gets a full extraction.
+    if not verdict['degraded']:
+        verdict_cache.put(url, verdict)
+    return verdict
+
+def store_features(url, features, degraded):
+    if feature_store is None:
+        return
+    try:
+        feature_store.add(url, features, EXTRACTOR_VERSION, degraded)
+    except Exception as e:
+        print(f"Feature store: {e}")
+
+def stage_done(timings, stage, start):
+    # Records one stage of a request in the histogram and in the request's
+    # own breakdown; returns the end time as the next stage's start.
+    now = time.perf_counter()
+    metrics.observe('phishing_stage_seconds', now - start, stage=stage)
+    timings[f'{stage}_ms'] = round((now - start) * 1000, 3)
+    return now
+
+def debug_timings_requested():
+    return request.headers.get(DEBUG_TIMINGS_HEADER, '').lower() not in ('', '0', 'false')
+
+def respond(verdict, timings, start):
+    verdict = dict(verdict)
+    stage_done(timings, 'total', start)
+    metrics.inc('phishing_verdicts_total', tier=verdict['tier'])
+    if debug_timings_requested():
+        verdict['timings'] = timings
+    return jsonify(verdict)
+
+def client_id():
+    if RATE_LIMIT_TRUST_PROXY and request.headers.get('X-Forwarded-For'):
+        return request.headers['X-Forwarded-For'].split(',')[0].strip()
+    return request.remote_addr or 'unknown'
+
+def reject(rejected):
+    metrics.inc('phishing_rejected_total', reason=rejected.reason)
+    message = 'Too many requests' if rejected.status == 429 else 'Server busy, try again later'
+    response = jsonify({'error': message, 'reason': rejected.reason, 'retry_after': rejected.retry_after})
+    response.status_code = rejected.status
+    response.headers['Retry-After'] = str(rejected.retry_after)
+    return response
+
+class DeadlineNICClient(whois.NICClient):
+    # python-whois client whose sockets are shut down at `deadline`: its
+    # recv loop would otherwise keep reading from a registry that trickles
+    # its answer, whatever the socket timeout.
+
+    def __init__(self, deadline):
+        super().__init__()
+        self.deadline = deadline
+
+    def get_socket(self):
+        sock = super().get_socket()
+        if self.deadline is not None:
+            deadline_timer.call_at(self.deadline, shutdown_socket, sock)
+        return sock
+
+def query_whois(domain, timeout=None, deadline=None):
+    # whois.whois() for a registered domain, bounded by `deadline`
+    # (time.monotonic()). Socket errors are raised rather than parsed as an
+    # empty record, so WhoisCache does not cache them. IP hosts are queried
+    # as-is: whois.whois() would first reverse-resolve them, without a timeout.
+    client = DeadlineNICClient(deadline)
+    text = client.whois_lookup(None, domain.encode('idna').decode('utf-8'), 0, quiet=True,
+                               ignore_socket_errors=False, timeout=time_left(deadline, timeout or WHOIS_TIMEOUT))
+    if not text:
+        raise whois.WhoisError('Whois command returned no output')
+    return whois.WhoisEntry.load(domain, text)
+
+def abandon_time():
+    # When the slot of an extraction starting now is released at the latest
+    return time.monotonic() + EXTRACTION_DEADLINE + STAGE_GRACE
+
+def release_when_settled(futures, release, abandon_at):
+    # Calls release() once, when every future in `futures` (future -> stage)
+    # has finished or at `abandon_at` (time.monotonic()), whichever comes
+    # first. Cancelled futures count as finished.
+    lock = threading.Lock()
+    pending = set(futures)
+    released = False
+
+    def release_once(abandoned):
+        nonlocal released
+        with lock:
+            if released:
+                return
+            released = True
+        for stage in abandoned:
+            metrics.inc('phishing_abandoned_stages_total', stage=stage)
+        release()
+
+    def settled(future):
+        with lock:
+            pending.discard(future)
+            if pending:
+                return
+        deadline_timer.cancel(timer_entry)
+        release_once([])
+
+    def abandon():
+        with lock:
+            abandoned = [futures[future] for future in pending]
+        release_once(abandoned)
+
+    if not futures:
+        release()
+        return
+    timer_entry = deadline_timer.call_at(abandon_at, abandon)
+    for future in list(futures):
+        future.add_done_callback(settled)
+
+def extract_features_timed(url, stage_futures=None):
+    start = time.perf_counter()
+    extractor = FeatureExtractor(url, deadline=EXTRACTION_DEADLINE, stage_futures=stage_futures)
+    features = extractor.get_features()
+    return features, extractor.degraded, (time.perf_counter() - start) * 1000
+
+def extract_batch_url(url):
+    # Runs on a batch worker: waits for a batch slot, which is only given
+    # back once the stages of this URL's extraction have all stopped (or
+    # STAGE_GRACE seconds after the deadline)
+    batch_slots.acquire()
+    abandon_at = abandon_time()
+    stage_futures = {}
+    try:
+        return extract_features_timed(url, stage_futures)
+    finally:
+        release_when_settled(stage_futures, batch_slots.release, abandon_at)
+
+@app.route('/predict', methods=['POST'])
+def predict():
+    start = time.perf_counter()
+    timings = {}
+    try:
+        rate_limiter.check(client_id())
+    except AdmissionRejected as rejected:
+        return reject(rejected)
+
+    data = request.json
+    url = data.get('url')
+    
+    if not url:
+        return jsonify({'error': 'URL is required'}), 400
+
+    # Optional model choice: "model" is one of FULL_MODELS, "mode" is single
+    # (default), shadow (every model scores, the chosen one decides) or
+    # ensemble (mean probability of every model decides).
+    model_name = data.get('model') or DEFAULT_MODEL
+    mode = data.get('mode') or 'single'
+    if model_name not in FULL_MODELS:
+        return jsonify({'error': f'model must be one of {FULL_MODELS}'}), 400
+    if mode not in PREDICT_MODES:
+        return jsonify({'error': f'mode must be one of {list(PREDICT_MODES)}'}), 400
+    # Cached and lexical verdicts come from the default setup only
+    default_setup = model_name == DEFAULT_MODEL and mode == 'single'
+
+    url = normalize_url(url)
+
+    # Known-phishing list and recent verdicts: constant time, no network I/O
+    if blocklist.contains(url):
+        return respond({'result': 'Phishing', 'tier': 'blocklist', 'lexical_confidence': None,
+                        'degraded': [], 'cached': False}, timings, start)
+    cached = verdict_cache.get(url) if default_setup else None
+    if cached:
+        cached['cached'] = True
+        return respond(cached, timings, start)
+
+    try:
+        # Tier 1: lexical model, no network I/O. Not run at all while the
+        # tier can not give a final verdict (uncalibrated, or another setup)
+        stage_start = time.perf_counter()
+        lexical = None
+        if lexical_tier_active(default_setup):
+            try:
+                lexical = classify_lexical([url])
+            except Exception:
+                metrics.inc('phishing_errors_total', stage='lexical')
+                raise
+            stage_start = stage_done(timings, 'lexical', stage_start)
+        lexical_confidence = lexical[0][1] if lexical else None
+        # Lexical verdicts are not cached: a later threshold change or model
+        # swap must not keep serving them
+        if lexical and lexical_confidence >= lexical_threshold():
+            return respond({'result': lexical[0][0], 'tier': 'lexical',
+                            'lexical_confidence': lexical_confidence,
+                            'degraded': [], 'cached': False}, timings, start)
+
+        # Tier 2: full feature extraction (page fetch + WHOIS), one gate slot
+        try:
+            network_gate.acquire()
+        except AdmissionRejected as rejected:
+            return reject(rejected)
+        stage_start = stage_done(timings, 'admission_wait', stage_start)
+        held_since = stage_start
+        abandon_at = abandon_time()
+        stage_futures = {}
+        try:
+            extractor = FeatureExtractor(url, deadline=EXTRACTION_DEADLINE, stage_futures=stage_futures)
+            features = extractor.get_features()
+        finally:
+            # Stages still running after the deadline keep the slot taken,
+            # for at most STAGE_GRACE seconds
+            release_when_settled(stage_futures,
+                                 lambda: network_gate.release(time.perf_counter() - held_since), abandon_at)
+        stage_start = stage_done(timings, 'extract', stage_start)
+        timings.update(extractor.timings)
+        store_features(url, features, extractor.degraded)
+        
+        result_text = "Aman" # Default
+        names = [model_name] if mode == 'single' else [model_name] + [n for n in FULL_MODELS if n != model_name]
+        scores = {}
+        if any(model_registry.get(name) is not None for name in names):
+            # One row of 30 features per model, batched with concurrent requests
+            scores = score_models(names, features)
+            result_text = combine_scores(scores, model_name, mode)
+        else:
+            result_text = dummy_label(url)
+        stage_done(timings, 'predict', stage_start)
+
+        verdict = {'result': result_text, 'tier': 'full', 'lexical_confidence': lexical_confidence,
+                   'degraded': extractor.degraded, 'cached': False}
+        if default_setup:
+            remember_verdict(url, verdict)
+        verdict.update(model=model_name if mode != 'ensemble' else 'ensemble', models=scores)
+        return respond(verdict, timings, start)
+
+    except Exception as e:
+        print(e)
+        metrics.inc('phishing_errors_total', stage='request')
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/predict_batch', methods=['POST'])
+def predict_batch():
+    data = request.get_json(silent=True) or {}
+    urls = data.get('urls')
+
+    if not isinstance(urls, list) or not urls:
+        return jsonify({'error': 'urls must be a non-empty list'}), 400
+    if len(urls) > BATCH_MAX_URLS:
+        return jsonify({'error': f'At most {BATCH_MAX_URLS} URLs per batch'}), 400
+    model_name = data.get('model') or DEFAULT_MODEL
+    if model_name not in FULL_MODELS:
+        return jsonify({'error': f'model must be one of {FULL_MODELS}'}), 400
+    default_setup = model_name == DEFAULT_MODEL
+
+    batch_start = time.perf_counter()
+    results = []
+    valid = []
+    for i, url in enumerate(urls):
+        entry = {'url': url, 'result': None, 'tier': None, 'lexical_confidence': None,
+                 'error': None, 'degraded': [], 'cached': False, 'timings': {}}
+        results.append(entry)
+        if not isinstance(url, str) or not url.strip():
+            entry['error'] = 'URL is required'
+            continue
+        entry['url'] = normalize_url(url.strip())
+
+        # Known-phishing list and cached verdicts are final
+        if blocklist.contains(entry['url']):
+            entry['result'] = 'Phishing'
+            entry['tier'] = 'blocklist'
+            continue
+        cached = verdict_cache.get(entry['url']) if default_setup else None
+        if cached:
+            entry.update(cached)
+            entry['cached'] = True
+            continue
+        valid.append(i)
+
+    # Tier 1: lexical model for the whole batch; confident verdicts are final
+    pending = valid
+    lexical = None
+    if lexical_tier_active(default_setup):
+        try:
+            lexical = classify_lexical([results[i]['url'] for i in valid])
+        except Exception as e:
+            print(e)
+            metrics.inc('phishing_errors_total', stage='lexical')
+    if lexical:
+        pending = []
+        threshold = lexical_threshold()
+        for i, (label, confidence) in zip(valid, lexical):
+            results[i]['lexical_confidence'] = confidence
+            if confidence >= threshold:
+                results[i]['result'] = label
+                results[i]['tier'] = 'lexical'
+            else:
+                pending.append(i)
+    lexical_done = time.perf_counter()
+
+    # Tier 2: full feature extraction for the rest
+    futures = {}
+    for i in pending:
+        futures[batch_executor.submit(extract_batch_url, results[i]['url'])] = i
+
+    # Wait for the whole batch at most BATCH_TIMEOUT seconds; whatever is still
+    # running after that is reported as a per-URL timeout instead of blocking.
+    done, not_done = wait(futures, timeout=BATCH_TIMEOUT) if futures else (set(), set())
+    for future in not_done:
+        future.cancel()
+        results[futures[future]]['error'] = f'Feature extraction timed out after {BATCH_TIMEOUT}s'
+
+    rows = []
+    row_index = []
+    for future in done:
+        i = futures[future]
+        try:
+            features, degraded, extract_ms = future.result()
+        except Exception as e:
+            print(e)
+            metrics.inc('phishing_errors_total', stage='extract')
+            results[i]['error'] = str(e)
+            continue
+        results[i]['degraded'] = degraded
+        results[i]['timings']['extract_ms'] = round(extract_ms, 2)
+        store_features(results[i]['url'], features, degraded)
+        rows.append(features)
+        row_index.append(i)
+    extract_done = time.perf_counter()
+
+    if rows:
+        if model_registry.get(model_name) is not None:
+            try:
+                # One predict call for the stacked (n, 30) matrix
+                model_start = time.perf_counter()
+                scores = score_rows(model_name, np.array(rows))
+                model_ms = round((time.perf_counter() - model_start) * 1000, 3)
+                for i, (label, probability) in zip(row_index, scores):
+                    results[i]['result'] = label
+                    results[i]['tier'] = 'full'
+                    results[i]['models'] = {model_name: {'result': label, 'phishing_probability': probability,
+                                                         'latency_ms': model_ms}}
+            except Exception as e:
+                print(e)
+                metrics.inc('phishing_errors_total', stage='model')
+                for i in row_index:
+                    results[i]['error'] = str(e)
+        else:
+            for i in row_index:
+                results[i]['result'] = dummy_label(results[i]['url'])
+                results[i]['tier'] = 'full'
+    predict_done = time.perf_counter()
+
+    for i in valid:
+        entry = results[i]
+        if default_setup and entry['tier'] == 'full' and entry['error'] is None:
+            remember_verdict(entry['url'], {'result': entry['result'], 'tier': entry['tier'],
+                                            'lexical_confidence': entry['lexical_confidence'],
+                                            'degraded': entry['degraded'], 'cached': False})
+    for entry in results:
+        if entry['tier'] is not None:
+            metrics.inc('phishing_verdicts_total', tier=entry['tier'])
+    metrics.observe('phishing_stage_seconds', predict_done - batch_start, stage='batch_total')
+
+    return jsonify({
+        'results': results,
+        'timings': {
+            'lexical_ms': round((lexical_done - batch_start) * 1000, 2),
+            'extract_ms': round((extract_done - lexical_done) * 1000, 2),
+            'predict_ms': round((predict_done - extract_done) * 1000, 2),
+            'total_ms': round((predict_done - batch_start) * 1000, 2)
+        }
+    })
+
+@app.route('/debug_status')
+def debug_status():
+    # Scheduler histograms and cache / fetcher counters for tuning
+    return jsonify({
+        'models': model_registry.snapshot(),
+        'model_batchers': {name: batcher.snapshot() for name, batcher in model_batchers.items()},
+        'lexical_batcher': lexical_batcher.snapshot(),
+        'lexical_threshold': lexical_threshold(),
+        'verdict_cache': verdict_cache.snapshot(),
+        'blocklist': blocklist.snapshot(),
+        'whois_cache': whois_cache.snapshot(),
+        'dns_resolver': dns_resolver.snapshot(),
+        'page_fetcher': page_fetcher.snapshot(),
+        'deadline_timer': deadline_timer.snapshot(),
+        'feature_store': feature_store.snapshot() if feature_store else None,
+        'network_gate': network_gate.snapshot(),
+        'rate_limiter': rate_limiter.snapshot()
+    })
+
+def collect_component_metrics():
+    # Counters kept by the caches, fetcher and batchers, in /metrics format
+    verdict = verdict_cache.snapshot()
+    whois_stats = whois_cache.snapshot()
+    dns = dns_resolver.snapshot()
+    blocked = blocklist.snapshot()
+    fetch = page_fetcher.snapshot()
+    gate = network_gate.snapshot()
+    caches = {
+        'verdict': (verdict['hits'], verdict['misses'], verdict['entries']),
+        'whois': (whois_stats['memory_hits'] + whois_stats['disk_hits'], whois_stats['misses'],
+                  whois_stats['memory_entries']),
+        'dns': (dns['hits'], dns['misses'], dns['entries']),
+        'blocklist': (blocked['hits'], blocked['checks'] - blocked['hits'], blocked['entries']),
+    }
+    families = [
+        ('phishing_cache_hits_total', 'counter', 'Cache hits',
+         [({'cache': name}, hits) for name, (hits, _, _) in caches.items()]),
+        ('phishing_cache_misses_total', 'counter', 'Cache misses',
+         [({'cache': name}, misses) for name, (_, misses, _) in caches.items()]),
+        ('phishing_cache_hit_ratio', 'gauge', 'Hits / lookups since start',
+         [({'cache': name}, round(hits / (hits + misses), 4) if hits + misses else 0)
+          for name, (hits, misses, _) in caches.items()]),
+        ('phishing_cache_entries', 'gauge', 'Entries held',
+         [({'cache': name}, entries) for name, (_, _, entries) in caches.items()]),
+        ('phishing_admission_active', 'gauge', 'Full extractions holding a gate slot',
+         [({}, gate['active'])]),
+        ('phishing_admission_waiting', 'gauge', 'Requests waiting for a gate slot',
+         [({}, gate['waiting'])]),
+        ('phishing_page_fetches_total', 'counter', 'Pages fetched',
+         [({}, fetch['fetches'])]),
+        ('phishing_page_truncated_total', 'counter', 'Pages cut at MAX_PAGE_BYTES',
+         [({}, fetch['truncated'])]),
+        ('phishing_page_skipped_total', 'counter', 'Responses not read (not HTML/text)',
+         [({}, fetch['skipped_content_type'])]),
+        ('phishing_page_bytes_total', 'counter', 'Page bytes read',
+         [({}, fetch['bytes_read'])]),
+    ]
+    batchers = list(model_batchers.items()) + [('lexical', lexical_batcher)]
+    families += [
+        ('phishing_batch_size', 'histogram', 'Rows per micro-batch',
+         [({'batcher': name}, b.batch_sizes) for name, b in batchers]),
+        ('phishing_batch_queue_depth', 'histogram', 'Rows queued when a micro-batch starts',
+         [({'batcher': name}, b.queue_depth) for name, b in batchers]),
+        ('phishing_batch_errors_total', 'counter', 'Failed micro-batch predict calls',
+         [({'batcher': name}, b.snapshot()['errors']) for name, b in batchers]),
+    ]
+    return families
+
+metrics.add_collector(collect_component_metrics)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+if __name__ == '__main__':
+    app.run(debug=True)
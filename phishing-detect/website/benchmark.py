@@ -0,0 +1,339 @@
+"""Offline benchmark for /predict.
+
+Contoh:
+    python benchmark.py
+    python benchmark.py --requests 5000 --concurrency 32 --force-full
+    python benchmark.py --page-kb 200 --page-latency-ms 50 --whois-latency-ms 100 --json hasil.json
+    python benchmark.py --corpus halaman_rekaman/ --force-full
+
+Everything runs on localhost, so results are repeatable on a machine with
+no network access:
+  - a local HTTP server serves synthetic legit / phishing pages of
+    --page-kb size after --page-latency-ms (plus any recorded .html files
+    from --corpus). The app's page fetcher reaches it as an HTTP proxy, so
+    the scanned URLs keep realistic host names without DNS.
+  - every host name resolves to 127.0.0.1 through the app's DNS resolver.
+  - a fake WHOIS responder answers over TCP after --whois-latency-ms.
+    python-whois always dials port 43 of the TLD's registry, so
+    app.query_whois is pointed at the responder; the reply is parsed by python-whois'
+    own WhoisEntry.load.
+  - the Flask app is served by werkzeug and driven over HTTP by
+    --concurrency client threads.
+
+Reports p50/p95/p99 latency, requests/sec, peak RSS and the mean time per
+pipeline stage taken from the app's /metrics histograms.
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import argparse
+import resource
+import threading
+import socketserver
+import numpy as np
+import requests
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+import whois
+from deadline_timer import time_left
+
+BENCH_TLD = 'com'
+
+
+def synthetic_page(kind, host, size):
+    # Legit pages link to their own host; phishing pages post the form to
+    # another host, point anchors at '#' / other sites and use the usual
+    # script tricks the content features look for.
+    rng = random.Random(host)
+    if kind == 'legit':
+        head = (f'<link rel="icon" href="http://{host}/favicon.ico">'
+                f'<script src="http://{host}/static/app.js"></script>')
+        body = ''.join(f'<a href="http://{host}/page/{i}">Page {i}</a>' for i in range(20))
+        body += f'<form action="http://{host}/search"><input name="q"></form>'
+        body += f'<img src="http://{host}/img/logo.png">'
+    else:
+        head = ('<link rel="icon" href="http://cdn-evil.net/favicon.ico">'
+                '<script src="http://cdn-evil.net/steal.js"></script>'
+                '<script>document.oncontextmenu = function () { return false; };'
+                'window.open("http://cdn-evil.net/popup");'
+                'onmouseover = function () { window.status = "https://bank.com"; };</script>')
+        body = ''.join('<a href="#">Login</a>' if i % 2 else '<a href="http://other-site.net/x">x</a>'
+                       for i in range(20))
+        body += ('<form action="http://collect-evil.net/post.php"><input name="password"></form>'
+                 '<iframe src="http://cdn-evil.net/frame" frameborder="0"></iframe>'
+                 '<a href="mailto:admin@collect-evil.net">mail</a>')
+        body += '<img src="http://cdn-evil.net/logo.png">'
+
+    page = f'<!DOCTYPE html><html><head><title>{host}</title>{head}</head><body>{body}'
+    words = ['account', 'verify', 'secure', 'update', 'payment', 'welcome', 'news', 'product']
+    filler = []
+    length = len(page)
+    while length < size:
+        paragraph = '<p>' + ' '.join(rng.choice(words) for _ in range(40)) + '</p>'
+        filler.append(paragraph)
+        length += len(paragraph)
+    return page + ''.join(filler) + '</body></html>'
+
+
+class PageServer(ThreadingHTTPServer):
+    # Answers proxied GETs ("GET http://host/path") with the page for host
+    daemon_threads = True
+
+    def __init__(self, address, page_bytes, latency, recorded):
+        super().__init__(address, PageHandler)
+        self.page_bytes = page_bytes
+        self.latency = latency
+        self.recorded = recorded
+        self.cache = {}
+
+    def page_for(self, host):
+        page = self.cache.get(host)
+        if page is None:
+            name = host.split('.')[0]
+            if name.startswith('recorded-') and self.recorded:
+                page = self.recorded[int(name.split('-')[1]) % len(self.recorded)]
+            else:
+                kind = 'phishing' if name.startswith('phish') else 'legit'
+                page = synthetic_page(kind, host, self.page_bytes).encode('utf-8')
+            self.cache[host] = page
+        return page
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        host = urlsplit(self.path).hostname or self.headers.get('Host', 'localhost').split(':')[0]
+        body = self.server.page_for(host)
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class WhoisServer(socketserver.ThreadingTCPServer):
+    # Fake registry: one query line in, a .com-style record out
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, latency):
+        super().__init__(address, WhoisHandler)
+        self.latency = latency
+
+
+class WhoisHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        domain = self.rfile.readline().decode('utf-8', 'replace').strip().lower()
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        today = datetime.now()
+        if domain.startswith('phish'):
+            created, expires = today - timedelta(days=20), today + timedelta(days=345)
+        else:
+            created, expires = today - timedelta(days=3000), today + timedelta(days=1500)
+        record = (f'   Domain Name: {domain.upper()}\r\n'
+                  f'   Registrar: Benchmark Registrar\r\n'
+                  f'   Creation Date: {created:%Y-%m-%d}\r\n'
+                  f'   Registry Expiry Date: {expires:%Y-%m-%d}\r\n'
+                  f'   Name Server: NS1.{domain.upper()}\r\n')
+        self.wfile.write(record.encode('utf-8'))
+
+
+def local_whois(address):
+    # Drop-in for app.query_whois that queries the fake responder
+    def lookup(domain, timeout=None, deadline=None):
+        with socket.create_connection(address, timeout=time_left(deadline, timeout or 10)) as s:
+            s.sendall(domain.encode('idna') + b'\r\n')
+            chunks = []
+            while True:
+                data = s.recv(4096)
+                if not data:
+                    break
+                chunks.append(data)
+        text = b''.join(chunks).decode('utf-8', 'replace')
+        if not text:
+            raise whois.WhoisError('No WHOIS output')
+        return whois.WhoisEntry.load(domain, text)
+    return lookup
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def start(server):
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def build_urls(count, recorded):
+    # Half legit, half phishing-looking URLs on distinct hosts
+    urls = []
+    for i in range(count):
+        if recorded and i % 4 == 3:
+            urls.append(f'http://recorded-{i}.{BENCH_TLD}/')
+        elif i % 2:
+            urls.append(f'http://phish-{i}-secure-login.{BENCH_TLD}/account/verify?id={i}')
+        else:
+            urls.append(f'http://legit-{i}.{BENCH_TLD}/')
+    return urls
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def stage_means(app):
+    # Mean milliseconds per stage from the app's histograms
+    name = 'phishing_stage_seconds'
+    means = {}
+    for key, histogram in app.metrics.metrics[name][3].items():
+        snap = histogram.snapshot()
+        if snap['count']:
+            means[dict(key)['stage']] = round(snap['sum'] / snap['count'] * 1000, 3)
+    return means
+
+
+def run(args):
+    recorded = []
+    if args.corpus:
+        for name in sorted(os.listdir(args.corpus)):
+            if name.lower().endswith(('.html', '.htm')):
+                with open(os.path.join(args.corpus, name), 'rb') as f:
+                    recorded.append(f.read())
+
+    pages = start(PageServer(('127.0.0.1', 0), args.page_kb * 1024, args.page_latency_ms / 1000, recorded))
+    registry = start(WhoisServer(('127.0.0.1', 0), args.whois_latency_ms / 1000))
+
+    import app
+    from whois_cache import WhoisCache
+    from verdict_cache import VerdictCache
+    from dns_resolver import DnsResolver
+    from admission import RateLimiter
+
+    # Local stand-ins and fresh, memory-only caches for a repeatable run
+    app.query_whois = local_whois(registry.server_address)
+    proxy = f'http://127.0.0.1:{pages.server_address[1]}'
+    app.page_fetcher.session.proxies = {'http': proxy, 'https': proxy}
+    app.whois_cache = WhoisCache(None, max_entries=app.WHOIS_CACHE_SIZE, ttl=app.WHOIS_TTL,
+                                 negative_ttl=app.WHOIS_NEGATIVE_TTL)
+    app.dns_resolver = DnsResolver(max_entries=app.DNS_CACHE_SIZE, ttl=app.DNS_TTL,
+                                   negative_ttl=app.DNS_NEGATIVE_TTL, lookup=lambda host: ['127.0.0.1'])
+    # Every benchmark request comes from 127.0.0.1; the per-client limit
+    # would turn most of them into 429s.
+    app.rate_limiter = RateLimiter(rate=1e9, burst=1e9)
+    if not args.keep_verdicts:
+        app.verdict_cache = VerdictCache(max_entries=0)
+    if args.force_full:
+        app.LEXICAL_CONFIDENCE_THRESHOLD = 1.1
+
+    server = start(make_server('127.0.0.1', 0, app.app, threaded=True,
+                                request_handler=QuietRequestHandler))
+    endpoint = f'http://127.0.0.1:{server.server_port}/predict'
+    urls = build_urls(args.urls, recorded)
+
+    local = threading.local()
+
+    def call(url):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+            session.trust_env = False
+        begin = time.perf_counter()
+        try:
+            response = session.post(endpoint, json={'url': url}, timeout=60)
+            tier = response.json().get('tier') if response.ok else None
+            ok = response.ok
+        except Exception:
+            tier, ok = None, False
+        return time.perf_counter() - begin, ok, tier
+
+    def worker(jobs, out):
+        for url in jobs:
+            out.append(call(url))
+
+    def drive(total):
+        jobs = [urls[i % len(urls)] for i in range(total)]
+        outputs = [[] for _ in range(args.concurrency)]
+        threads = [threading.Thread(target=worker, args=(jobs[k::args.concurrency], outputs[k]))
+                   for k in range(args.concurrency)]
+        begin = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return time.perf_counter() - begin, [r for out in outputs for r in out]
+
+    if args.warmup:
+        drive(args.warmup)
+    elapsed, results = drive(args.requests)
+
+    latencies = np.array([r[0] for r in results]) * 1000
+    tiers = {}
+    for _, ok, tier in results:
+        tiers[tier or 'error'] = tiers.get(tier or 'error', 0) + 1
+    report = {
+        'requests': len(results),
+        'concurrency': args.concurrency,
+        'errors': sum(1 for r in results if not r[1]),
+        'tiers': tiers,
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 3),
+        'max_ms': round(float(latencies.max()), 3),
+        'requests_per_sec': round(len(results) / elapsed, 2),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'stage_mean_ms': stage_means(app),
+        'settings': {'urls': args.urls, 'page_kb': args.page_kb, 'page_latency_ms': args.page_latency_ms,
+                     'whois_latency_ms': args.whois_latency_ms, 'force_full': args.force_full,
+                     'keep_verdicts': args.keep_verdicts, 'recorded_pages': len(recorded)},
+    }
+
+    server.shutdown()
+    pages.shutdown()
+    registry.shutdown()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Offline /predict benchmark with local page and WHOIS servers')
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--warmup', type=int, default=50)
+    parser.add_argument('--urls', type=int, default=200, help='Distinct URLs in the corpus')
+    parser.add_argument('--page-kb', type=int, default=50, help='Synthetic page size')
+    parser.add_argument('--page-latency-ms', type=float, default=20)
+    parser.add_argument('--whois-latency-ms', type=float, default=50)
+    parser.add_argument('--corpus', help='Directory of recorded .html pages to mix in')
+    parser.add_argument('--force-full', action='store_true',
+                        help='Disable the lexical fast path so every URL is fully extracted')
+    parser.add_argument('--keep-verdicts', action='store_true',
+                        help='Keep the verdict cache on (repeat URLs are answered from memory)')
+    parser.add_argument('--json', help='Also write the report to this file')
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
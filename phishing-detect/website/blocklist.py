@@ -0,0 +1,147 @@
+import os
+import math
+import time
+import hashlib
+import threading
+import numpy as np
+from urllib.parse import urlsplit
+
+from verdict_cache import url_key
+from whois_cache import registered_domain
+
+MASK64 = (1 << 64) - 1
+
+
+def _hash_pair(item):
+    digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+    return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+
+class BloomFilter:
+    # Bit array with k positions per item from double hashing
+    # (h1 + i * h2 mod 2^64) mod m. Bits are packed 8 per byte.
+    # False positives happen at about `error_rate`; false negatives never.
+
+    def __init__(self, capacity, error_rate=1e-6):
+        capacity = max(capacity, 1)
+        self.size = max(int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)), 8)
+        self.hashes = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        self.count = 0
+
+    def _positions(self, item):
+        h1, h2 = _hash_pair(item)
+        return [((h1 + i * h2) & MASK64) % self.size for i in range(self.hashes)]
+
+    def add_many(self, items):
+        # Vectorized insert: all k positions of every item at once
+        pairs = np.array([_hash_pair(item) for item in items], dtype=np.uint64).reshape(-1, 2)
+        if not len(pairs):
+            return
+        steps = np.arange(self.hashes, dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            positions = (pairs[:, :1] + steps * pairs[:, 1:]) % np.uint64(self.size)
+        positions = positions.ravel()
+        np.bitwise_or.at(self.bits, positions >> np.uint64(3),
+                         (np.uint8(1) << (positions & np.uint64(7)).astype(np.uint8)))
+        self.count += len(pairs)
+
+    def __contains__(self, item):
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+
+def blocklist_keys(url):
+    # Filter keys a URL is checked under: the exact URL and its host /
+    # registered domain, so one blocklisted domain covers every page on it.
+    key = url_key(url)
+    try:
+        host = (urlsplit(key).hostname or '').rstrip('.')
+    except ValueError:
+        host = ''
+    keys = ['url:' + key, 'domain:' + host]
+    domain = registered_domain(host) if host else host
+    if domain and domain != host:
+        keys.append('domain:' + domain)
+    return keys
+
+
+def entry_key(line):
+    # Blocklist file line -> filter key. Lines with a scheme are URLs,
+    # anything else is a domain.
+    if '://' in line:
+        return 'url:' + url_key(line)
+    return 'domain:' + line.lower().rstrip('.')
+
+
+class Blocklist:
+    # Known-phishing URLs / domains from a text file (one per line, '#' for
+    # comments) held in a Bloom filter. A background thread checks the
+    # file's mtime every check_interval seconds and swaps in a freshly built
+    # filter when it changed, so the list is updated without a restart.
+
+    def __init__(self, path, error_rate=1e-6, check_interval=30):
+        self.path = path
+        self.error_rate = error_rate
+        self.check_interval = check_interval
+        self.filter = None
+        self.mtime = None
+        self.lock = threading.Lock()
+        self.stats = {'checks': 0, 'hits': 0, 'reloads': 0, 'entries': 0, 'errors': 0}
+        self.reload()
+        if check_interval:
+            threading.Thread(target=self._watch, name='blocklist-watch', daemon=True).start()
+
+    def reload(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            if self.filter is not None:
+                print(f"WARNING: Blocklist {self.path} disappeared, keeping the loaded list")
+            return False
+        if mtime == self.mtime:
+            return False
+
+        try:
+            with open(self.path, encoding='utf-8', errors='replace') as f:
+                keys = [entry_key(line.strip()) for line in f
+                        if line.strip() and not line.lstrip().startswith('#')]
+            new_filter = BloomFilter(len(keys), self.error_rate)
+            new_filter.add_many(keys)
+        except Exception as e:
+            print(f"ERROR: Could not load blocklist {self.path}: {e}")
+            with self.lock:
+                self.stats['errors'] += 1
+            return False
+
+        # Swap in one assignment; readers use whichever filter they picked up
+        self.filter = new_filter
+        self.mtime = mtime
+        with self.lock:
+            self.stats['reloads'] += 1
+            self.stats['entries'] = len(keys)
+        print(f"Blocklist loaded from {self.path}: {len(keys)} entries")
+        return True
+
+    def _watch(self):
+        while True:
+            time.sleep(self.check_interval)
+            self.reload()
+
+    def contains(self, url):
+        bloom = self.filter
+        if bloom is None:
+            return False
+        hit = any(key in bloom for key in blocklist_keys(url))
+        with self.lock:
+            self.stats['checks'] += 1
+            if hit:
+                self.stats['hits'] += 1
+        return hit
+
+    def snapshot(self):
+        with self.lock:
+            stats = dict(self.stats)
+        bloom = self.filter
+        stats['filter_bytes'] = int(bloom.bits.nbytes) if bloom is not None else 0
+        return stats
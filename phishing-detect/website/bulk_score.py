@@ -0,0 +1,183 @@
+"""Offline bulk scoring for large URL lists.
+
+Contoh:
+    python bulk_score.py urls.txt hasil.csv
+    python bulk_score.py dump.csv hasil.parquet --url-column url --chunk-size 200000
+    python bulk_score.py urls.txt hasil.csv --network --processes 8
+
+Default mode is lexical-only: URL-string features are computed with
+vectorized pandas ops and the lexical model is called once per chunk, with
+no network I/O. A lexical label becomes the final `result` only at or above
+the calibrated threshold (see calibrate_lexical.py); below it, or when the
+lexical tier is off, `result` stays empty and only `lexical_result` /
+`lexical_confidence` are filled. With --network, those URLs are run through
+the full FeatureExtractor on a process pool.
+"""
+import sys
+import time
+import argparse
+import itertools
+import numpy as np
+import pandas as pd
+from multiprocessing import Pool
+
+import app
+from feature_store import FeatureStore
+from lexical import lexical_matrix, scale_lexical, LEXICAL_PHISHING_CLASS
+from regenerate_dataset import init_worker
+
+
+def read_chunks(path, url_column, chunk_size):
+    # Yields Series of URLs, chunk_size at a time, from a CSV or a plain
+    # one-URL-per-line text file.
+    if path.lower().endswith('.csv'):
+        for chunk in pd.read_csv(path, usecols=[url_column], chunksize=chunk_size, dtype=str):
+            yield chunk[url_column].fillna('')
+    else:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            while True:
+                lines = list(itertools.islice(f, chunk_size))
+                if not lines:
+                    break
+                yield pd.Series([line.strip() for line in lines], dtype=object)
+
+
+class ResultWriter:
+    # Appends each scored chunk to a CSV or Parquet file, so only one chunk
+    # is ever held in memory.
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = path.lower().endswith('.parquet')
+        self.writer = None
+        self.first = True
+
+    def write(self, frame):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(self.path, table.schema)
+            self.writer.write_table(table)
+        else:
+            frame.to_csv(self.path, mode='w' if self.first else 'a', header=self.first, index=False)
+        self.first = False
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def extract_full(url):
+    # Runs in a worker process
+    try:
+        features, degraded, extract_ms = app.extract_features_timed(url)
+        return features, ','.join(degraded), None
+    except Exception as e:
+        return None, '', str(e)
+
+
+def score_chunk(raw_urls, args, pool, store=None):
+    urls = raw_urls.astype(str).str.strip()
+    missing = urls == ''
+    # Same rule as app.normalize_url
+    urls = urls.where(urls.str.startswith('http'), 'http://' + urls)
+
+    frame = pd.DataFrame({
+        'url': urls,
+        'result': None,
+        'tier': None,
+        'lexical_result': None,
+        'lexical_confidence': np.nan,
+        'degraded': '',
+        'error': None,
+    })
+    frame.loc[missing, 'error'] = 'URL is required'
+    valid = np.flatnonzero(~missing.to_numpy())
+
+    lexical_model = app.model_registry.get(app.LEXICAL_MODEL)
+    if lexical_model is not None and len(valid):
+        proba = lexical_model.predict_proba(scale_lexical(lexical_matrix(urls.iloc[valid])))
+        phishing = lexical_model.classes_[proba.argmax(axis=1)] == LEXICAL_PHISHING_CLASS
+        confidence = proba.max(axis=1).round(4)
+        labels = np.where(phishing, 'Phishing', 'Aman')
+        frame.iloc[valid, frame.columns.get_loc('lexical_confidence')] = confidence
+        frame.iloc[valid, frame.columns.get_loc('lexical_result')] = labels
+        # Same rule as /predict: only confident lexical labels are verdicts
+        final = confidence >= app.lexical_threshold()
+        frame.iloc[valid[final], frame.columns.get_loc('result')] = labels[final]
+        frame.iloc[valid[final], frame.columns.get_loc('tier')] = 'lexical'
+        uncertain = valid[~final]
+    else:
+        uncertain = valid
+
+    if args.network and len(uncertain) and pool is not None:
+        outputs = pool.map(extract_full, urls.iloc[uncertain].tolist(), chunksize=16)
+        rows = []
+        row_index = []
+        for i, (features, degraded, error) in zip(uncertain, outputs):
+            frame.iat[i, frame.columns.get_loc('degraded')] = degraded
+            if error:
+                frame.iat[i, frame.columns.get_loc('error')] = error
+                continue
+            rows.append(features)
+            row_index.append(i)
+            if store is not None:
+                store.add(urls.iat[i], features, app.EXTRACTOR_VERSION, degraded.split(',') if degraded else ())
+        if rows and app.model_registry.get(app.DEFAULT_MODEL) is not None:
+            # One predict call per chunk
+            scores = app.score_rows(app.DEFAULT_MODEL, np.array(rows))
+            for i, (label, probability) in zip(row_index, scores):
+                frame.iat[i, frame.columns.get_loc('result')] = label
+                frame.iat[i, frame.columns.get_loc('tier')] = 'full'
+
+    # Fixed dtypes so every chunk has the same Parquet schema
+    return frame.astype({'url': 'string', 'result': 'string', 'tier': 'string', 'lexical_result': 'string',
+                         'degraded': 'string', 'error': 'string'})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Bulk phishing scoring for URL files / CSV')
+    parser.add_argument('input', help='URL file (one per line) or .csv')
+    parser.add_argument('output', help='Output .csv or .parquet')
+    parser.add_argument('--url-column', default='url', help='URL column name for CSV input')
+    parser.add_argument('--chunk-size', type=int, default=100000)
+    parser.add_argument('--threshold', type=float,
+                        help='Raise the calibrated lexical threshold (it can not be lowered)')
+    parser.add_argument('--network', action='store_true',
+                        help='Run the full FeatureExtractor for uncertain URLs')
+    parser.add_argument('--processes', type=int, default=4, help='Worker processes for --network')
+    parser.add_argument('--deadline', type=float, default=app.EXTRACTION_DEADLINE,
+                        help='Per-URL extraction deadline in seconds for --network')
+    parser.add_argument('--store', help='Save extracted feature vectors (--network) to this SQLite feature store')
+    args = parser.parse_args(argv)
+
+    app.LEXICAL_CONFIDENCE_THRESHOLD = args.threshold
+    if app.model_registry.get(app.LEXICAL_MODEL) is None or app.lexical_threshold() > 1:
+        print(f"Tahap leksikal nonaktif (model tidak ada atau belum dikalibrasi, lihat calibrate_lexical.py)"
+              + ("" if args.network else ": kolom result akan kosong, pakai --network"), file=sys.stderr)
+
+    writer = ResultWriter(args.output)
+    store = FeatureStore(args.store, len(app.FEATURE_COLUMNS)) if args.store and args.network else None
+    # Each worker opens its own WHOIS cache, DNS resolver and HTTP pool
+    pool = Pool(args.processes, initializer=init_worker, initargs=(args.deadline,)) if args.network else None
+    total = 0
+    start = time.perf_counter()
+    try:
+        for chunk in read_chunks(args.input, args.url_column, args.chunk_size):
+            writer.write(score_chunk(chunk, args, pool, store))
+            total += len(chunk)
+            elapsed = time.perf_counter() - start
+            print(f"{total} URL diproses ({total / elapsed:.0f} URL/detik)", file=sys.stderr)
+    finally:
+        writer.close()
+        if store is not None:
+            store.flush()
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Measure the lexical model on held-out URLs and pick its confidence threshold.
+
+Contoh:
+    python calibrate_lexical.py url_holdout.csv
+    python calibrate_lexical.py url_holdout.csv --label-column type --phishing-label bad --target-precision 0.995
+
+The input has the regenerate_dataset.py layout (a URL column and a label
+column) and must not overlap the lexical model's training data. Use real
+traffic for the legitimate rows: URLs typed without a scheme, http:// sites,
+login and account pages of well-known services. Every URL is normalized and
+scored the way /predict does it. The lowest confidence at which both the
+Phishing and the Aman verdicts reach --target-precision, over at least
+--min-support verdicts, is written to lexical_calibration.json together with
+the measured precision and the model file's hash. app.py only turns the
+lexical tier on from that file; if no threshold qualifies, nothing is
+written and the tier stays off.
+"""
+import sys
+import json
+import time
+import argparse
+import numpy as np
+
+import app
+from lexical import lexical_matrix, scale_lexical, choose_threshold, file_sha256, LEXICAL_PHISHING_CLASS
+from regenerate_dataset import load_labelled
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Choose the lexical confidence threshold from held-out URLs')
+    parser.add_argument('input', help='Held-out CSV with a URL column and a label column')
+    parser.add_argument('--output', default=app.LEXICAL_CALIBRATION_PATH)
+    parser.add_argument('--model', default=app.LEXICAL_MODEL_PATH, help='Pickled lexical model')
+    parser.add_argument('--url-column', default='url')
+    parser.add_argument('--label-column', default='label')
+    parser.add_argument('--phishing-label', default='phishing', help='Label value that means phishing')
+    parser.add_argument('--target-precision', type=float, default=app.LEXICAL_TARGET_PRECISION)
+    parser.add_argument('--min-support', type=int, default=app.LEXICAL_MIN_SUPPORT,
+                        help='Minimum number of final lexical verdicts at the threshold')
+    args = parser.parse_args(argv)
+
+    model = app.load_model(args.model)
+    if model is None:
+        sys.exit(f"Model {args.model} tidak bisa dimuat")
+    rows = load_labelled(args.input, args.url_column, args.label_column, args.phishing_label)
+    actual_phishing = np.array([label == -1 for _, _, label in rows], dtype=bool)
+    n_phishing = int(actual_phishing.sum())
+    n_legitimate = len(rows) - n_phishing
+    if min(n_phishing, n_legitimate) < args.min_support:
+        sys.exit(f"Butuh minimal {args.min_support} URL phishing dan {args.min_support} URL aman "
+                 f"(ada {n_phishing} phishing, {n_legitimate} aman)")
+
+    start = time.perf_counter()
+    urls = [app.normalize_url(url) for _, url, _ in rows]
+    proba = model.predict_proba(scale_lexical(lexical_matrix(urls)))
+    predicted_phishing = model.classes_[proba.argmax(axis=1)] == LEXICAL_PHISHING_CLASS
+    confidence = proba.max(axis=1).round(4)
+    threshold, stats = choose_threshold(confidence, predicted_phishing, actual_phishing,
+                                        args.target_precision, args.min_support)
+    print(f"{len(rows)} URL dinilai dalam {time.perf_counter() - start:.1f} detik")
+    if threshold is None:
+        sys.exit(f"Tidak ada threshold dengan presisi >= {args.target_precision} untuk minimal "
+                 f"{args.min_support} URL; tahap leksikal tetap nonaktif")
+
+    calibration = {
+        'threshold': threshold,
+        'target_precision': args.target_precision,
+        'min_support': args.min_support,
+        'at_threshold': stats,
+        'samples': {'path': args.input, 'sha256': file_sha256(args.input),
+                    'phishing': n_phishing, 'legitimate': n_legitimate},
+        'model_path': args.model,
+        'model_sha256': file_sha256(args.model),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(calibration, f, indent=2)
+    print(f"Threshold {threshold}: {stats['coverage']:.1%} URL selesai di tahap leksikal, "
+          f"presisi {stats['precision']} -> {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+import time
+import heapq
+import socket
+import itertools
+import threading
+from contextlib import contextmanager
+
+
+def time_left(deadline, cap=None):
+    # Seconds until `deadline` (time.monotonic()), at least 0; `cap` when
+    # there is no deadline or it is further away than that
+    if deadline is None:
+        return cap
+    left = max(0.0, deadline - time.monotonic())
+    return left if cap is None else min(cap, left)
+
+
+def shutdown_socket(sock):
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass  # already closed or never connected
+
+
+class DeadlineTimer:
+    # One thread that runs callbacks at time.monotonic() deadlines. Network
+    # stages use it to shut their socket down when the extraction deadline
+    # passes: that wakes a blocked recv / TLS handshake at once, which a
+    # per-call socket timeout can not do against a host that sends a byte
+    # just before every timeout. The thread starts on first use, so a
+    # timer created before fork() works in the child.
+
+    def __init__(self, name='deadline-timer'):
+        self.name = name
+        self.condition = threading.Condition()
+        self.heap = []  # [deadline, seq, fn, args]; fn None = cancelled
+        self.seq = itertools.count()
+        self.thread = None
+        self.stats = {'scheduled': 0, 'fired': 0, 'cancelled': 0}
+
+    def call_at(self, deadline, fn, *args):
+        # Runs fn(*args) on the timer thread at `deadline`; returns a handle for cancel()
+        entry = [deadline, next(self.seq), fn, args]
+        with self.condition:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self.thread.start()
+            heapq.heappush(self.heap, entry)
+            self.stats['scheduled'] += 1
+            self.condition.notify()
+        return entry
+
+    def cancel(self, entry):
+        with self.condition:
+            if entry[2] is not None:
+                entry[2] = None
+                self.stats['cancelled'] += 1
+
+    @contextmanager
+    def guard(self, sock, deadline):
+        # Shuts `sock` down if the block is still running at `deadline`
+        if deadline is None or sock is None:
+            yield
+            return
+        entry = self.call_at(deadline, shutdown_socket, sock)
+        try:
+            yield
+        finally:
+            self.cancel(entry)
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.heap or self.heap[0][0] > time.monotonic():
+                    timeout = self.heap[0][0] - time.monotonic() if self.heap else None
+                    self.condition.wait(timeout)
+                _, _, fn, args = heapq.heappop(self.heap)
+                if fn is None:
+                    continue
+                self.stats['fired'] += 1
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"Deadline timer: {e}")
+
+    def snapshot(self):
+        with self.condition:
+            stats = dict(self.stats)
+            stats['pending'] = sum(1 for entry in self.heap if entry[2] is not None)
+        return stats
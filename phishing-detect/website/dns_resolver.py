@@ -0,0 +1,98 @@
+import time
+import socket
+import ipaddress
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+def system_lookup(host):
+    # Addresses from the OS resolver (/etc/hosts, then DNS), IPv4 first
+    infos = socket.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+    addresses = []
+    for family, _, _, _, sockaddr in sorted(infos, key=lambda info: info[0] != socket.AF_INET):
+        if sockaddr[0] not in addresses:
+            addresses.append(sockaddr[0])
+    return addresses
+
+
+class DnsResolver:
+    # Host -> IP address cache shared by the page fetch, the DNSRecording
+    # check and the TLS check. A lookup for a host that is already being
+    # resolved waits for that answer instead of starting another one, so a
+    # request resolves each host at most once and repeat hosts within `ttl`
+    # not at all. Hosts that do not resolve are remembered for negative_ttl.
+    # getaddrinfo does not expose record TTLs, so every answer is kept for
+    # `ttl` seconds; keep it at or below the typical record TTL.
+
+    def __init__(self, max_entries=10000, ttl=300, negative_ttl=60, lookup=system_lookup):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.lookup = lookup
+        self.lock = threading.Lock()
+        self.cache = OrderedDict()  # host -> (expires_at, addresses or None, error)
+        self.pending = {}  # host -> Future of a lookup in flight
+        self.stats = {'hits': 0, 'misses': 0, 'negative_hits': 0, 'joined': 0, 'failures': 0}
+
+    def resolve(self, host, timeout=None):
+        # Returns the host's IP addresses; raises socket.gaierror if it has
+        # none. IP literals are returned as-is.
+        host = host.strip('[]').rstrip('.').lower()
+        try:
+            return [str(ipaddress.ip_address(host))]
+        except ValueError:
+            pass
+
+        now = time.time()
+        with self.lock:
+            entry = self.cache.get(host)
+            if entry and entry[0] > now:
+                self.cache.move_to_end(host)
+                self.stats['hits'] += 1
+                if entry[1] is None:
+                    self.stats['negative_hits'] += 1
+                    raise socket.gaierror(socket.EAI_NONAME, entry[2])
+                return list(entry[1])
+            future = self.pending.get(host)
+            owner = future is None
+            if owner:
+                future = self.pending[host] = Future()
+                self.stats['misses'] += 1
+            else:
+                self.stats['joined'] += 1
+
+        if owner:
+            self._run_lookup(host, future)
+        return list(future.result(timeout))
+
+    def _run_lookup(self, host, future):
+        try:
+            addresses = self.lookup(host)
+            if not addresses:
+                raise socket.gaierror(socket.EAI_NONAME, f'No address for {host}')
+        except (OSError, UnicodeError) as e:
+            self._store(host, None, getattr(e, 'strerror', None) or str(e), self.negative_ttl)
+            future.set_exception(e if isinstance(e, socket.gaierror) else socket.gaierror(str(e)))
+        else:
+            self._store(host, addresses, None, self.ttl)
+            future.set_result(addresses)
+
+    def _store(self, host, addresses, error, ttl):
+        with self.lock:
+            self.pending.pop(host, None)
+            if addresses is None:
+                self.stats['failures'] += 1
+            if self.max_entries <= 0:
+                return
+            self.cache[host] = (time.time() + ttl, addresses, error)
+            self.cache.move_to_end(host)
+            while len(self.cache) > self.max_entries:
+                self.cache.popitem(last=False)
+
+    def snapshot(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats['entries'] = len(self.cache)
+            stats['in_flight'] = len(self.pending)
+        return stats
@@ -0,0 +1,123 @@
+import time
+import queue
+import sqlite3
+import threading
+import numpy as np
+
+from verdict_cache import url_key
+
+# Feature values are -1 / 0 / 1, so one signed byte per feature is enough
+FEATURE_DTYPE = np.int8
+
+
+def pack_features(features):
+    return np.asarray(features, dtype=FEATURE_DTYPE).tobytes()
+
+
+def unpack_features(blobs, n_features):
+    # Many packed rows -> (n, n_features) float matrix in one frombuffer
+    matrix = np.frombuffer(b''.join(blobs), dtype=FEATURE_DTYPE).reshape(-1, n_features)
+    return matrix.astype(float)
+
+
+class FeatureStore:
+    # Append-only SQLite table of extracted feature vectors (URL, time,
+    # extractor version, degraded stages, packed features), so a new model
+    # can re-score everything already seen without fetching again.
+    # Request threads only enqueue; one writer thread inserts in batches.
+
+    def __init__(self, path, n_features, batch_size=500, flush_interval=1.0):
+        self.path = path
+        self.n_features = n_features
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.stats = {'queued': 0, 'written': 0, 'errors': 0}
+
+        self.db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('CREATE TABLE IF NOT EXISTS feature_vectors ('
+                        'id INTEGER PRIMARY KEY, url TEXT, url_key TEXT, extracted_at REAL, '
+                        'extractor_version TEXT, degraded TEXT, features BLOB)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS feature_vectors_url_key ON feature_vectors (url_key)')
+        self.db.commit()
+        self.thread = threading.Thread(target=self._run, name='feature-store', daemon=True)
+        self.thread.start()
+
+    def add(self, url, features, version, degraded=()):
+        if len(features) != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {len(features)}")
+        self.queue.put((url, url_key(url), time.time(), version, ','.join(degraded), pack_features(features)))
+        with self.lock:
+            self.stats['queued'] += 1
+
+    def _run(self):
+        while True:
+            rows = [self.queue.get()]
+            deadline = time.perf_counter() + self.flush_interval
+            while len(rows) < self.batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    rows.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(rows)
+
+    def _write(self, rows):
+        try:
+            with self.lock:
+                self.db.executemany('INSERT INTO feature_vectors (url, url_key, extracted_at, '
+                                    'extractor_version, degraded, features) VALUES (?, ?, ?, ?, ?, ?)', rows)
+                self.db.commit()
+                self.stats['written'] += len(rows)
+        except Exception as e:
+            print(f"Feature store write failed: {e}")
+            with self.lock:
+                self.stats['errors'] += 1
+        finally:
+            for _ in rows:
+                self.queue.task_done()
+
+    def flush(self):
+        # Blocks until everything queued so far is on disk
+        self.queue.join()
+
+    def snapshot(self):
+        with self.lock:
+            stats = dict(self.stats)
+        stats['pending'] = self.queue.qsize()
+        return stats
+
+
+def iter_vectors(path, n_features, batch_size=100000, latest_only=True, version=None, skip_degraded=False):
+    # Yields (metadata dict of lists, feature matrix) per batch, reading
+    # with one cursor so the whole store is never loaded at once.
+    conditions = []
+    params = []
+    if version is not None:
+        conditions.append('extractor_version = ?')
+        params.append(version)
+    if skip_degraded:
+        conditions.append("degraded = ''")
+    where = (' WHERE ' + ' AND '.join(conditions)) if conditions else ''
+    if latest_only:
+        # Newest matching vector per normalized URL
+        where = f' WHERE id IN (SELECT MAX(id) FROM feature_vectors{where} GROUP BY url_key)'
+
+    db = sqlite3.connect(path, timeout=30)
+    try:
+        cursor = db.execute('SELECT url, extracted_at, extractor_version, degraded, features '
+                            f'FROM feature_vectors{where} ORDER BY id', params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            urls, times, versions, degraded, blobs = zip(*rows)
+            meta = {'url': list(urls), 'extracted_at': list(times),
+                    'extractor_version': list(versions), 'degraded': list(degraded)}
+            yield meta, unpack_features(blobs, n_features)
+    finally:
+        db.close()
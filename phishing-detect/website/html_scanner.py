@@ -0,0 +1,58 @@
+from html.parser import HTMLParser
+
+# Tags whose src counts towards RequestURL
+RESOURCE_TAGS = ('img', 'audio', 'embed', 'iframe')
+
+
+class PageScan(HTMLParser):
+    # Streams the page once and keeps only the tag attributes the content
+    # features look at, instead of building a BeautifulSoup tree and walking
+    # it again for every feature. Uses the same tokenizer as BeautifulSoup's
+    # 'html.parser' builder, so attribute values are identical.
+
+    def __init__(self):
+        super().__init__()
+        self.icon_hrefs = []      # <link rel="... icon ..."> href ('' if missing)
+        self.resource_srcs = []   # src of <img>, <audio>, <embed>, <iframe>
+        self.anchor_hrefs = []    # <a href>
+        self.link_hrefs = []      # <link href>
+        self.script_srcs = []     # <script src>
+        self.form_actions = []    # <form action>, in document order
+        self.iframe_count = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag not in ('link', 'a', 'script', 'form') and tag not in RESOURCE_TAGS:
+            return
+
+        # Last duplicate wins and valueless attributes become '', as in bs4
+        values = {}
+        for name, value in attrs:
+            values[name] = value if value is not None else ''
+
+        if tag == 'link':
+            if 'href' in values:
+                self.link_hrefs.append(values['href'])
+            rel = values.get('rel')
+            if rel is not None and (rel == 'icon' or 'icon' in rel.split()):
+                self.icon_hrefs.append(values.get('href', ''))
+        elif tag == 'a':
+            if 'href' in values:
+                self.anchor_hrefs.append(values['href'])
+        elif tag == 'script':
+            if 'src' in values:
+                self.script_srcs.append(values['src'])
+        elif tag == 'form':
+            if 'action' in values:
+                self.form_actions.append(values['action'])
+        else:
+            if tag == 'iframe':
+                self.iframe_count += 1
+            if 'src' in values:
+                self.resource_srcs.append(values['src'])
+
+
+def scan_page(html):
+    scan = PageScan()
+    scan.feed(html)
+    scan.close()
+    return scan
@@ -0,0 +1,182 @@
+import re
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+from urllib.parse import urlparse
+
+# URL-string features of dataset_lengkap.csv, computed the same way as
+# lexical_features() / psychological_features() in prepros.ipynb.
+# They need no network I/O at all.
+SHORTENERS = [
+    'bit.ly', 'tinyurl', 'goo.gl', 't.co', 'is.gd',
+    'ow.ly', 'buff.ly', 'bl.aq', 'cli.gs', 'tr.im'
+]
+
+SENSITIVE_WORDS = [
+    'login', 'secure', 'account', 'verify', 'update',
+    'bank', 'signin', 'password', 'confirm'
+]
+
+LEXICAL_COLUMNS = [
+    'panjang_url', 'jumlah_titik', 'jumlah_strip', 'jumlah_digit', 'ada_at', 'ada_https',
+    'UsingIP', 'ShortURL', 'Redirecting//', 'PrefixSuffix-', 'SubDomains', 'HTTPSDomainURL',
+    'jumlah_kata_sensitif'
+]
+
+# The lexical model (randomforest_model.pkl) was trained on min-max scaled
+# columns. These are the per-column min/max of dataset_lengkap.csv.
+LEXICAL_MIN = np.array([12, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0], dtype=float)
+LEXICAL_MAX = np.array([25523, 59, 50, 3413, 1, 1, 1, 1, 1, 1, 1, 1, 4], dtype=float)
+
+# Class of the lexical model that means "phishing"
+LEXICAL_PHISHING_CLASS = 1
+
+# ada_https is not taken from the URL. Every legitimate row of
+# dataset_lengkap.csv has ada_https = 1, and normalize_url() adds http:// to
+# input typed without a scheme, so the column only told the model whether
+# the user typed "https://". The model still expects 13 inputs, so the column
+# is kept at the value of the legitimate training rows.
+LEXICAL_HTTPS = 1
+
+# A confidence no verdict reaches: the lexical tier is off
+LEXICAL_DISABLED = 1.01
+
+IP_PATTERN = re.compile(r'(?:\d{1,3}\.){3}\d{1,3}')
+SHORTENER_PATTERN = '|'.join(re.escape(s) for s in SHORTENERS)
+
+
+def lexical_features(url):
+    # Pastikan URL memiliki scheme agar urlparse bekerja optimal
+    if not re.match(r'^https?://', url):
+        url = 'http://' + url
+
+    parsed = urlparse(url)
+    domain = parsed.netloc
+    url_lower = url.lower()
+
+    return [
+        len(url),
+        url.count('.'),
+        url.count('-'),
+        sum(c.isdigit() for c in url),
+        int('@' in url),
+        LEXICAL_HTTPS,
+        int(bool(IP_PATTERN.search(domain))),
+        int(any(s in domain for s in SHORTENERS)),
+        # '//' after the scheme means a redirect inside the URL
+        int(url.rfind('//') > 7),
+        int('-' in domain),
+        # More than two dots in the host, as in dataset_lengkap.csv. Not the same
+        # as FeatureExtractor.sub_domains, which also gives -1 to a host without dots
+        int(domain.count('.') > 2),
+        int('https' in domain.lower()),
+        sum(word in url_lower for word in SENSITIVE_WORDS),
+    ]
+
+
+def scale_lexical(rows):
+    # Min-max scale an (n, 13) matrix of raw lexical features for the model
+    rows = np.asarray(rows, dtype=float)
+    return (rows - LEXICAL_MIN) / (LEXICAL_MAX - LEXICAL_MIN)
+
+
+def lexical_matrix(urls):
+    # Vectorized lexical_features() for a whole Series of URLs: same
+    # columns and values, computed with pandas string ops instead of a
+    # Python loop per URL. Returns an (n, 13) float array.
+    raw = pd.Series(urls, dtype=object).fillna('').astype(str).reset_index(drop=True)
+    urls = raw.where(raw.str.match(r'^https?://'), 'http://' + raw)
+    domain = urls.str.extract(r'^https?://([^/?#]*)', expand=False).fillna('')
+    url_lower = urls.str.lower()
+
+    columns = [
+        urls.str.len(),
+        urls.str.count(r'\.'),
+        urls.str.count('-'),
+        urls.str.count(r'[0-9]'),
+        urls.str.contains('@', regex=False),
+        np.full(len(urls), LEXICAL_HTTPS),
+        domain.str.contains(IP_PATTERN.pattern, regex=True),
+        domain.str.contains(SHORTENER_PATTERN, regex=True),
+        urls.str.rfind('//') > 7,
+        domain.str.contains('-', regex=False),
+        domain.str.count(r'\.') > 2,
+        domain.str.lower().str.contains('https', regex=False),
+        sum(url_lower.str.contains(word, regex=False).astype(int) for word in SENSITIVE_WORDS),
+    ]
+    matrix = np.column_stack([np.asarray(c, dtype=float) for c in columns])
+
+    # Unicode digits and case rules differ between str methods and the
+    # vectorized regex engine; the (rare) non-ASCII URLs go through the
+    # scalar function so values stay identical.
+    non_ascii = np.flatnonzero(raw.str.contains(r'[^\x00-\x7f]', regex=True).to_numpy(dtype=bool))
+    for i in non_ascii:
+        matrix[i] = lexical_features(raw[i])
+    return matrix
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def choose_threshold(confidence, predicted_phishing, actual_phishing, target_precision, min_support):
+    # Lowest confidence t at which the verdicts with confidence >= t (the ones
+    # the lexical tier would make final) reach target_precision for both the
+    # Phishing and the Aman label, with at least min_support of them.
+    # Returns (threshold, stats at that threshold) or (None, None).
+    order = np.argsort(-confidence, kind='stable')
+    confidence = confidence[order]
+    predicted = predicted_phishing[order]
+    correct = predicted == actual_phishing[order]
+    counts = {}
+    for label, mask in (('Phishing', predicted), ('Aman', ~predicted)):
+        counts[label] = (np.cumsum(mask), np.cumsum(mask & correct))
+
+    # Candidate cut-offs: the last row of each run of equal confidence
+    ends = np.flatnonzero(np.r_[confidence[1:] != confidence[:-1], True])
+    qualified = ends + 1 >= min_support
+    for label, (made, right) in counts.items():
+        with np.errstate(divide='ignore', invalid='ignore'):
+            precision = np.where(made[ends] > 0, right[ends] / made[ends], 1.0)
+        qualified &= precision >= target_precision
+    if not qualified.any():
+        return None, None
+
+    end = ends[np.flatnonzero(qualified)[-1]]
+    stats = {'final_verdicts': int(end + 1), 'coverage': round((end + 1) / len(confidence), 4),
+             'predicted': {}, 'precision': {}}
+    for label, (made, right) in counts.items():
+        stats['predicted'][label] = int(made[end])
+        stats['precision'][label] = round(float(right[end] / made[end]), 4) if made[end] else None
+    return float(confidence[end]), stats
+
+
+def calibrated_threshold(path, model_path, target_precision, min_support):
+    # Threshold from a calibrate_lexical.py file, or LEXICAL_DISABLED if there
+    # is none or it does not hold for this model at this precision
+    try:
+        with open(path, encoding='utf-8') as f:
+            calibration = json.load(f)
+    except FileNotFoundError:
+        return LEXICAL_DISABLED
+    except (OSError, ValueError) as e:
+        print(f"WARNING: Could not read lexical calibration {path}: {e}")
+        return LEXICAL_DISABLED
+
+    stats = calibration.get('at_threshold') or {}
+    precision = [p for p in (stats.get('precision') or {}).values() if p is not None]
+    if calibration.get('model_sha256') != file_sha256(model_path):
+        problem = f"it was measured on a different {model_path}"
+    elif not precision or min(precision) < target_precision:
+        problem = f"its measured precision is below {target_precision}"
+    elif stats.get('final_verdicts', 0) < min_support:
+        problem = f"it is based on fewer than {min_support} verdicts"
+    else:
+        return float(calibration['threshold'])
+    print(f"WARNING: Lexical tier disabled: {path} does not apply, {problem}")
+    return LEXICAL_DISABLED
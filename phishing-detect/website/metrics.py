@@ -0,0 +1,107 @@
+import threading
+
+# Default latency buckets, in seconds
+LATENCY_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+
+
+class Histogram:
+    # Fixed-bucket histogram. Counts are cumulative per upper bound ("le"),
+    # the same layout as a Prometheus histogram, plus count and sum.
+
+    def __init__(self, buckets):
+        self.buckets = sorted(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        i = 0
+        while i < len(self.buckets) and value > self.buckets[i]:
+            i += 1
+        with self.lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += value
+
+    def snapshot(self):
+        with self.lock:
+            cumulative = {}
+            total = 0
+            for bound, n in zip(self.buckets + ['+Inf'], self.counts):
+                total += n
+                cumulative[str(bound)] = total
+            return {'buckets': cumulative, 'count': self.count, 'sum': round(self.sum, 6)}
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for v in labels.values())
+    return '{' + ','.join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + '}'
+
+
+def _render_histogram(lines, name, labels, histogram):
+    snap = histogram.snapshot()
+    for bound, n in snap['buckets'].items():
+        lines.append(f'{name}_bucket{_labels({**labels, "le": bound})} {n}')
+    lines.append(f'{name}_sum{_labels(labels)} {snap["sum"]}')
+    lines.append(f'{name}_count{_labels(labels)} {snap["count"]}')
+
+
+class MetricsRegistry:
+    # Labelled counters and histograms, rendered in the Prometheus text
+    # exposition format. Collectors add values that live elsewhere (cache
+    # stats, scheduler histograms) at render time.
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}  # name -> [type, help, buckets, {label tuple: value or Histogram}]
+        self.collectors = []
+
+    def counter(self, name, help):
+        self.metrics[name] = ['counter', help, None, {}]
+
+    def histogram(self, name, help, buckets=LATENCY_BUCKETS):
+        self.metrics[name] = ['histogram', help, buckets, {}]
+
+    def inc(self, name, value=1, **labels):
+        series = self.metrics[name][3]
+        key = tuple(labels.items())
+        with self.lock:
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        kind, _, buckets, series = self.metrics[name]
+        key = tuple(labels.items())
+        histogram = series.get(key)
+        if histogram is None:
+            with self.lock:
+                histogram = series.setdefault(key, Histogram(buckets))
+        histogram.observe(value)
+
+    def add_collector(self, collect):
+        # collect() -> [(name, type, help, [(labels dict, number or Histogram), ...]), ...]
+        self.collectors.append(collect)
+
+    def render(self):
+        lines = []
+        families = []
+        with self.lock:
+            for name, (kind, help, _, series) in self.metrics.items():
+                families.append((name, kind, help, [(dict(k), v) for k, v in series.items()]))
+        for collect in self.collectors:
+            try:
+                families.extend(collect())
+            except Exception as e:
+                print(f"Metrics collector failed: {e}")
+
+        for name, kind, help, samples in families:
+            lines.append(f'# HELP {name} {help}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in samples:
+                if isinstance(value, Histogram):
+                    _render_histogram(lines, name, labels, value)
+                else:
+                    lines.append(f'{name}{_labels(labels)} {value}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,86 @@
+import time
+import queue
+import threading
+import numpy as np
+from concurrent.futures import Future
+
+from metrics import Histogram
+
+
+class MicroBatcher:
+    # Collects single-row predict calls from concurrent request threads and
+    # runs them as one vectorized call. A worker thread takes the first
+    # waiting row, then keeps collecting until it has max_batch_size rows or
+    # max_wait_ms has passed, calls predict_fn on the stacked matrix and
+    # hands each row's output back to the thread that submitted it.
+
+    def __init__(self, predict_fn, max_batch_size=64, max_wait_ms=2, name='predict'):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.stats = {'batches': 0, 'rows': 0, 'errors': 0}
+        sizes = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+        self.batch_sizes = Histogram([s for s in sizes if s < max_batch_size] + [max_batch_size])
+        self.queue_depth = Histogram(sizes + [512, 1024])
+        self.thread = threading.Thread(target=self._run, name=f'{name}-batcher', daemon=True)
+        self.thread.start()
+
+    def submit(self, row):
+        # Returns a Future resolving to predict_fn's output for this row
+        future = Future()
+        self.queue.put((np.asarray(row), future))
+        return future
+
+    def predict(self, row, timeout=None):
+        return self.submit(row).result(timeout=timeout)
+
+    def _collect(self):
+        batch = [self.queue.get()]
+        # Rows waiting when the batch starts, including the first one
+        self.queue_depth.observe(self.queue.qsize() + 1)
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    batch.append(self.queue.get(timeout=remaining))
+                else:
+                    # Wait is over; still take whatever is already queued
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            # Callers that gave up (cancelled futures) are skipped
+            batch = [(row, future) for row, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            self.batch_sizes.observe(len(batch))
+            try:
+                outputs = self.predict_fn(np.vstack([row for row, _ in batch]))
+            except Exception as e:
+                with self.lock:
+                    self.stats['errors'] += 1
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), output in zip(batch, outputs):
+                future.set_result(output)
+            with self.lock:
+                self.stats['batches'] += 1
+                self.stats['rows'] += len(batch)
+
+    def snapshot(self):
+        with self.lock:
+            stats = dict(self.stats)
+        stats['queued'] = self.queue.qsize()
+        stats['max_batch_size'] = self.max_batch_size
+        stats['max_wait_ms'] = self.max_wait * 1000
+        stats['batch_size'] = self.batch_sizes.snapshot()
+        stats['queue_depth'] = self.queue_depth.snapshot()
+        return stats
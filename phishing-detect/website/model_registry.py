@@ -0,0 +1,104 @@
+import os
+import time
+import threading
+
+
+class ModelEntry:
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        self.model = None
+        self.mtime = None
+        self.loaded_at = None
+        self.load_ms = None
+        self.error = None
+        self.lock = threading.Lock()
+
+
+class ModelRegistry:
+    # Named model files, loaded lazily on first use. A watcher thread checks
+    # the loaded files' mtimes every check_interval seconds and swaps in the
+    # new model once it has fully loaded; callers keep using the old object
+    # until then, and a file that fails to load leaves the old model active.
+    # `load(path)` returns the estimator or None; `prepare(model)` turns it
+    # into what is served (e.g. tree_engine.compile_or_keep).
+
+    def __init__(self, paths, load, prepare=None, check_interval=5):
+        self.entries = {name: ModelEntry(name, path) for name, path in paths.items()}
+        self.load_fn = load
+        self.prepare = prepare or (lambda model: model)
+        self.check_interval = check_interval
+        if check_interval:
+            threading.Thread(target=self._watch, name='model-watch', daemon=True).start()
+
+    def names(self):
+        return list(self.entries)
+
+    def _load(self, entry):
+        try:
+            mtime = os.path.getmtime(entry.path)
+        except OSError as e:
+            entry.error = str(e)
+            entry.mtime = None
+            return
+        if entry.mtime == mtime:
+            return
+
+        start = time.perf_counter()
+        model = self.load_fn(entry.path)
+        if model is not None:
+            try:
+                model = self.prepare(model)
+            except Exception as e:
+                print(f"WARNING: Could not prepare model {entry.name}: {e}")
+        elapsed = (time.perf_counter() - start) * 1000
+
+        # mtime is recorded even on failure so a broken file is not reloaded
+        # every check; fixing the file changes the mtime again.
+        entry.mtime = mtime
+        if model is None:
+            entry.error = f"Could not load {entry.path}"
+            if entry.model is not None:
+                print(f"WARNING: Keeping the previous {entry.name} model")
+            return
+        entry.model = model
+        entry.loaded_at = time.time()
+        entry.load_ms = round(elapsed, 1)
+        entry.error = None
+
+    def get(self, name):
+        # Current model for `name` (loading it on first use), or None
+        entry = self.entries[name]
+        if entry.model is None and entry.loaded_at is None and entry.mtime is None:
+            with entry.lock:
+                if entry.loaded_at is None and entry.mtime is None:
+                    self._load(entry)
+        return entry.model
+
+    def reload_changed(self):
+        for entry in self.entries.values():
+            # Models nobody asked for yet stay unloaded
+            if entry.mtime is None and entry.loaded_at is None:
+                continue
+            with entry.lock:
+                self._load(entry)
+
+    def _watch(self):
+        while True:
+            time.sleep(self.check_interval)
+            self.reload_changed()
+
+    def snapshot(self):
+        models = {}
+        for name, entry in self.entries.items():
+            model = entry.model
+            models[name] = {
+                'path': entry.path,
+                'loaded': model is not None,
+                'type': getattr(model, 'source', None) or (type(model).__name__ if model is not None else None),
+                'n_features': getattr(model, 'n_features_in_', None),
+                'loaded_at': entry.loaded_at,
+                'load_ms': entry.load_ms,
+                'error': entry.error,
+            }
+        return models
@@ -0,0 +1,157 @@
+import time
+import socket
+import threading
+import requests
+from http.cookiejar import DefaultCookiePolicy
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+from urllib3.util.connection import create_connection
+from deadline_timer import DeadlineTimer, time_left
+
+
+class ResolvedConnection:
+    # Mixin for urllib3 connections: the address comes from `resolver`
+    # (dns_resolver.DnsResolver) instead of a fresh getaddrinfo per
+    # connection. SNI and the Host header still use the host name.
+    resolver = None
+
+    def _new_conn(self):
+        try:
+            addresses = self.resolver.resolve(self.host)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        error = None
+        for address in addresses:
+            try:
+                return create_connection((address, self.port), self.timeout,
+                                         source_address=self.source_address,
+                                         socket_options=self.socket_options)
+            except socket.timeout:
+                error = ConnectTimeoutError(self, f"Connection to {self.host} timed out. "
+                                                  f"(connect timeout={self.timeout})")
+            except OSError as e:
+                error = NewConnectionError(self, f"Failed to establish a new connection: {e}")
+        raise error
+
+
+class ResolvingAdapter(HTTPAdapter):
+    # HTTPAdapter whose pools (direct and via proxy) connect through ResolvedConnection
+
+    def __init__(self, resolver, **kwargs):
+        attrs = {'resolver': resolver}
+        http_connection = type('ResolvedHTTPConnection', (ResolvedConnection, HTTPConnection), attrs)
+        https_connection = type('ResolvedHTTPSConnection', (ResolvedConnection, HTTPSConnection), attrs)
+        self.pool_classes = {
+            'http': type('ResolvedHTTPConnectionPool', (HTTPConnectionPool,), {'ConnectionCls': http_connection}),
+            'https': type('ResolvedHTTPSConnectionPool', (HTTPSConnectionPool,), {'ConnectionCls': https_connection}),
+        }
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = self.pool_classes
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+        manager.pool_classes_by_scheme = self.pool_classes
+        return manager
+
+
+def body_socket(response):
+    # The socket a streamed requests response reads its body from. The
+    # connection drops its reference when the server answers with
+    # "Connection: close", but the response's file object still holds it.
+    sock = getattr(response.raw.connection, 'sock', None)
+    if sock is None:
+        fp = getattr(getattr(response.raw, '_fp', None), 'fp', None)
+        sock = getattr(getattr(fp, 'raw', None), '_sock', None)
+    return sock
+
+
+class PageFetcher:
+    # Fetches landing pages through one pooled session so repeat hosts reuse
+    # their keep-alive connections. The body is streamed and reading stops at
+    # max_bytes, so a multi-megabyte page never sits in memory in full.
+    # Responses whose Content-Type is not HTML/text are not read at all.
+    # With a `resolver`, host names are resolved through it (see
+    # ResolvedConnection) so the fetch shares the DNS cache.
+
+    def __init__(self, max_bytes=1024 * 1024, chunk_size=16 * 1024, pool_connections=64, pool_maxsize=32,
+                 resolver=None, timer=None):
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.timer = timer or DeadlineTimer('fetch-deadline')
+        self.session = requests.Session()
+        # Never carry cookies from one scanned site to the next
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        if resolver is not None:
+            adapter = ResolvingAdapter(resolver, pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        else:
+            adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.lock = threading.Lock()
+        self.stats = {'fetches': 0, 'truncated': 0, 'skipped_content_type': 0, 'bytes_read': 0,
+                      'deadline_exceeded': 0}
+
+    def is_html(self, content_type):
+        content_type = content_type.split(';')[0].strip().lower()
+        return content_type == '' or content_type.startswith('text/') or 'xml' in content_type
+
+    def fetch(self, url, timeout, deadline=None):
+        # Returns (response, text). The response is already closed: use it
+        # for status and redirect history only, and `text` for the body,
+        # which holds at most max_bytes of the decoded page.
+        # `timeout` applies to each connect / socket read. With a `deadline`
+        # (time.monotonic()) the timeouts are cut to the time left and the
+        # connection is shut down once it passes, so a host that trickles
+        # its body can not keep the fetch running; TimeoutError is raised.
+        chunks = []
+        size = 0
+        truncated = False
+        skipped = False
+
+        try:
+            with self.session.get(url, timeout=time_left(deadline, timeout), stream=True) as response:
+                if self.is_html(response.headers.get('Content-Type', '')):
+                    with self.timer.guard(body_socket(response), deadline):
+                        for chunk in response.iter_content(self.chunk_size):
+                            if deadline is not None and time.monotonic() >= deadline:
+                                raise TimeoutError
+                            chunks.append(chunk)
+                            size += len(chunk)
+                            if size >= self.max_bytes:
+                                truncated = True
+                                break
+                        # A shutdown by the timer can also end the body like a normal EOF
+                        if deadline is not None and time.monotonic() >= deadline and not truncated:
+                            raise TimeoutError
+                else:
+                    skipped = True
+        except Exception:
+            if deadline is not None and time.monotonic() >= deadline:
+                with self.lock:
+                    self.stats['deadline_exceeded'] += 1
+                raise TimeoutError(f"Fetch of {url} passed its deadline")
+            raise
+
+        body = b''.join(chunks)[:self.max_bytes]
+        try:
+            text = body.decode(response.encoding or 'utf-8', errors='replace')
+        except LookupError:
+            text = body.decode('utf-8', errors='replace')
+
+        with self.lock:
+            self.stats['fetches'] += 1
+            self.stats['bytes_read'] += len(body)
+            if truncated:
+                self.stats['truncated'] += 1
+            if skipped:
+                self.stats['skipped_content_type'] += 1
+        return response, text
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.stats)
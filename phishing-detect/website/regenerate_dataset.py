@@ -0,0 +1,225 @@
+"""Rebuild a phishing.csv-style training set with the production extractor.
+
+Contoh:
+    python regenerate_dataset.py urls_berlabel.csv dataset_baru.csv
+    python regenerate_dataset.py urls.csv dataset_baru.parquet --processes 8 --threads 32
+    python regenerate_dataset.py urls.csv dataset_baru.csv --label-column type --phishing-label bad
+
+The input CSV has a URL column and a label column. Labels equal to
+--phishing-label (case-insensitive) become class -1, everything else
+class 1, the same encoding as phishing.csv.
+
+Rows are split into chunks. Worker processes extract each chunk with
+--threads concurrent FeatureExtractor runs, and every finished chunk is
+written to <output>.parts/ before the next one is handed out. Running the
+same command again after a crash skips the chunks already on disk, so
+only unfinished chunks are fetched again. WHOIS answers also persist in
+the shared WHOIS cache. The parts are merged into the output at the end.
+
+<output>.parts/manifest.json records the input file (path, size, sha256)
+and the options that decide which URL lands in which chunk. A run whose
+input or options differ refuses to reuse the parts; pass --restart to
+discard them.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import pandas as pd
+from multiprocessing import Pool
+from concurrent.futures import ThreadPoolExecutor
+
+import app
+from whois_cache import WhoisCache
+from page_fetcher import PageFetcher
+from deadline_timer import DeadlineTimer
+from dns_resolver import DnsResolver
+from feature_store import FeatureStore
+from lexical import file_sha256
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def init_worker(deadline):
+    # SQLite connections, HTTP pools and timer threads must not be shared
+    # across fork(); every worker opens its own.
+    app.whois_cache = WhoisCache(app.WHOIS_CACHE_PATH, max_entries=app.WHOIS_CACHE_SIZE,
+                                 ttl=app.WHOIS_TTL, negative_ttl=app.WHOIS_NEGATIVE_TTL)
+    app.dns_resolver = DnsResolver(max_entries=app.DNS_CACHE_SIZE, ttl=app.DNS_TTL,
+                                   negative_ttl=app.DNS_NEGATIVE_TTL)
+    app.deadline_timer = DeadlineTimer()
+    app.page_fetcher = PageFetcher(max_bytes=app.MAX_PAGE_BYTES, pool_maxsize=app.STAGE_WORKERS,
+                                   resolver=app.dns_resolver, timer=app.deadline_timer)
+    app.EXTRACTION_DEADLINE = deadline
+
+
+def extract_one(url):
+    try:
+        features, degraded, extract_ms = app.extract_features_timed(app.normalize_url(url))
+        return features, ','.join(degraded), None
+    except Exception as e:
+        return None, '', str(e)
+
+
+def extract_chunk(job):
+    # Runs in a worker process: one chunk, `threads` URLs in flight at once.
+    # The part file is written under a temporary name and renamed, so a
+    # part on disk is always complete.
+    index, rows, part_path, threads = job
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        outputs = list(executor.map(extract_one, [url for _, url, _ in rows]))
+
+    records = []
+    for (row_id, url, label), (features, degraded, error) in zip(rows, outputs):
+        record = {'row_id': row_id, 'url': url, 'class': label, 'degraded': degraded, 'error': error}
+        for column, value in zip(app.FEATURE_COLUMNS, features or [None] * len(app.FEATURE_COLUMNS)):
+            record[column] = value
+        records.append(record)
+
+    frame = pd.DataFrame.from_records(records)
+    frame = frame.astype({'url': 'string', 'degraded': 'string', 'error': 'string'})
+    tmp_path = part_path + '.tmp'
+    frame.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, part_path)
+    return index, len(rows), int(frame['error'].notna().sum())
+
+
+def load_labelled(path, url_column, label_column, phishing_label):
+    frame = pd.read_csv(path, usecols=[url_column, label_column], dtype=str)
+    frame = frame.dropna(subset=[url_column])
+    frame[url_column] = frame[url_column].str.strip()
+    frame = frame[frame[url_column] != '']
+    labels = frame[label_column].fillna('').str.strip().str.lower()
+    classes = (labels == phishing_label.lower()).map({True: -1, False: 1})
+    return list(zip(range(len(frame)), frame[url_column].tolist(), classes.tolist()))
+
+
+def store_part(store, part_path):
+    # Copy a finished part's vectors into the feature store
+    part = pd.read_parquet(part_path)
+    part = part[part['error'].isna()]
+    for url, degraded, features in zip(part['url'], part['degraded'].fillna(''),
+                                       part[app.FEATURE_COLUMNS].astype(int).values):
+        store.add(url, features, app.EXTRACTOR_VERSION, degraded.split(',') if degraded else ())
+
+
+def parts_manifest(args):
+    # Everything that decides the content of part-N: the input file and the
+    # options that map its rows to row ids and chunks
+    return {
+        'input': os.path.abspath(args.input),
+        'size': os.path.getsize(args.input),
+        'sha256': file_sha256(args.input),
+        'chunk_size': args.chunk_size,
+        'url_column': args.url_column,
+        'label_column': args.label_column,
+        'phishing_label': args.phishing_label,
+    }
+
+
+def prepare_parts_dir(parts_dir, manifest, restart):
+    # Parts already in parts_dir are only reused when they were written for
+    # the same manifest. With `restart` they are deleted instead.
+    os.makedirs(parts_dir, exist_ok=True)
+    manifest_path = os.path.join(parts_dir, MANIFEST_NAME)
+    parts = [p for p in os.listdir(parts_dir) if p.startswith('part-')]
+    if restart:
+        for name in parts + [MANIFEST_NAME]:
+            if os.path.exists(os.path.join(parts_dir, name)):
+                os.remove(os.path.join(parts_dir, name))
+    elif os.path.exists(manifest_path):
+        with open(manifest_path, encoding='utf-8') as f:
+            previous = json.load(f)
+        changed = [key for key in manifest if previous.get(key) != manifest[key]]
+        if changed:
+            sys.exit(f"Part di {parts_dir} dibuat dari input/opsi lain (beda: {', '.join(changed)}); "
+                     f"pakai --restart untuk membuangnya")
+    elif parts:
+        sys.exit(f"Part di {parts_dir} tidak punya {MANIFEST_NAME}; pakai --restart untuk membuangnya")
+
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+
+def merge_parts(parts_dir, output, keep_degraded, n_rows):
+    # Concatenate the parts in input order into the phishing.csv layout.
+    # Every input row must be in exactly one part.
+    parts = sorted(p for p in os.listdir(parts_dir) if p.endswith('.parquet'))
+    frame = pd.concat([pd.read_parquet(os.path.join(parts_dir, p)) for p in parts], ignore_index=True)
+    frame = frame.sort_values('row_id')
+    if frame['row_id'].duplicated().any():
+        raise ValueError(f"row_id ganda di {parts_dir}; jalankan ulang dengan --restart")
+    if len(frame) != n_rows or (frame['row_id'].values != range(n_rows)).any():
+        raise ValueError(f"Part di {parts_dir} berisi {len(frame)} baris, bukan baris 0..{n_rows - 1} dari input; "
+                         f"jalankan ulang dengan --restart")
+
+    failed = frame['error'].notna()
+    degraded = frame['degraded'].fillna('') != ''
+    keep = ~failed if keep_degraded else ~failed & ~degraded
+    dataset = frame.loc[keep, app.FEATURE_COLUMNS + ['class']].astype(int).reset_index(drop=True)
+    dataset.insert(0, 'Index', range(len(dataset)))
+
+    if output.lower().endswith('.parquet'):
+        dataset.to_parquet(output, index=False)
+    else:
+        dataset.to_csv(output, index=False)
+    return len(dataset), int(failed.sum()), int((degraded & ~failed).sum())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Regenerate phishing.csv-style features from labelled URLs')
+    parser.add_argument('input', help='CSV with a URL column and a label column')
+    parser.add_argument('output', help='Output .csv or .parquet (phishing.csv columns)')
+    parser.add_argument('--url-column', default='url')
+    parser.add_argument('--label-column', default='label')
+    parser.add_argument('--phishing-label', default='phishing', help='Label value that means phishing')
+    parser.add_argument('--chunk-size', type=int, default=500, help='URLs per checkpointed part')
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=16, help='Concurrent extractions per process')
+    parser.add_argument('--deadline', type=float, default=app.EXTRACTION_DEADLINE,
+                        help='Per-URL extraction deadline in seconds')
+    parser.add_argument('--keep-degraded', action='store_true',
+                        help='Keep rows where a network stage missed the deadline')
+    parser.add_argument('--store', help='Also save the extracted vectors to this SQLite feature store')
+    parser.add_argument('--restart', action='store_true',
+                        help='Discard the parts of an earlier run instead of resuming it')
+    args = parser.parse_args(argv)
+    store = FeatureStore(args.store, len(app.FEATURE_COLUMNS)) if args.store else None
+
+    rows = load_labelled(args.input, args.url_column, args.label_column, args.phishing_label)
+    parts_dir = args.output + '.parts'
+    prepare_parts_dir(parts_dir, parts_manifest(args), args.restart)
+
+    jobs = []
+    for index, start in enumerate(range(0, len(rows), args.chunk_size)):
+        part_path = os.path.join(parts_dir, f'part-{index:06d}.parquet')
+        if not os.path.exists(part_path):
+            jobs.append((index, rows[start:start + args.chunk_size], part_path, args.threads))
+    total_chunks = (len(rows) + args.chunk_size - 1) // args.chunk_size
+    print(f"{len(rows)} URL, {total_chunks} part, {total_chunks - len(jobs)} sudah selesai", file=sys.stderr)
+
+    done = 0
+    begin = time.perf_counter()
+    if jobs:
+        with Pool(args.processes, initializer=init_worker, initargs=(args.deadline,)) as pool:
+            for index, count, errors in pool.imap_unordered(extract_chunk, jobs):
+                if store is not None:
+                    store_part(store, os.path.join(parts_dir, f'part-{index:06d}.parquet'))
+                done += count
+                elapsed = time.perf_counter() - begin
+                print(f"part {index}: {count} URL ({errors} gagal), total {done} URL "
+                      f"({done / elapsed:.1f} URL/detik)", file=sys.stderr)
+
+    if store is not None:
+        store.flush()
+    try:
+        kept, failed, degraded = merge_parts(parts_dir, args.output, args.keep_degraded, len(rows))
+    except ValueError as e:
+        sys.exit(str(e))
+    print(f"{kept} baris ditulis ke {args.output} ({failed} gagal, {degraded} degraded"
+          f"{' ikut disimpan' if args.keep_degraded else ' dibuang'})", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
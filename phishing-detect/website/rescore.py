@@ -0,0 +1,71 @@
+"""Re-score stored feature vectors with any 30-feature model, offline.
+
+Contoh:
+    python rescore.py feature_vectors.sqlite3 hasil.csv
+    python rescore.py feature_vectors.sqlite3 hasil.parquet --model model_baru.pkl --skip-degraded
+    python rescore.py feature_vectors.sqlite3 hasil.csv --all-rows --version 1
+
+Reads the vectors saved by /predict, /predict_batch, bulk_score.py --store
+or regenerate_dataset.py --store, and runs the model over them in large
+batches. No page fetch or WHOIS query is made. By default only the newest
+vector of each normalized URL is scored.
+"""
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+import app
+from bulk_score import ResultWriter
+from feature_store import iter_vectors
+from tree_engine import compile_or_keep
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Re-score stored feature vectors without network I/O')
+    parser.add_argument('store', help='SQLite feature store (FEATURE_STORE_PATH)')
+    parser.add_argument('output', help='Output .csv or .parquet')
+    parser.add_argument('--model', default=app.MODEL_PATH, help='Pickled 30-feature model')
+    parser.add_argument('--batch-size', type=int, default=100000)
+    parser.add_argument('--all-rows', action='store_true', help='Score every stored vector, not just the newest per URL')
+    parser.add_argument('--version', help='Only vectors from this EXTRACTOR_VERSION')
+    parser.add_argument('--skip-degraded', action='store_true', help='Skip vectors with degraded features')
+    args = parser.parse_args(argv)
+
+    model = compile_or_keep(app.load_model(args.model))
+    if model is None:
+        sys.exit(f"Model {args.model} tidak bisa dimuat")
+    n_features = getattr(model, 'n_features_in_', None)
+    if n_features not in (None, len(app.FEATURE_COLUMNS)):
+        sys.exit(f"Model {args.model} memakai {n_features} fitur, bukan {len(app.FEATURE_COLUMNS)}")
+
+    # Probability columns whose class the app reports as "Phishing"
+    phishing_columns = [i for i, c in enumerate(model.classes_) if app.label_prediction(c) == 'Phishing']
+
+    writer = ResultWriter(args.output)
+    total = 0
+    start = time.perf_counter()
+    try:
+        for meta, X in iter_vectors(args.store, len(app.FEATURE_COLUMNS), batch_size=args.batch_size,
+                                    latest_only=not args.all_rows, version=args.version,
+                                    skip_degraded=args.skip_degraded):
+            proba = model.predict_proba(X)
+            predictions = model.classes_[proba.argmax(axis=1)]
+            frame = pd.DataFrame(meta)
+            frame['extracted_at'] = pd.to_datetime(frame['extracted_at'], unit='s')
+            frame['result'] = [app.label_prediction(p) for p in predictions]
+            frame['phishing_probability'] = np.round(proba[:, phishing_columns].sum(axis=1), 4)
+            writer.write(frame.astype({'url': 'string', 'extractor_version': 'string',
+                                       'degraded': 'string', 'result': 'string'}))
+            total += len(frame)
+            elapsed = time.perf_counter() - start
+            print(f"{total} vektor dinilai ({total / elapsed:.0f} vektor/detik)", file=sys.stderr)
+    finally:
+        writer.close()
+    if not total:
+        print("Tidak ada vektor yang cocok di feature store", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+import os
+import sys
+import time
+import socket
+import threading
+import pytest
+
+# The website modules are flat siblings (import app, import lexical, ...)
+WEBSITE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, WEBSITE_DIR)
+
+
+class DripServer:
+    # TCP server that answers every connection with `head`, then one byte of
+    # `drip` every `interval` seconds, forever: a host that never trips a
+    # per-read socket timeout.
+
+    def __init__(self, head, drip=b'a', interval=0.2):
+        self.head = head
+        self.drip = drip
+        self.interval = interval
+        self.sock = socket.create_server(('127.0.0.1', 0))
+        self.port = self.sock.getsockname()[1]
+        self.stopped = threading.Event()
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while not self.stopped.is_set():
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        with conn:
+            try:
+                conn.settimeout(1)
+                try:
+                    conn.recv(65536)
+                except socket.timeout:
+                    pass  # TLS clients speak first, raw sockets may not
+                conn.sendall(self.head)
+                while not self.stopped.is_set():
+                    conn.sendall(self.drip)
+                    time.sleep(self.interval)
+            except OSError:
+                pass
+
+    def close(self):
+        self.stopped.set()
+        self.sock.close()
+
+
+@pytest.fixture
+def drip_server():
+    servers = []
+
+    def start(head=b'', drip=b'a', interval=0.2):
+        server = DripServer(head, drip, interval)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
@@ -0,0 +1,107 @@
+"""Admission control: the network gate, the per-client rate limit and the
+slot release of extractions whose stages outlive the deadline.
+"""
+import time
+import threading
+import pytest
+
+import app
+from admission import AdmissionGate, AdmissionRejected, RateLimiter
+from whois_cache import WhoisCache
+
+
+def abandoned(stage):
+    return app.metrics.metrics['phishing_abandoned_stages_total'][3].get((('stage', stage),), 0)
+
+
+def test_gate_admits_up_to_max_concurrent():
+    gate = AdmissionGate(max_concurrent=2, max_queue=0, queue_timeout=0.1)
+    gate.acquire()
+    gate.acquire()
+    with pytest.raises(AdmissionRejected) as rejected:
+        gate.acquire()
+    assert (rejected.value.status, rejected.value.reason) == (503, 'queue_full')
+    assert rejected.value.retry_after >= 1
+    gate.release(0.1)
+    gate.acquire()
+    assert gate.snapshot()['active'] == 2
+
+
+def test_gate_times_out_a_waiting_request():
+    gate = AdmissionGate(max_concurrent=1, max_queue=1, queue_timeout=0.1)
+    gate.acquire()
+    start = time.perf_counter()
+    with pytest.raises(AdmissionRejected) as rejected:
+        gate.acquire()
+    assert (rejected.value.status, rejected.value.reason) == (503, 'queue_timeout')
+    assert time.perf_counter() - start < 1
+    assert gate.snapshot()['waiting'] == 0
+
+
+def test_gate_hands_a_released_slot_to_the_queue():
+    gate = AdmissionGate(max_concurrent=1, max_queue=1, queue_timeout=2)
+    gate.acquire()
+    threading.Timer(0.1, gate.release, (0.1,)).start()
+    assert gate.acquire() < 1
+    assert gate.snapshot()['active'] == 1
+
+
+def test_rate_limiter_allows_burst_then_429():
+    limiter = RateLimiter(rate=1, burst=2)
+    limiter.check('a')
+    limiter.check('a')
+    with pytest.raises(AdmissionRejected) as rejected:
+        limiter.check('a')
+    assert (rejected.value.status, rejected.value.reason) == (429, 'rate_limited')
+    assert rejected.value.retry_after == 1
+    limiter.check('b')  # buckets are per client
+
+
+@pytest.fixture
+def client():
+    return app.app.test_client()
+
+
+def test_predict_rate_limited(client, monkeypatch):
+    monkeypatch.setattr(app, 'rate_limiter', RateLimiter(rate=0.5, burst=1))
+    assert client.post('/predict', json={}).status_code == 400
+    response = client.post('/predict', json={})
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '2'
+    assert response.get_json()['reason'] == 'rate_limited'
+
+
+def test_predict_gate_full(client, monkeypatch):
+    gate = AdmissionGate(max_concurrent=1, max_queue=0, queue_timeout=0.1)
+    gate.acquire()
+    monkeypatch.setattr(app, 'network_gate', gate)
+    response = client.post('/predict', json={'url': 'http://127.0.0.1:1/gate-full'})
+    assert response.status_code == 503
+    assert int(response.headers['Retry-After']) >= 1
+    assert response.get_json()['reason'] == 'queue_full'
+
+
+def test_stuck_stage_releases_slot_after_grace(client, monkeypatch, tmp_path):
+    # A WHOIS stage that ignores its deadline, like an uninterruptible lookup
+    stuck = threading.Event()
+    monkeypatch.setattr(app, 'whois_cache', WhoisCache(str(tmp_path / 'whois.sqlite3')))
+    monkeypatch.setattr(app, 'query_whois', lambda domain, timeout=None, deadline=None: stuck.wait(10))
+    monkeypatch.setattr(app, 'network_gate', AdmissionGate(max_concurrent=1, max_queue=0, queue_timeout=0.1))
+    monkeypatch.setattr(app, 'EXTRACTION_DEADLINE', 0.5)
+    monkeypatch.setattr(app, 'STAGE_GRACE', 1)
+    for name in app.FULL_MODELS:
+        app.model_registry.get(name)  # loading a model must not count against the grace
+    before = abandoned('whois')
+    try:
+        start = time.monotonic()
+        assert client.post('/predict', json={'url': 'http://127.0.0.1:1/stuck'}).status_code == 200
+        assert app.network_gate.snapshot()['active'] == 1
+        assert client.post('/predict', json={'url': 'http://127.0.0.1:1/other'}).status_code == 503
+
+        while app.network_gate.snapshot()['active']:
+            assert time.monotonic() - start < 0.5 + 1 + 0.5
+            time.sleep(0.02)
+        assert abandoned('whois') == before + 1
+        assert client.post('/predict', json={'url': 'http://127.0.0.1:1/after'}).status_code == 200
+    finally:
+        stuck.set()
@@ -0,0 +1,62 @@
+"""Bloom-filter blocklist: no false negatives, bounded false positives,
+domain entries covering every page, and reload on file change.
+"""
+import os
+import pytest
+
+from blocklist import BloomFilter, Blocklist, blocklist_keys
+
+
+def test_bloom_has_no_false_negatives():
+    items = [f'url:http://phish-{i}.test/' for i in range(5000)]
+    bloom = BloomFilter(len(items), error_rate=1e-3)
+    bloom.add_many(items)
+    assert all(item in bloom for item in items)
+    assert bloom.count == len(items)
+
+
+def test_bloom_false_positive_rate():
+    bloom = BloomFilter(10000, error_rate=1e-2)
+    bloom.add_many([f'domain:member-{i}.test' for i in range(10000)])
+    false_positives = sum(f'domain:other-{i}.test' in bloom for i in range(20000))
+    assert false_positives < 20000 * 1e-2 * 2
+
+
+def test_keys_cover_host_and_registered_domain():
+    assert blocklist_keys('HTTP://Login.Example.co.uk:80/a#b') == [
+        'url:http://login.example.co.uk/a', 'domain:login.example.co.uk', 'domain:example.co.uk']
+
+
+@pytest.fixture
+def list_path(tmp_path):
+    path = tmp_path / 'blocklist.txt'
+    path.write_text('# known phishing\nhttp://Bad.test/login\nevil.example.com\n\n', encoding='utf-8')
+    return path
+
+
+def test_contains_urls_and_domains(list_path):
+    blocklist = Blocklist(str(list_path), check_interval=0)
+    assert blocklist.contains('http://bad.test:80/login')
+    assert not blocklist.contains('http://bad.test/other')
+    assert blocklist.contains('https://evil.example.com/any/page')
+    assert not blocklist.contains('https://example.com/')
+    assert blocklist.snapshot()['entries'] == 2
+
+
+def test_reloads_when_file_changes(list_path):
+    blocklist = Blocklist(str(list_path), check_interval=0)
+    assert not blocklist.reload()
+
+    list_path.write_text('new-phish.test\n', encoding='utf-8')
+    mtime = os.path.getmtime(list_path) + 10
+    os.utime(list_path, (mtime, mtime))
+    assert blocklist.reload()
+    assert blocklist.contains('http://new-phish.test/')
+    assert not blocklist.contains('https://evil.example.com/')
+
+
+def test_missing_file_keeps_loaded_list(list_path):
+    blocklist = Blocklist(str(list_path), check_interval=0)
+    list_path.unlink()
+    assert not blocklist.reload()
+    assert blocklist.contains('https://evil.example.com/')
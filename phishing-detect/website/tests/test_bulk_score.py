@@ -0,0 +1,65 @@
+"""bulk_score.py in lexical-only mode: chunked input, the vectorized
+lexical features against the per-URL /predict path, and the threshold rule.
+"""
+import pandas as pd
+import pytest
+
+import app
+import bulk_score
+from lexical import lexical_features, scale_lexical
+
+URLS = ['paypal-login.secure-update.com/verify', 'https://www.google.com/', '',
+        'http://192.168.0.1/admin@bank', 'bit.ly/abc', 'https://sub.domain.example.co.uk/a-b?x=1',
+        'HTTP://Example.COM//redirect', 'www.tokopedia.com/']
+
+
+@pytest.fixture
+def lexical_model(monkeypatch):
+    if app.model_registry.get(app.LEXICAL_MODEL) is None:
+        pytest.skip(f"{app.LEXICAL_MODEL_PATH} can not be loaded here")
+    monkeypatch.setattr(app, 'LEXICAL_CONFIDENCE_THRESHOLD', None)
+
+
+@pytest.fixture
+def url_file(tmp_path):
+    path = tmp_path / 'urls.txt'
+    path.write_text('\n'.join(URLS) + '\n', encoding='utf-8')
+    return str(path)
+
+
+def test_read_chunks_text_and_csv(tmp_path, url_file):
+    chunks = list(bulk_score.read_chunks(url_file, 'url', 3))
+    assert [len(chunk) for chunk in chunks] == [3, 3, 2]
+    assert sum((chunk.tolist() for chunk in chunks), []) == URLS
+
+    csv_path = str(tmp_path / 'urls.csv')
+    pd.DataFrame({'id': range(len(URLS)), 'url': URLS}).to_csv(csv_path, index=False)
+    chunks = list(bulk_score.read_chunks(csv_path, 'url', 5))
+    assert sum((chunk.tolist() for chunk in chunks), []) == URLS
+
+
+def test_matches_predict_lexical_path(lexical_model, monkeypatch, url_file, tmp_path):
+    monkeypatch.setattr(app, 'lexical_threshold', lambda: 0.0)
+    output = str(tmp_path / 'scores.parquet')
+    bulk_score.main([url_file, output, '--chunk-size', '3'])
+
+    scores = pd.read_parquet(output)
+    assert len(scores) == len(URLS)
+    assert scores.loc[2, 'error'] == 'URL is required'
+    scored = scores.drop(index=2)
+    urls = [app.normalize_url(url) for url in URLS if url]
+    assert scored['url'].tolist() == urls
+    expected = app.lexical_rows(scale_lexical([lexical_features(url) for url in urls]))
+    assert list(zip(scored['lexical_result'], scored['lexical_confidence'])) == expected
+    assert (scored['result'] == scored['lexical_result']).all()
+    assert (scored['tier'] == 'lexical').all()
+
+
+def test_uncalibrated_tier_leaves_result_empty(lexical_model, monkeypatch, url_file, tmp_path):
+    monkeypatch.setattr(app, 'lexical_threshold', lambda: app.LEXICAL_DISABLED)
+    output = str(tmp_path / 'scores.csv')
+    bulk_score.main([url_file, output, '--chunk-size', '3'])
+
+    scores = pd.read_csv(output)
+    assert scores['result'].isna().all()
+    assert scores['lexical_result'].notna().sum() == len(URLS) - 1
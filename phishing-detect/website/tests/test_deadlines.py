@@ -0,0 +1,86 @@
+"""Network stages stop at the extraction deadline, not just the request.
+
+Every server here sends one byte every 0.2 s, so a per-read socket timeout
+never fires; only the absolute deadline can end the stage.
+"""
+import time
+import pytest
+
+import app
+from deadline_timer import DeadlineTimer
+from page_fetcher import PageFetcher
+
+# How far past the deadline a stage may still be running
+SLACK = 0.5
+
+HTTP_SIZED = b'HTTP/1.1 200 OK\r\nContent-Type: text/html\r\nContent-Length: 100000\r\n\r\n'
+HTTP_CHUNKED = b'HTTP/1.1 200 OK\r\nContent-Type: text/html\r\nTransfer-Encoding: chunked\r\n\r\n'
+HTTP_UNTIL_CLOSE = b'HTTP/1.1 200 OK\r\nContent-Type: text/html\r\nConnection: close\r\n\r\n'
+# TLS handshake record header announcing 16 KB that never fully arrive
+TLS_RECORD = b'\x16\x03\x01\x40\x00'
+
+
+@pytest.mark.parametrize('head, drip', [
+    (HTTP_SIZED, b'a'),
+    (HTTP_CHUNKED, b'1\r\na\r\n'),
+    (HTTP_UNTIL_CLOSE, b'a'),
+])
+def test_fetch_stops_at_deadline(drip_server, head, drip):
+    server = drip_server(head, drip)
+    fetcher = PageFetcher(timer=DeadlineTimer())
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        fetcher.fetch(f'http://127.0.0.1:{server.port}/', timeout=5, deadline=start + 1)
+    assert time.monotonic() - start < 1 + SLACK
+    assert fetcher.snapshot()['deadline_exceeded'] == 1
+
+
+def test_fetch_without_deadline_keeps_per_read_timeout(drip_server):
+    server = drip_server(HTTP_SIZED, interval=2)
+    start = time.monotonic()
+    with pytest.raises(Exception):
+        PageFetcher().fetch(f'http://127.0.0.1:{server.port}/', timeout=0.5)
+    assert time.monotonic() - start < 1 + SLACK
+
+
+def test_extractor_stage_threads_finish_after_deadline(drip_server, monkeypatch):
+    server = drip_server(HTTP_SIZED)
+    monkeypatch.setattr(app, 'query_whois', lambda domain, timeout=None, deadline=None: None)
+    stage_futures = {}
+    start = time.monotonic()
+    extractor = app.FeatureExtractor(f'http://127.0.0.1:{server.port}/', deadline=1,
+                                     stage_futures=stage_futures)
+    assert time.monotonic() - start < 1 + SLACK
+    assert set(app.STAGE_FEATURES['fetch']) <= set(extractor.degraded)
+
+    # The request returned at the deadline; the fetch thread must stop too
+    while not all(future.done() for future in stage_futures):
+        assert time.monotonic() - start < 1 + SLACK
+        time.sleep(0.02)
+
+
+def test_tls_handshake_stops_at_deadline(drip_server):
+    server = drip_server(TLS_RECORD)
+    extractor = app.FeatureExtractor.__new__(app.FeatureExtractor)
+    extractor.url_parse = app.urlparse(f'https://127.0.0.1:{server.port}/')
+    start = time.monotonic()
+    assert extractor.check_tls(timeout=5, deadline=start + 1) is None
+    assert time.monotonic() - start < 1 + SLACK
+
+
+def test_whois_socket_stops_at_deadline(drip_server):
+    server = drip_server(b'Domain Name: EXAMPLE.COM\r\n')
+    start = time.monotonic()
+    client = app.DeadlineNICClient(start + 1)
+    sock = client.get_socket()
+    sock.settimeout(5)
+    sock.connect(('127.0.0.1', server.port))
+    sock.sendall(b'example.com\r\n')
+    try:
+        while sock.recv(4096):
+            assert time.monotonic() - start < 1 + SLACK
+    except OSError:
+        pass
+    finally:
+        sock.close()
+    assert time.monotonic() - start < 1 + SLACK
@@ -0,0 +1,103 @@
+"""DnsResolver: single-flight lookups, positive and negative caching."""
+import socket
+import threading
+import time
+import pytest
+
+from dns_resolver import DnsResolver
+
+
+class SlowLookup:
+    # Fake resolver: answers after `delay` seconds, counting the calls
+    def __init__(self, answers, delay=0.0):
+        self.answers = answers
+        self.delay = delay
+        self.calls = []
+
+    def __call__(self, host):
+        self.calls.append(host)
+        time.sleep(self.delay)
+        answer = self.answers.get(host)
+        if answer is None:
+            raise socket.gaierror(socket.EAI_NONAME, 'Name or service not known')
+        return answer
+
+
+def test_concurrent_lookups_share_one_query():
+    lookup = SlowLookup({'example.test': ['192.0.2.1']}, delay=0.2)
+    resolver = DnsResolver(lookup=lookup)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(resolver.resolve('example.test')))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [['192.0.2.1']] * 8
+    assert lookup.calls == ['example.test']
+    stats = resolver.snapshot()
+    assert (stats['misses'], stats['joined'], stats['in_flight']) == (1, 7, 0)
+
+
+def test_answers_cached_for_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('dns_resolver.time.time', lambda: now[0])
+    lookup = SlowLookup({'example.test': ['192.0.2.1']})
+    resolver = DnsResolver(ttl=300, lookup=lookup)
+    resolver.resolve('Example.TEST.')
+    resolver.resolve('example.test')
+    assert len(lookup.calls) == 1
+    now[0] += 301
+    resolver.resolve('example.test')
+    assert len(lookup.calls) == 2
+
+
+def test_failures_cached_for_negative_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('dns_resolver.time.time', lambda: now[0])
+    lookup = SlowLookup({})
+    resolver = DnsResolver(ttl=300, negative_ttl=60, lookup=lookup)
+    for _ in range(2):
+        with pytest.raises(socket.gaierror):
+            resolver.resolve('missing.test')
+    assert len(lookup.calls) == 1
+    assert resolver.snapshot()['negative_hits'] == 1
+    now[0] += 61
+    with pytest.raises(socket.gaierror):
+        resolver.resolve('missing.test')
+    assert len(lookup.calls) == 2
+
+
+def test_waiters_get_the_failure_too():
+    lookup = SlowLookup({}, delay=0.2)
+    resolver = DnsResolver(lookup=lookup)
+    errors = []
+
+    def resolve():
+        try:
+            resolver.resolve('missing.test')
+        except socket.gaierror as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=resolve) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 4
+    assert lookup.calls == ['missing.test']
+
+
+def test_ip_literals_skip_lookup():
+    lookup = SlowLookup({})
+    resolver = DnsResolver(lookup=lookup)
+    assert resolver.resolve('192.0.2.7') == ['192.0.2.7']
+    assert resolver.resolve('[2001:DB8::1]') == ['2001:db8::1']
+    assert lookup.calls == []
+
+
+def test_cache_is_bounded():
+    resolver = DnsResolver(max_entries=2, lookup=SlowLookup({h: ['192.0.2.1'] for h in 'abc'}))
+    for host in 'abc':
+        resolver.resolve(host)
+    assert list(resolver.cache) == ['b', 'c']
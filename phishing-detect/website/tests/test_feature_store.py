@@ -0,0 +1,79 @@
+"""FeatureStore round trip, iter_vectors filters and offline rescore.py."""
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+import app
+import rescore
+from feature_store import FeatureStore, iter_vectors
+
+WEBSITE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+N_FEATURES = len(app.FEATURE_COLUMNS)
+
+
+def phishing_rows(n):
+    frame = pd.read_csv(os.path.join(os.path.dirname(WEBSITE_DIR), 'phishing.csv'), nrows=n)
+    return frame[app.FEATURE_COLUMNS].values
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    # a.test twice (older vector first), b.test degraded, c.test from version 1
+    rows = phishing_rows(4)
+    store = FeatureStore(str(tmp_path / 'vectors.sqlite3'), N_FEATURES, flush_interval=0.05)
+    store.add('http://A.test/', rows[0], '2')
+    store.add('http://a.test:80/', rows[1], '2')
+    store.add('http://b.test/', rows[2], '2', degraded=['whois'])
+    store.add('http://c.test/', rows[3], '1')
+    store.flush()
+    assert store.snapshot()['written'] == 4
+    return store.path
+
+
+def read_all(path, **filters):
+    batches = list(iter_vectors(path, N_FEATURES, batch_size=2, **filters))
+    urls = [url for meta, _ in batches for url in meta['url']]
+    matrix = np.vstack([X for _, X in batches]) if batches else np.empty((0, N_FEATURES))
+    return urls, matrix
+
+
+def test_round_trip_every_vector(store_path):
+    urls, matrix = read_all(store_path, latest_only=False)
+    assert urls == ['http://A.test/', 'http://a.test:80/', 'http://b.test/', 'http://c.test/']
+    assert (matrix == phishing_rows(4)).all()
+
+
+def test_latest_vector_per_url(store_path):
+    urls, matrix = read_all(store_path)
+    assert urls == ['http://a.test:80/', 'http://b.test/', 'http://c.test/']
+    assert (matrix[0] == phishing_rows(2)[1]).all()
+
+
+@pytest.mark.parametrize('filters, expected', [
+    ({'version': '2'}, ['http://a.test:80/', 'http://b.test/']),
+    ({'skip_degraded': True}, ['http://a.test:80/', 'http://c.test/']),
+])
+def test_filters(store_path, filters, expected):
+    assert read_all(store_path, **filters)[0] == expected
+
+
+def test_wrong_width_rejected(tmp_path):
+    store = FeatureStore(str(tmp_path / 'vectors.sqlite3'), N_FEATURES)
+    with pytest.raises(ValueError):
+        store.add('http://a.test/', [1, -1], '2')
+
+
+def test_rescore_matches_model(store_path, tmp_path):
+    model_path = os.path.join(WEBSITE_DIR, app.MODEL_PATH)
+    model = app.load_model(model_path)
+    if model is None:
+        pytest.skip(f"{app.MODEL_PATH} can not be loaded here")
+    output = str(tmp_path / 'scores.csv')
+    rescore.main([store_path, output, '--model', model_path, '--all-rows', '--batch-size', '3'])
+
+    scores = pd.read_csv(output)
+    assert scores['url'].tolist() == ['http://A.test/', 'http://a.test:80/', 'http://b.test/', 'http://c.test/']
+    expected = [app.label_prediction(p) for p in model.predict(phishing_rows(4))]
+    assert scores['result'].tolist() == expected
+    assert scores['degraded'].fillna('').tolist() == ['', '', 'whois', '']
@@ -0,0 +1,73 @@
+"""PageScan against the BeautifulSoup queries it replaced.
+
+The content features (favicon, RequestURL, AnchorURL, LinksInScriptTags,
+ServerFormHandler, IframeRedirection) only read the attribute lists that
+PageScan collects, so equal lists mean equal features. expected.json holds
+the lists the old soup.find_all() code produced for every page in pages/;
+with beautifulsoup4 installed (requirements-test.txt) they are also
+recomputed from the pages.
+"""
+import os
+import json
+import pytest
+
+from html_scanner import scan_page
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pages')
+PAGES = sorted(name for name in os.listdir(PAGES_DIR) if name.endswith('.html'))
+FIELDS = ('icon_hrefs', 'resource_srcs', 'anchor_hrefs', 'link_hrefs', 'script_srcs',
+          'form_actions', 'iframe_count')
+
+
+def read_page(name):
+    with open(os.path.join(PAGES_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def scanned(html):
+    scan = scan_page(html)
+    values = {field: getattr(scan, field) for field in FIELDS}
+    # RequestURL only counts the srcs; the old code visited img, audio,
+    # embed and iframe in separate passes, so order is not compared
+    values['resource_srcs'] = sorted(values['resource_srcs'])
+    return values
+
+
+def soup_scan(html):
+    # What FeatureExtractor read from the BeautifulSoup tree before PageScan
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    resource_srcs = []
+    for tag in ('img', 'audio', 'embed', 'iframe'):
+        resource_srcs += [element['src'] for element in soup.find_all(tag, src=True)]
+    return {
+        'icon_hrefs': [link.get('href', '') for link in soup.find_all('link', rel='icon')],
+        'resource_srcs': sorted(resource_srcs),
+        'anchor_hrefs': [a['href'] for a in soup.find_all('a', href=True)],
+        'link_hrefs': [link['href'] for link in soup.find_all('link', href=True)],
+        'script_srcs': [script['src'] for script in soup.find_all('script', src=True)],
+        'form_actions': [form['action'] for form in soup.find_all('form', action=True)],
+        'iframe_count': len(soup.find_all('iframe')),
+    }
+
+
+@pytest.fixture(scope='module')
+def expected():
+    with open(os.path.join(PAGES_DIR, 'expected.json'), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_every_page_has_expected_values(expected):
+    assert sorted(expected) == PAGES
+
+
+@pytest.mark.parametrize('name', PAGES)
+def test_matches_frozen_soup_values(name, expected):
+    assert scanned(read_page(name)) == expected[name]
+
+
+@pytest.mark.parametrize('name', PAGES)
+def test_matches_beautifulsoup(name):
+    pytest.importorskip('bs4')
+    html = read_page(name)
+    assert scanned(html) == soup_scan(html)
@@ -0,0 +1,46 @@
+"""The lexical model only runs while its tier can give a final verdict."""
+import pytest
+
+import app
+from admission import AdmissionGate
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    # Records classify_lexical calls; every full extraction is turned away
+    # by a full gate, so no URL is fetched
+    calls = []
+
+    def classify(urls):
+        calls.append(urls)
+        return [('Phishing', 0.99) for _ in urls]
+
+    gate = AdmissionGate(max_concurrent=1, max_queue=0, queue_timeout=0.1)
+    gate.acquire()
+    monkeypatch.setattr(app, 'classify_lexical', classify)
+    monkeypatch.setattr(app, 'network_gate', gate)
+    return calls
+
+
+def post(url, **options):
+    return app.app.test_client().post('/predict', json={'url': url, **options})
+
+
+def test_uncalibrated_tier_skips_model(calls, monkeypatch):
+    monkeypatch.setattr(app, 'lexical_threshold', lambda: app.LEXICAL_DISABLED)
+    assert post('http://127.0.0.1:1/off').status_code == 503
+    assert calls == []
+
+
+def test_calibrated_tier_answers(calls, monkeypatch):
+    monkeypatch.setattr(app, 'lexical_threshold', lambda: 0.9)
+    response = post('http://127.0.0.1:1/on')
+    assert response.status_code == 200
+    assert response.get_json()['tier'] == 'lexical'
+    assert len(calls) == 1
+
+
+def test_other_setup_skips_model(calls, monkeypatch):
+    monkeypatch.setattr(app, 'lexical_threshold', lambda: 0.9)
+    assert post('http://127.0.0.1:1/ensemble', mode='ensemble').status_code == 503
+    assert calls == []
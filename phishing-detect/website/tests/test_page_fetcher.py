@@ -0,0 +1,85 @@
+"""PageFetcher streams at most max_bytes of HTML and skips other content."""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+from dns_resolver import DnsResolver
+from page_fetcher import PageFetcher
+
+BIG_PAGE = b'<html>' + b'x' * (3 * 1024 * 1024) + b'</html>'
+PAGES = {
+    '/big': ('text/html', BIG_PAGE),
+    '/small': ('text/html; charset=iso-8859-1', 'caf\xe9'.encode('latin-1')),
+    '/logo.png': ('image/png', b'\x89PNG' + b'\0' * 100000),
+}
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == '/redirect':
+            self.send_response(302)
+            self.send_header('Location', '/small')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        content_type, body = PAGES[self.path]
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except OSError:
+            pass  # the fetcher stopped reading
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def base_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), PageHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def test_body_capped_at_max_bytes(base_url):
+    fetcher = PageFetcher(max_bytes=64 * 1024, chunk_size=16 * 1024)
+    response, text = fetcher.fetch(base_url + '/big', timeout=5)
+    assert response.status_code == 200
+    assert text == BIG_PAGE[:64 * 1024].decode()
+    stats = fetcher.snapshot()
+    assert stats['truncated'] == 1
+    assert stats['bytes_read'] == 64 * 1024
+
+
+def test_non_html_not_read(base_url):
+    fetcher = PageFetcher()
+    response, text = fetcher.fetch(base_url + '/logo.png', timeout=5)
+    assert response.status_code == 200
+    assert text == ''
+    assert fetcher.snapshot()['skipped_content_type'] == 1
+
+
+def test_declared_charset_and_redirects(base_url):
+    response, text = PageFetcher().fetch(base_url + '/redirect', timeout=5)
+    assert text == 'caf\xe9'
+    assert [r.status_code for r in response.history] == [302]
+
+
+def test_host_resolved_through_resolver(base_url):
+    lookups = []
+
+    def lookup(host):
+        lookups.append(host)
+        return ['127.0.0.1']
+
+    fetcher = PageFetcher(resolver=DnsResolver(lookup=lookup))
+    port = base_url.rsplit(':', 1)[1]
+    for _ in range(2):
+        _, text = fetcher.fetch(f'http://scan-target.test:{port}/small', timeout=5)
+        assert text == 'caf\xe9'
+    assert lookups == ['scan-target.test']
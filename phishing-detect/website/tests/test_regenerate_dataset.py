@@ -0,0 +1,88 @@
+"""Resume safety of regenerate_dataset.py: the parts manifest and the row
+check before the merge. No URL is fetched here.
+"""
+import os
+import argparse
+import pandas as pd
+import pytest
+
+import app
+from regenerate_dataset import parts_manifest, prepare_parts_dir, merge_parts
+
+
+def write_input(path, urls):
+    pd.DataFrame({'url': urls, 'label': ['phishing'] * len(urls)}).to_csv(path, index=False)
+    return str(path)
+
+
+def manifest_for(path, chunk_size=2):
+    return parts_manifest(argparse.Namespace(input=path, chunk_size=chunk_size, url_column='url',
+                                             label_column='label', phishing_label='phishing'))
+
+
+def write_part(parts_dir, index, row_ids):
+    frame = pd.DataFrame({'row_id': row_ids, 'url': [f'http://{i}.test/' for i in row_ids],
+                          'class': -1, 'degraded': '', 'error': None})
+    for column in app.FEATURE_COLUMNS:
+        frame[column] = 1
+    frame = frame.astype({'url': 'string', 'degraded': 'string', 'error': 'string'})
+    frame.to_parquet(os.path.join(parts_dir, f'part-{index:06d}.parquet'), index=False)
+
+
+def test_resume_with_same_input(tmp_path):
+    source = write_input(tmp_path / 'urls.csv', ['a.test', 'b.test', 'c.test'])
+    parts_dir = str(tmp_path / 'out.csv.parts')
+    prepare_parts_dir(parts_dir, manifest_for(source), restart=False)
+    write_part(parts_dir, 0, [0, 1])
+
+    prepare_parts_dir(parts_dir, manifest_for(source), restart=False)
+    assert os.path.exists(os.path.join(parts_dir, 'part-000000.parquet'))
+
+
+@pytest.mark.parametrize('change', ['input', 'chunk_size'])
+def test_refuses_parts_from_another_run(tmp_path, change):
+    source = write_input(tmp_path / 'urls.csv', ['a.test', 'b.test', 'c.test'])
+    parts_dir = str(tmp_path / 'out.csv.parts')
+    prepare_parts_dir(parts_dir, manifest_for(source), restart=False)
+    write_part(parts_dir, 0, [0, 1])
+
+    if change == 'input':
+        write_input(source, ['x.test', 'a.test', 'b.test', 'c.test'])
+        manifest = manifest_for(source)
+    else:
+        manifest = manifest_for(source, chunk_size=3)
+    with pytest.raises(SystemExit, match='--restart'):
+        prepare_parts_dir(parts_dir, manifest, restart=False)
+
+    prepare_parts_dir(parts_dir, manifest, restart=True)
+    assert os.listdir(parts_dir) == ['manifest.json']
+
+
+def test_refuses_parts_without_manifest(tmp_path):
+    source = write_input(tmp_path / 'urls.csv', ['a.test'])
+    parts_dir = tmp_path / 'out.csv.parts'
+    parts_dir.mkdir()
+    write_part(str(parts_dir), 0, [0])
+    with pytest.raises(SystemExit, match='manifest'):
+        prepare_parts_dir(str(parts_dir), manifest_for(source), restart=False)
+
+
+def test_merge_writes_rows_in_input_order(tmp_path):
+    parts_dir = str(tmp_path)
+    write_part(parts_dir, 1, [2])
+    write_part(parts_dir, 0, [0, 1])
+    output = str(tmp_path / 'out.csv')
+    assert merge_parts(parts_dir, output, keep_degraded=False, n_rows=3) == (3, 0, 0)
+    assert pd.read_csv(output)['Index'].tolist() == [0, 1, 2]
+
+
+@pytest.mark.parametrize('parts', [
+    [[0, 1], [1, 2]],  # a row in two parts
+    [[0, 1]],          # a chunk missing
+    [[0, 1], [3]],     # a row id beyond the input
+])
+def test_merge_rejects_bad_row_ids(tmp_path, parts):
+    for index, row_ids in enumerate(parts):
+        write_part(str(tmp_path), index, row_ids)
+    with pytest.raises(ValueError, match='--restart'):
+        merge_parts(str(tmp_path), str(tmp_path / 'out.csv'), keep_degraded=False, n_rows=3)
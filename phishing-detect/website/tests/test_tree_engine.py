@@ -0,0 +1,50 @@
+"""Compiled tree engines must score exactly like the pickled estimators.
+
+Every committed model is loaded both ways and run over its full training
+set: phishing.csv for the 30-feature models, dataset_lengkap.csv (scaled
+like /predict does) for the lexical model.
+"""
+import os
+import pickle
+import numpy as np
+import pandas as pd
+import pytest
+
+from lexical import scale_lexical
+from tree_engine import compile_model
+
+WEBSITE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.dirname(WEBSITE_DIR)
+MAX_PROBA_DIFF = 1e-6
+
+
+def phishing_rows():
+    return pd.read_csv(os.path.join(DATA_DIR, 'phishing.csv')).drop(columns=['Index', 'class']).values
+
+
+def lexical_rows():
+    return scale_lexical(pd.read_csv(os.path.join(DATA_DIR, 'dataset_lengkap.csv')).drop(columns=['label']).values)
+
+
+def load_estimator(name):
+    try:
+        with open(os.path.join(WEBSITE_DIR, name), 'rb') as f:
+            return pickle.load(f)
+    except Exception as e:
+        # e.g. a pickle from a newer scikit-learn / xgboost than installed
+        pytest.skip(f"{name} can not be loaded here: {e}")
+
+
+@pytest.mark.parametrize('name, rows', [
+    ('xgboosting_model.pkl', phishing_rows),
+    ('gradient_boosting_model.pkl', phishing_rows),
+    ('randomforest_model.pkl', lexical_rows),
+])
+def test_compiled_matches_estimator(name, rows):
+    estimator = load_estimator(name)
+    X = rows()
+    compiled = compile_model(estimator)
+
+    diff = np.abs(compiled.predict_proba_arrays(X) - estimator.predict_proba(X)).max()
+    assert diff < MAX_PROBA_DIFF
+    assert (compiled.predict_arrays(X) == estimator.predict(X)).all()
@@ -0,0 +1,53 @@
+"""VerdictCache and its url_key() canonical form."""
+import pytest
+
+from verdict_cache import VerdictCache, url_key
+
+
+@pytest.mark.parametrize('url, key', [
+    ('HTTP://Example.COM', 'http://example.com/'),
+    ('http://example.com:80/a?b=1#top', 'http://example.com/a?b=1'),
+    ('https://example.com:443/', 'https://example.com/'),
+    ('https://example.com:8443/', 'https://example.com:8443/'),
+    ('http://example.com./Path', 'http://example.com/Path'),
+    ('http://user:pw@Example.com/', 'http://user:pw@example.com/'),
+    ('http://[2001:DB8::1]:8080/', 'http://[2001:db8::1]:8080/'),
+])
+def test_url_key(url, key):
+    assert url_key(url) == key
+
+
+def test_hit_for_equivalent_url():
+    cache = VerdictCache()
+    cache.put('http://Example.com:80/login', {'result': 'Phishing'})
+    assert cache.get('http://example.com/login#form') == {'result': 'Phishing'}
+    assert cache.get('http://example.com/login?next=1') is None
+    assert cache.snapshot()['hits'] == 1
+
+
+def test_returns_copies():
+    cache = VerdictCache()
+    cache.put('http://example.com/', {'result': 'Aman'})
+    cache.get('http://example.com/')['cached'] = True
+    assert cache.get('http://example.com/') == {'result': 'Aman'}
+
+
+def test_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('verdict_cache.time.time', lambda: now[0])
+    cache = VerdictCache(ttl=60)
+    cache.put('http://example.com/', {'result': 'Aman'})
+    now[0] += 61
+    assert cache.get('http://example.com/') is None
+    assert cache.snapshot()['expired'] == 1
+    assert cache.snapshot()['entries'] == 0
+
+
+def test_least_recently_used_evicted():
+    cache = VerdictCache(max_entries=2)
+    cache.put('http://a.test/', {'result': 'Aman'})
+    cache.put('http://b.test/', {'result': 'Aman'})
+    cache.get('http://a.test/')
+    cache.put('http://c.test/', {'result': 'Aman'})
+    assert cache.get('http://b.test/') is None
+    assert cache.get('http://a.test/') is not None
@@ -0,0 +1,82 @@
+"""WhoisCache: one entry per registered domain, kept in memory and on disk."""
+import datetime
+import pytest
+
+from whois_cache import WhoisCache, registered_domain
+
+CREATED = datetime.datetime(2001, 2, 3)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'whois.sqlite3')
+
+
+def counting_fetch(response):
+    calls = []
+
+    def fetch(domain):
+        calls.append(domain)
+        if isinstance(response, Exception):
+            raise response
+        return response
+    return fetch, calls
+
+
+@pytest.mark.parametrize('domain, key', [
+    ('www.login.example.co.uk:8080', 'example.co.uk'),
+    ('Example.COM', 'example.com'),
+    ('192.0.2.1:8080', '192.0.2.1'),
+    ('localhost', 'localhost'),
+])
+def test_registered_domain(domain, key):
+    assert registered_domain(domain) == key
+
+
+def test_subdomains_share_one_lookup(path):
+    cache = WhoisCache(path)
+    fetch, calls = counting_fetch({'creation_date': CREATED})
+    assert cache.lookup('www.example.com', fetch).creation_date == CREATED
+    assert cache.lookup('mail.example.com', fetch).creation_date == CREATED
+    assert calls == ['example.com']
+    assert cache.snapshot()['memory_hits'] == 1
+
+
+def test_survives_restart(path):
+    fetch, calls = counting_fetch({'creation_date': CREATED})
+    WhoisCache(path).lookup('example.com', fetch)
+
+    cache = WhoisCache(path)
+    assert cache.lookup('example.com', fetch).creation_date == CREATED
+    assert calls == ['example.com']
+    assert cache.snapshot()['disk_hits'] == 1
+
+
+def test_negative_result_cached_for_negative_ttl(path, monkeypatch):
+    cache = WhoisCache(path, ttl=1000, negative_ttl=10)
+    fetch, calls = counting_fetch(ValueError('no match'))
+    now = [1000.0]
+    monkeypatch.setattr('whois_cache.time.time', lambda: now[0])
+
+    assert cache.lookup('example.com', fetch) is None
+    assert cache.lookup('example.com', fetch) is None
+    assert cache.snapshot()['negative_hits'] == 1
+    now[0] += 11
+    assert cache.lookup('example.com', fetch) is None
+    assert len(calls) == 2
+
+
+def test_network_errors_not_cached(path):
+    cache = WhoisCache(path)
+    fetch, calls = counting_fetch(TimeoutError('timed out'))
+    assert cache.lookup('example.com', fetch) is None
+    assert cache.lookup('example.com', fetch) is None
+    assert len(calls) == 2
+
+
+def test_memory_is_bounded():
+    cache = WhoisCache(None, max_entries=2)
+    fetch, _ = counting_fetch({'creation_date': CREATED})
+    for domain in ('a.com', 'b.com', 'c.com'):
+        cache.lookup(domain, fetch)
+    assert list(cache.memory) == ['b.com', 'c.com']
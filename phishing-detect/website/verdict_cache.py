@@ -0,0 +1,74 @@
+import time
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def url_key(url):
+    # Canonical form used as the verdict cache key: scheme and host
+    # lowercased, default port and fragment dropped. Path and query are kept
+    # as they are, since they can change what the page serves.
+    try:
+        parts = urlsplit(url.strip())
+        scheme = parts.scheme.lower()
+        host = (parts.hostname or '').rstrip('.')
+        port = parts.port
+    except ValueError:
+        return url.strip()
+
+    netloc = host
+    if ':' in host:
+        netloc = f'[{host}]'  # IPv6 literal
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        netloc = f'{netloc}:{port}'
+    if parts.username is not None:
+        userinfo = parts.username if parts.password is None else f'{parts.username}:{parts.password}'
+        netloc = f'{userinfo}@{netloc}'
+    return urlunsplit((scheme, netloc, parts.path or '/', parts.query, ''))
+
+
+class VerdictCache:
+    # In-memory LRU of final /predict verdicts keyed by url_key(), so a URL
+    # submitted again within `ttl` seconds is answered without any fetch,
+    # WHOIS lookup or model call.
+
+    def __init__(self, max_entries=100000, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> (expires_at, verdict)
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'stores': 0}
+
+    def get(self, url):
+        key = url_key(url)
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            if entry[0] <= now:
+                del self.entries[key]
+                self.stats['expired'] += 1
+                self.stats['misses'] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return dict(entry[1])
+
+    def put(self, url, verdict):
+        key = url_key(url)
+        with self.lock:
+            self.entries[key] = (time.time() + self.ttl, dict(verdict))
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            self.stats['stores'] += 1
+
+    def snapshot(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats['entries'] = len(self.entries)
+        return stats
@@ -0,0 +1,140 @@
+import time
+import pickle
+import sqlite3
+import threading
+import tldextract
+from collections import OrderedDict
+
+# Offline extractor: use the public suffix list bundled with tldextract so
+# building a cache key never goes to the network.
+_tld_extract = tldextract.TLDExtract(suffix_list_urls=())
+
+
+def registered_domain(domain):
+    # "www.login.example.co.uk:8080" -> "example.co.uk", so every subdomain
+    # of a site shares one cache entry. IPs and bare hosts are used as-is.
+    ext = _tld_extract(domain)
+    key = getattr(ext, 'top_domain_under_public_suffix', None)
+    if key is None:
+        key = ext.registered_domain
+    return (key or domain.split(':')[0]).lower()
+
+
+class WhoisRecord(dict):
+    # Cached WHOIS fields with the same attribute access as whois.WhoisEntry
+    # (record.creation_date, record.expiration_date, ...).
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+class WhoisCache:
+    # Two-tier WHOIS cache: an in-process LRU in front of a SQLite table that
+    # survives restarts and is shared by every worker on the host.
+    # Negative results (no record / lookup failed) are kept for negative_ttl,
+    # which is normally much shorter than ttl.
+
+    def __init__(self, path, max_entries=10000, ttl=7 * 24 * 3600, negative_ttl=3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.lock = threading.Lock()
+        self.memory = OrderedDict()  # key -> (expires_at, record or None)
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0,
+                      'negative_hits': 0, 'stores': 0, 'errors': 0}
+        self.db = None
+
+        if path:
+            try:
+                self.db = sqlite3.connect(path, check_same_thread=False, timeout=5)
+                self.db.execute('PRAGMA journal_mode=WAL')
+                self.db.execute('CREATE TABLE IF NOT EXISTS whois_cache ('
+                                'domain TEXT PRIMARY KEY, expires_at REAL, record BLOB)')
+                self.db.commit()
+            except Exception as e:
+                print(f"WARNING: WHOIS disk cache disabled ({path}): {e}")
+                self.db = None
+
+    def get(self, domain):
+        # Returns (found, record). record is None for a cached negative result.
+        key = registered_domain(domain)
+        now = time.time()
+
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry and entry[0] > now:
+                self.memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                if entry[1] is None:
+                    self.stats['negative_hits'] += 1
+                return True, entry[1]
+
+            if self.db is not None:
+                try:
+                    row = self.db.execute('SELECT expires_at, record FROM whois_cache WHERE domain = ?',
+                                          (key,)).fetchone()
+                except Exception as e:
+                    print(f"WHOIS cache read failed: {e}")
+                    self.stats['errors'] += 1
+                    row = None
+                if row and row[0] > now:
+                    record = WhoisRecord(pickle.loads(row[1])) if row[1] is not None else None
+                    self._remember(key, row[0], record)
+                    self.stats['disk_hits'] += 1
+                    if record is None:
+                        self.stats['negative_hits'] += 1
+                    return True, record
+
+            self.stats['misses'] += 1
+            return False, None
+
+    def put(self, domain, response):
+        key = registered_domain(domain)
+        record = WhoisRecord(response) if response else None
+        expires_at = time.time() + (self.ttl if record is not None else self.negative_ttl)
+
+        with self.lock:
+            self._remember(key, expires_at, record)
+            self.stats['stores'] += 1
+            if self.db is not None:
+                try:
+                    blob = pickle.dumps(dict(record)) if record is not None else None
+                    self.db.execute('INSERT OR REPLACE INTO whois_cache (domain, expires_at, record) '
+                                    'VALUES (?, ?, ?)', (key, expires_at, blob))
+                    self.db.commit()
+                except Exception as e:
+                    print(f"WHOIS cache write failed: {e}")
+                    self.stats['errors'] += 1
+        return record
+
+    def lookup(self, domain, fetch):
+        # Cached WHOIS lookup. `fetch(domain)` does the real query for the
+        # registered domain on a miss. Network errors (timeouts, refused
+        # connections) are not cached so the next request retries.
+        found, record = self.get(domain)
+        if found:
+            return record
+
+        key = registered_domain(domain)
+        try:
+            response = fetch(key)
+        except OSError:
+            return None
+        except Exception:
+            response = None
+        return self.put(key, response)
+
+    def _remember(self, key, expires_at, record):
+        self.memory[key] = (expires_at, record)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def snapshot(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats['memory_entries'] = len(self.memory)
+        return stats